@@ -122,6 +122,11 @@ void loop() {
     if (command == "CAM:CAPTURE") {
       captureAndSend();
     }
+    else if (command == "ID?") {
+      // Handshake auto-discovery (serial_manager.py)
+      Serial.print("ID:cam:");
+      Serial.println(String((uint32_t)(ESP.getEfuseMac() & 0xFFFFFFFF), HEX));
+    }
   }
   
   delay(100);
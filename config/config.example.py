@@ -18,6 +18,14 @@ CARA PAKAI:
 2. Sesuaikan nilai-nilai di bawah dengan setup Anda
 3. Import di script Python: from config import *
 
+Server (laptop_inference_dual.py, blynk_dashboard.py) load config lewat
+inference/config_loader.py:
+- Key yang belum ada di config.py diisi default dari file ini
+- Override via environment: PEMILAH_<KEY>, mis. PEMILAH_CONFIDENCE_THRESHOLD=0.6
+- Nilai divalidasi saat start (tipe, range); error → server tidak jalan
+- CONFIG_HOT_RELOAD: edit config.py saat server jalan → threshold, timeout,
+  sync interval & logging langsung dipakai (field lain perlu restart)
+
 Author: @krompium
 Untuk: UAS Sistem Pemilah Sampah Cerdas
 =============================================================================
@@ -37,10 +45,33 @@ ESP32CAM_PORT = 80
 ESP32_MAIN_PORT = 80
 LAPTOP_PORT = 5000                            # Flask server port
 
+# Streaming ingest (lihat inference/stream_ingest.py)
+STREAM_INGEST_ENABLED = False                 # ⚙️ TCP stream JPEG per kamera
+STREAM_INGEST_PORT = 5001                     # Port TCP stream ingest
+STREAM_QUEUE_SIZE = 2                         # Max frame antri per kamera (sisanya di-drop)
+STREAM_MAX_FRAME_BYTES = 2000000              # Frame lebih besar dari ini dibuang
+
+# Binary wire protocol ke ESP32 Main (lihat inference/wire_protocol.py)
+ACTUATION_PROTOCOL = "http"                   # ⚙️ "http" (JSON /classify) | "binary_udp" | "binary_tcp"
+ESP32_BINARY_PORT = 9100                      # Port receiver binary di ESP32 Main
+ACTUATION_ACK_TIMEOUT = 0.5                   # Tunggu ACK per percobaan (detik)
+ACTUATION_RETRIES = 2                         # Kirim ulang (seq sama) jika ACK tidak datang
+ACTUATION_HTTP_TIMEOUT = 5                    # Timeout POST /classify (detik)
+
+# Gateway multi-node (lihat inference/gateway.py)
+GATEWAY_NODES = ["http://127.0.0.1:5101"]     # ⚙️ URL node inference (laptop_inference_dual.py)
+GATEWAY_NODE_BASE_PORT = 5101                 # Port node pertama untuk --spawn N
+GATEWAY_ACTUATION = "gateway"                 # ⚙️ "gateway" (command dikirim gateway) | "node"
+GATEWAY_STICKY_SLACK = 2                      # Station pindah node jika outstanding > min + slack
+GATEWAY_HEALTH_INTERVAL = 2.0                 # Interval health check GET /status (detik)
+GATEWAY_HEALTH_TIMEOUT = 1.0                  # Timeout health check (detik)
+GATEWAY_REQUEST_TIMEOUT = 10                  # Timeout forward frame ke node (detik)
+
 # ========== BLYNK IOT ==========
 BLYNK_AUTH = "YourBlynkAuthToken"             # ⚙️ GANTI dengan Blynk Auth Token
 BLYNK_SERVER = "blynk.cloud"                  # Blynk server (default: blynk.cloud)
 BLYNK_PORT = 80
+BLYNK_SYNC_INTERVAL = 5                       # ⚙️ Interval sync ESP32 → Blynk (detik)
 
 # Virtual Pins
 BLYNK_VPIN_ORGANIK = "V0"                     # Counter organik
@@ -69,15 +100,54 @@ THRESHOLD_ORGANIK_FULL = 5                    # ⚙️ Jarak (cm) dianggap FULL
 THRESHOLD_ANORGANIK_FULL = 5                  # ⚙️ Jarak (cm) dianggap FULL
 THRESHOLD_B3_FULL = 5                         # ⚙️ Jarak (cm) dianggap FULL
 
+# Fill-level forecasting (blynk_dashboard.py, lihat fill_forecast.py)
+FORECAST_ENABLED = True                       # Prediksi time-to-full dari history jarak
+FORECAST_HORIZON_MIN = 30                     # ⚙️ Warning jika diprediksi penuh dalam N menit
+FORECAST_HISTORY_SIZE = 2880                  # Sample per bin di ring buffer (4 jam @ 5 detik)
+FORECAST_TRACE_FILE = "logs/bin_trace.csv"    # Trace jarak untuk evaluasi offline ("" = off)
+
 # ========== MODEL SETTINGS ==========
 MODEL_PATH = "models/best.pt"                 # ⚙️ Path ke YOLOv8 model
 CONFIDENCE_THRESHOLD = 0.70                   # ⚙️ Confidence threshold (0.0-1.0)
 IOU_THRESHOLD = 0.45                          # ⚙️ IoU threshold untuk NMS
 
+# Model variant selection (lihat inference/model_variants.py)
+MODEL_AUTO_SELECT = False                     # ⚙️ Pilih FP32/FP16/INT8 dari manifest
+MODEL_VARIANT_MANIFEST = "models/variants.json"
+MODEL_LATENCY_BUDGET_MS = 400                 # ⚙️ Budget p95 latency per image (ms)
+MODEL_MAX_ACCURACY_DROP = 0.02                # Max penurunan akurasi vs variant terbaik
+
 # Image settings
 IMAGE_SIZE = 640                              # Input size untuk YOLOv8 (640 recommended)
 MAX_DETECTIONS = 10                           # Max detections per image
 
+# Adaptive resolution (lihat inference/resolution_tuner.py)
+ADAPTIVE_RESOLUTION = False                   # ⚙️ Turunkan input size saat load tinggi
+ADAPTIVE_SIZES = [320, 416, 512, 640]         # Kandidat input size (kelipatan 32)
+ADAPTIVE_ACCURACY_TOLERANCE = 0.02            # Max penurunan akurasi saat profiling (2%)
+ADAPTIVE_TARGET_LATENCY_MS = 500              # ⚙️ Target latency inference (ms)
+RESOLUTION_PROFILE_PATH = "models/resolution_profile.json"
+
+# Two-stage cascade (lihat inference/cascade.py)
+CASCADE_ENABLED = False                       # ⚙️ Classifier dulu, detector jika ragu
+CASCADE_MODEL_PATH = "models/best-cls.pt"     # YOLOv8-cls model
+CASCADE_THRESHOLD = 0.85                      # ⚙️ Di bawah ini → escalate ke detector
+CASCADE_ESCALATE_CLASSES = [2]                # Class yang selalu dicek detector (B3)
+CASCADE_CROP_FRACTION = 0.8                   # Ukuran center crop (fraksi frame)
+CASCADE_IMAGE_SIZE = 224                      # Input size classifier
+CASCADE_LOG_FILE = "cascade_routing.csv"      # Log keputusan routing (di LOG_DIR)
+
+# Test-time augmentation (lihat inference/tta.py)
+# Frame dengan conf top-1 di band [LOW, HIGH) diprediksi ulang (flip & scale) lalu
+# digabung Weighted Box Fusion; keputusan akhir tetap pakai CONFIDENCE_THRESHOLD
+TTA_ENABLED = False                           # ⚙️ Opt-in
+TTA_BAND_LOW = 0.40                           # ⚙️ Di bawah ini = jelas kosong (tanpa TTA)
+TTA_BAND_HIGH = 0.85                          # ⚙️ Di atas ini = yakin (tanpa TTA)
+TTA_SCALES = [1.0, 0.83, 1.17]                # Faktor IMAGE_SIZE (1 batch model per scale)
+TTA_FLIPS = ["hflip"]                         # "hflip" / "vflip" (kamera top-down: keduanya valid)
+TTA_LATENCY_BUDGET_MS = 300                   # ⚙️ Max tambahan latency per request (augmentasi dibatasi)
+TTA_WBF_IOU = 0.55                            # IoU minimum box digabung saat fusion
+
 # ========== CLASS MAPPING ==========
 # Mapping dari class index ke nama kategori
 CLASS_NAMES = {
@@ -102,10 +172,19 @@ CLASS_COLORS = {
 
 # ========== SERIAL COMMUNICATION ==========
 # Backup communication jika WiFi gagal
-SERIAL_PORT_WINDOWS = "COM3"                  # ⚙️ Port untuk Windows
-SERIAL_PORT_LINUX = "/dev/ttyUSB0"            # ⚙️ Port untuk Linux
+SERIAL_ENABLED = True                         # False = tanpa serial (mis. node di belakang gateway)
+SERIAL_PORT_WINDOWS = "COM3"                  # ⚙️ Port untuk Windows (di-probe duluan)
+SERIAL_PORT_LINUX = "/dev/ttyUSB0"            # ⚙️ Port untuk Linux (di-probe duluan)
 SERIAL_BAUD_RATE = 115200
-SERIAL_TIMEOUT = 2                            # seconds
+SERIAL_TIMEOUT = 2                            # Write timeout (seconds)
+
+# Auto-discovery & reconnect (serial_manager.py, handshake "ID?" di firmware)
+SERIAL_BOARDS = ["main"]                      # Role board yang dicari ("main", "cam")
+SERIAL_PROBE_TIMEOUT = 2.0                    # Max tunggu jawaban handshake per port (s)
+SERIAL_DISCOVERY_TIMEOUT = 5.0                # Max total waktu discovery (s)
+SERIAL_RECONNECT_INTERVAL = 3.0               # Interval cek / reconnect background (s)
+SERIAL_REQUIRE_HANDSHAKE = False              # False = port di atas tetap dipakai untuk firmware lama
+SERIAL_PORT_CACHE = "logs/serial_ports.json"  # Cache board → port
 
 # ========== MOTION DETECTION ==========
 MOTION_THRESHOLD = 30                         # ⚙️ Sensitivity (0-100)
@@ -117,6 +196,33 @@ LOG_DIR = "logs"                              # Directory untuk log files
 LOG_FILE = "waste_sorting.csv"                # CSV log file
 SAVE_IMAGES = True                            # Save captured images?
 IMAGE_SAVE_DIR = "captured_images"            # Directory untuk save images
+SAVE_IMAGE_WIDTH = 0                          # Lebar image tersimpan (0 = resolusi asli)
+
+# Detection history (lihat inference/detection_store.py)
+HISTORY_DB_ENABLED = True                     # Simpan deteksi ke SQLite ter-index (/history)
+HISTORY_DB_PATH = "logs/detections.db"
+STATION_ID = "station-1"                      # ⚙️ ID station default (override: ?station= / X-Station-ID)
+
+# Outbox durable (lihat inference/outbox.py)
+# Command aktuasi & event deteksi dicatat (SQLite WAL) sebelum dikirim, gagal → dicoba ulang
+OUTBOX_ENABLED = True
+OUTBOX_DB_PATH = "logs/outbox.db"
+OUTBOX_COMMAND_TTL_S = 10                     # ⚙️ Command lebih tua dari ini tidak dikirim ulang (item sudah lewat)
+OUTBOX_RETRY_BASE_S = 1.0                     # Backoff retry pertama (detik, x2 tiap gagal)
+OUTBOX_RETRY_MAX_S = 30.0                     # Backoff maksimum (detik)
+OUTBOX_REPLAY_BATCH = 500                     # Event per batch saat replay / retry
+OUTBOX_RETENTION_H = 24                       # Event selesai disimpan selama ini (jam)
+OUTBOX_SYNC = "NORMAL"                        # "NORMAL" (aman crash proses) | "FULL" (aman mati listrik, lebih lambat)
+
+# Active learning (lihat inference/active_learning.py)
+# Frame tidak pasti disimpan ke pool → export YOLO untuk labelling & retraining
+ACTIVE_LEARNING_ENABLED = False               # ⚙️ Opt-in
+ACTIVE_LEARNING_DIR = "logs/active_learning"
+ACTIVE_LEARNING_POOL_SIZE = 500               # ⚙️ Max sample di pool (skor terendah di-evict)
+ACTIVE_LEARNING_MIN_SCORE = 0.35              # ⚙️ Skor ketidakpastian minimum (0-1)
+ACTIVE_LEARNING_MARGIN = 0.25                 # Margin conf top-1 vs class lain di bawah ini = "low_margin"
+ACTIVE_LEARNING_WINDOW_S = 3.0                # Frame station sama dalam window ini dianggap item sama
+ACTIVE_LEARNING_HASH_DISTANCE = 6             # Jarak dHash (bit) maksimum untuk dianggap duplikat
 
 # CSV columns
 CSV_COLUMNS = [
@@ -133,17 +239,36 @@ USE_CUDA = True                               # Use GPU jika tersedia
 USE_HALF_PRECISION = False                    # FP16 inference (faster, sedikit kurang akurat)
 NUM_THREADS = 4                               # CPU threads (jika tidak pakai GPU)
 
+# Ingress queue & load shedding (load_shedding.py)
+INGRESS_QUEUE_SIZE = 4                        # ⚙️ Max request menunggu giliran inference
+LOAD_SHED_POLICY = "reject"                   # ⚙️ "reject" (503) | "drop_oldest" | "degrade"
+LOAD_SHED_RETRY_AFTER = 2                     # Header Retry-After (detik) saat 503
+LOAD_SHED_DEGRADE_SIZE = 320                  # Input size saat policy "degrade"
+LOAD_SHED_DEGRADE_MODEL = ""                  # Model lebih kecil saat "degrade" (mis. "models/best-n.pt", "" = off)
+
+# Upload multi-image /upload_batch (upload_batch.py)
+UPLOAD_BATCH_MAX_IMAGES = 16                  # ⚙️ Max image per request (= ukuran batch model)
+UPLOAD_BATCH_MAX_IMAGE_BYTES = 2000000        # Image lebih besar dari ini → request ditolak (400)
+UPLOAD_BATCH_DECODE_WORKERS = 4               # Thread decode JPEG paralel
+
+# Buffer pool (buffer_pool.py): body JPEG & canvas annotation dipakai ulang
+BUFFER_POOL_ENABLED = True
+BUFFER_POOL_MAX_MB = 64                       # ⚙️ Batas total memori pool (MB)
+UPLOAD_MAX_BYTES = 2000000                    # ⚙️ Body /upload lebih besar → 413 (pool penuh → 503)
+
 # ========== TIMEOUTS ==========
 HTTP_TIMEOUT = 10                             # HTTP request timeout (seconds)
 WIFI_RECONNECT_INTERVAL = 30                  # WiFi reconnect interval (seconds)
 BLYNK_RECONNECT_INTERVAL = 60                 # Blynk reconnect interval (seconds)
 
 # ========== GUI SETTINGS ==========
-SHOW_GUI = True                               # Show detection GUI window
+SHOW_GUI = True                               # Publish frame ter-annotasi ke /preview
 GUI_WINDOW_NAME = "Sistem Pemilah Sampah - Live Detection"
 GUI_WINDOW_WIDTH = 1280
 GUI_WINDOW_HEIGHT = 720
 DISPLAY_FPS = True                            # Show FPS counter
+PREVIEW_MAX_FPS = 5                           # ⚙️ Max FPS stream /preview (terpisah dari inference)
+PREVIEW_JPEG_QUALITY = 70                     # Kualitas JPEG preview (0-100)
 DISPLAY_CONFIDENCE = True                     # Show confidence score
 
 # ========== NOTIFICATIONS ==========
@@ -159,11 +284,26 @@ EMAIL_PASSWORD = "your_app_password"
 EMAIL_TO = "notification@example.com"
 
 # ========== DEBUG ==========
-DEBUG_MODE = True                             # Print debug information
+DEBUG_MODE = True                             # Flask debug (reloader selalu off)
 VERBOSE_LOGGING = True                        # Detailed logs
 SAVE_DEBUG_IMAGES = False                     # Save images dengan bounding boxes
 
+# Structured logging server inference (structured_logging.py)
+LOG_LEVEL = "INFO"                            # ⚙️ "DEBUG" = detail per langkah tiap request
+LOG_FORMAT = "text"                           # ⚙️ "text" (console) | "json" (1 objek per baris)
+LOG_QUEUE_SIZE = 10000                        # Antrian log non-blocking (penuh = record dibuang)
+LOG_SAMPLE_EVERY = {"detection": 1}           # ⚙️ Tulis 1 dari N per pesan hot-path, mis. {"detection": 20, "werkzeug": 50}
+LOG_TO_FILE = ""                              # File log rotating di LOG_DIR (mis. "inference.log", "" = console saja)
+
+# Slow request profiler (slow_profiler.py, GET /debug/slow)
+SLOW_PROFILER_ENABLED = False                 # ⚙️ Opt-in: stage breakdown + sampled stack
+SLOW_REQUEST_THRESHOLD_MS = 1000              # ⚙️ Request >= ini disimpan
+SLOW_PROFILER_RING_SIZE = 50                  # Max request lambat yang disimpan
+SLOW_PROFILER_SAMPLE_MS = 5                   # Interval sampling stack (ms)
+
 # ========== SYSTEM ==========
+CONFIG_HOT_RELOAD = True                      # ⚙️ Pantau config.py, terapkan field aman tanpa restart
+CONFIG_RELOAD_INTERVAL = 1.0                  # Interval cek perubahan file (detik)
 AUTO_START = True                             # Auto start detection saat script run
 ENABLE_FALLBACK = True                        # Enable Serial fallback jika WiFi gagal
 MAX_RETRY_ATTEMPTS = 3                        # Max retry untuk HTTP requests
@@ -172,6 +312,12 @@ MAX_RETRY_ATTEMPTS = 3                        # Max retry untuk HTTP requests
 CALIBRATION_MODE = False                      # Enable calibration mode
 CALIBRATION_SAMPLES = 10                      # Number of samples untuk calibration
 
+# Platform ROI (lihat inference/platform_roi.py)
+# CALIBRATION_MODE = True → upload berikutnya dianggap frame tray KOSONG
+USE_PLATFORM_ROI = True                       # ⚙️ Inference hanya di region platform
+PLATFORM_ROI_PATH = "models/platform_roi.json"
+PLATFORM_ROI_MARGIN = 0.05                    # Margin di sekitar platform (fraksi frame)
+
 # ========== ADVANCED ==========
 # YOLOv8 advanced settings
 YOLO_DEVICE = "0"                             # "0" for GPU, "cpu" for CPU
@@ -177,6 +177,11 @@ void processCommand(String command) {
   else if (command == "RESET") {
     resetCounters();
   }
+  else if (command == "ID?") {
+    // Handshake auto-discovery (serial_manager.py)
+    Serial.print("ID:main:");
+    Serial.println(String((uint32_t)(ESP.getEfuseMac() & 0xFFFFFFFF), HEX));
+  }
   else {
     Serial.println("❌ Perintah tidak dikenali!");
   }
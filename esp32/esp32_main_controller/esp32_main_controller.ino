@@ -92,6 +92,7 @@ int THRESHOLD_B3_FULL = 5;          // ⚙️ Jarak (cm) dianggap bin FULL
 #define ULTRASONIC_TIMEOUT 30000  // Timeout untuk ultrasonic (microseconds)
 #define WIFI_TIMEOUT    20000     // Timeout WiFi connection (ms)
 #define BLYNK_TIMEOUT   10000     // Timeout Blynk connection (ms)
+#define BOARD_ROLE      "main"    // Jawaban handshake "ID?" (serial_manager.py)
 
 // ========== GLOBAL VARIABLES ==========
 Servo servoPenadah;     // Servo untuk buka/tutup penadah
@@ -110,6 +111,11 @@ bool binOrganikFull = false;
 bool binAnorganikFull = false;
 bool binB3Full = false;
 
+// Jarak terakhir sensor ultrasonik (cm), untuk forecasting fill level
+float distOrganik = -1;
+float distAnorganik = -1;
+float distB3 = -1;
+
 // Status sistem
 bool wifiConnected = false;
 bool blynkConnected = false;
@@ -455,7 +461,10 @@ void handleStatus() {
   json += "\"total_processed\":" + String(totalProcessed) + ",";
   json += "\"bin_organik_full\":" + String(binOrganikFull ? "true" : "false") + ",";
   json += "\"bin_anorganik_full\":" + String(binAnorganikFull ? "true" : "false") + ",";
-  json += "\"bin_b3_full\":" + String(binB3Full ? "true" : "false");
+  json += "\"bin_b3_full\":" + String(binB3Full ? "true" : "false") + ",";
+  json += "\"dist_organik\":" + String(distOrganik, 1) + ",";
+  json += "\"dist_anorganik\":" + String(distAnorganik, 1) + ",";
+  json += "\"dist_b3\":" + String(distB3, 1);
   json += "}";
   
   server.send(200, "application/json", json);
@@ -487,7 +496,16 @@ void handleSerialInput() {
   
   if (c == '\n' || c == '\r') {
     if (receivedData.length() > 0) {
-      int classIdx = receivedData.toInt();
+      // Handshake auto-discovery dari laptop: "ID?" → "ID:<role>:<mac>"
+      if (receivedData == "ID?") {
+        replyIdentify();
+        receivedData = "";
+        return;
+      }
+      
+      // toInt() mengembalikan 0 untuk teks non-angka: jangan sampai
+      // baris sembarang memicu sort ORGANIK
+      int classIdx = isDigit(receivedData.charAt(0)) ? receivedData.toInt() : -1;
       
       Serial.println("\n📨 Received classification via SERIAL:");
       Serial.print("   Data: ");
@@ -508,6 +526,13 @@ void handleSerialInput() {
   }
 }
 
+void replyIdentify() {
+  Serial.print("ID:");
+  Serial.print(BOARD_ROLE);
+  Serial.print(":");
+  Serial.println(String((uint32_t)(ESP.getEfuseMac() & 0xFFFFFFFF), HEX));
+}
+
 /*
 =============================================================================
 SORT WASTE - FUNGSI UTAMA PEMILAH SAMPAH
@@ -669,9 +694,9 @@ void checkAllBins() {
   // Cek setiap 2 detik (tidak perlu terlalu sering)
   if (millis() - lastCheck < 2000) return;
   
-  float distOrganik = getDistance(TRIG_ORGANIK, ECHO_ORGANIK);
-  float distAnorganik = getDistance(TRIG_ANORGANIK, ECHO_ANORGANIK);
-  float distB3 = getDistance(TRIG_B3, ECHO_B3);
+  distOrganik = getDistance(TRIG_ORGANIK, ECHO_ORGANIK);
+  distAnorganik = getDistance(TRIG_ANORGANIK, ECHO_ANORGANIK);
+  distB3 = getDistance(TRIG_B3, ECHO_B3);
   
   binOrganikFull = (distOrganik <= THRESHOLD_ORGANIK_FULL && distOrganik > 0);
   binAnorganikFull = (distAnorganik <= THRESHOLD_ANORGANIK_FULL && distAnorganik > 0);
@@ -0,0 +1,358 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - ACTIVE LEARNING SAMPLE SELECTOR
+Pilih frame production yang paling informatif untuk retraining
+=============================================================================
+
+FITUR:
+✅ Skor ketidakpastian per frame (0-1):
+   - low_margin    : selisih conf top-1 vs class lain di objek yang sama kecil
+   - no_detection  : tidak ada box di atas CONFIDENCE_THRESHOLD
+   - disagreement  : class berbeda dengan frame sebelumnya dari station yang
+                     sama dalam window singkat (item yang sama)
+✅ Pool terbatas (ACTIVE_LEARNING_POOL_SIZE): sample skor terendah di-evict
+✅ Dedup perceptual hash (dHash 64-bit): frame hampir identik hanya disimpan
+   1x (yang skornya tertinggi)
+✅ Pool persisten (JPEG + JSON prediksi), survive restart server; file
+   ditulis dulu sebelum entry masuk pool (export / evict tidak pernah
+   melihat sample setengah jadi), kapasitas ditegakkan juga saat load
+✅ Export format YOLO (images/, labels/, data.yaml) + manifest.csv urut skor;
+   label = prediksi model sebagai pre-label untuk direview
+
+CARA PAKAI:
+    # Ringkasan pool
+    python active_learning.py stats --pool logs/active_learning
+
+    # Export untuk labelling / retraining
+    python active_learning.py export --pool logs/active_learning --out al_dataset
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import heapq
+import shutil
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from inference_utils import box_iou
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
+    ACTIVE_LEARNING_DIR = "logs/active_learning"
+
+NO_DETECTION_SCORE = 0.6
+DISAGREEMENT_SCORE = 0.9
+OVERLAP_IOU = 0.3  # Box class lain dianggap objek yang sama di atas IoU ini
+
+def top1_margin(detections):
+    """
+    Margin conf top-1 vs box class lain yang overlap (objek sama)
+
+    Args:
+        detections: N x 6 (x1, y1, x2, y2, conf, cls), N >= 1
+
+    Returns:
+        (class top-1, conf top-1, margin)
+    """
+    best = int(np.argmax(detections[:, 4]))
+    top = detections[best]
+    rival = 0.0
+    for row in detections:
+        if int(row[5]) != int(top[5]) and box_iou(row, top) >= OVERLAP_IOU:
+            rival = max(rival, float(row[4]))
+    return int(top[5]), float(top[4]), float(top[4]) - rival
+
+def dhash(image, size=8):
+    """
+    Difference hash 64-bit (int) dari image BGR
+    """
+    import cv2
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class ActiveLearningSelector:
+    """
+    selector.offer(image, detections, station) di jalur inference;
+    hanya frame yang lolos skor + dedup yang di-encode & ditulis ke disk
+    """
+
+    def __init__(self, pool_dir, capacity=500, min_score=0.35, margin_threshold=0.25,
+                 disagreement_window_s=3.0, hash_distance=6, jpeg_quality=95):
+        self.pool_dir = Path(pool_dir)
+        self.capacity = capacity
+        self.min_score = min_score
+        self.margin_threshold = margin_threshold
+        self.disagreement_window_s = disagreement_window_s
+        self.hash_distance = hash_distance
+        self.jpeg_quality = jpeg_quality
+
+        self.lock = threading.Lock()
+        self.entries = {}  # sample id → metadata
+        self.heap = []  # (score, id) min-heap untuk eviction
+        self.writing = set()  # sample id yang file-nya sedang ditulis
+        self.last_seen = {}  # station → (ts, class)
+        self.counters = {'offered': 0, 'below_threshold': 0, 'duplicates': 0,
+                         'replaced': 0, 'admitted': 0, 'evicted': 0}
+
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # ---- pool persisten ----
+    def _load(self):
+        for meta_path in self.pool_dir.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            if (self.pool_dir / meta['image']).exists():
+                self.entries[meta['id']] = meta
+                heapq.heappush(self.heap, (meta['score'], meta['id']))
+        # Capacity diperkecil sejak run sebelumnya: buang skor terendah
+        self._evict()
+
+    def _remove(self, sample_id):
+        meta = self.entries.pop(sample_id, None)
+        if meta is not None:
+            self._unlink(meta)
+
+    def _unlink(self, meta):
+        for name in (meta['image'], f"{meta['id']}.json"):
+            try:
+                (self.pool_dir / name).unlink()
+            except OSError:
+                pass
+
+    def _find_duplicate(self, image_hash):
+        # Dipanggil dengan lock
+        for sample_id, meta in self.entries.items():
+            if hamming(meta['hash'], image_hash) <= self.hash_distance:
+                return sample_id
+        return None
+
+    # ---- scoring ----
+    def score(self, detections, station=None, now=None):
+        """
+        Returns:
+            (score 0-1, reasons list, class top-1 / -1)
+        """
+        now = time.time() if now is None else now
+        reasons = []
+
+        if len(detections) == 0:
+            predicted, score = -1, NO_DETECTION_SCORE
+            reasons.append("no_detection")
+        else:
+            predicted, _, margin = top1_margin(detections)
+            score = 1.0 - margin
+            if margin < self.margin_threshold:
+                reasons.append("low_margin")
+
+        # Frame berurutan dari station yang sama dalam window = item yang sama
+        key = station or "-"
+        previous = self.last_seen.get(key)
+        self.last_seen[key] = (now, predicted)
+        if previous is not None and now - previous[0] <= self.disagreement_window_s and previous[1] != predicted:
+            score = max(score, DISAGREEMENT_SCORE)
+            reasons.append("disagreement")
+
+        return score, reasons, predicted
+
+    def offer(self, image, detections, station=None, now=None):
+        """
+        Nilai 1 frame; simpan ke pool jika cukup informatif
+
+        Args:
+            detections: N x 6 (x1, y1, x2, y2, conf, cls) koordinat full-frame
+
+        Returns:
+            True jika masuk pool
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            self.counters['offered'] += 1
+            score, reasons, predicted = self.score(detections, station, now)
+            if score < self.min_score:
+                self.counters['below_threshold'] += 1
+                return False
+            if len(self.entries) >= self.capacity and self.heap and score <= self.heap[0][0]:
+                self.counters['below_threshold'] += 1
+                return False
+
+        # Hash di luar lock (resize kecil), encode JPEG hanya jika lolos dedup
+        image_hash = dhash(image)
+        with self.lock:
+            duplicate = self._find_duplicate(image_hash)
+            if duplicate is not None and self.entries[duplicate]['score'] >= score:
+                self.counters['duplicates'] += 1
+                return False
+
+            sample_id = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{image_hash:016x}"
+            if sample_id in self.writing:
+                # Frame identik di detik yang sama sedang ditulis thread lain
+                self.counters['duplicates'] += 1
+                return False
+            self.writing.add(sample_id)
+            meta = {
+                'id': sample_id,
+                'image': f"{sample_id}.jpg",
+                'timestamp': now,
+                'station': station,
+                'score': round(score, 4),
+                'reasons': reasons,
+                'predicted_class': predicted,
+                'hash': image_hash,
+                'width': int(image.shape[1]),
+                'height': int(image.shape[0]),
+                'detections': [[round(float(v), 4) for v in row] for row in detections]
+            }
+
+        # Tulis file dulu (di luar lock), baru publish ke pool
+        try:
+            self._write(image, meta)
+        except BaseException:
+            with self.lock:
+                self.writing.discard(sample_id)
+            self._unlink(meta)
+            raise
+
+        with self.lock:
+            self.writing.discard(sample_id)
+            # Pool bisa berubah selama encode: cek ulang duplikat
+            duplicate = self._find_duplicate(image_hash)
+            if duplicate is not None:
+                if self.entries[duplicate]['score'] >= meta['score']:
+                    self.counters['duplicates'] += 1
+                    self._unlink(meta)
+                    return False
+                if duplicate == sample_id:
+                    # File lama (id sama) sudah tertimpa file baru
+                    self.entries.pop(duplicate)
+                else:
+                    self._remove(duplicate)
+                self.counters['replaced'] += 1
+
+            self.entries[sample_id] = meta
+            heapq.heappush(self.heap, (meta['score'], sample_id))
+            self._evict()
+            self.counters['admitted'] += 1
+        return True
+
+    def _evict(self):
+        # Dipanggil dengan lock; entry di heap yang sudah dihapus dilewati
+        while len(self.entries) > self.capacity and self.heap:
+            _, sample_id = heapq.heappop(self.heap)
+            if sample_id in self.entries:
+                self._remove(sample_id)
+                self.counters['evicted'] += 1
+
+    def _write(self, image, meta):
+        import cv2
+
+        cv2.imwrite(str(self.pool_dir / meta['image']), image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        (self.pool_dir / f"{meta['id']}.json").write_text(json.dumps(meta))
+
+    # ---- export ----
+    def export(self, out_dir, min_score=0.0):
+        """
+        Export pool ke format YOLO; label = prediksi model (pre-label)
+
+        Returns:
+            jumlah sample ter-export
+        """
+        out = Path(out_dir)
+        (out / "images").mkdir(parents=True, exist_ok=True)
+        (out / "labels").mkdir(parents=True, exist_ok=True)
+
+        with self.lock:
+            samples = sorted((m for m in self.entries.values() if m['score'] >= min_score),
+                             key=lambda m: m['score'], reverse=True)
+
+        with open(out / "manifest.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['image', 'score', 'reasons', 'predicted_class', 'station', 'timestamp'])
+            for meta in samples:
+                shutil.copy2(self.pool_dir / meta['image'], out / "images" / meta['image'])
+                (out / "labels" / f"{meta['id']}.txt").write_text(yolo_labels(meta))
+                writer.writerow([meta['image'], meta['score'], "|".join(meta['reasons']),
+                                 meta['predicted_class'], meta['station'] or "", meta['timestamp']])
+
+        names = "\n".join(f"  {idx}: {name}" for idx, name in sorted(CLASS_NAMES.items()))
+        (out / "data.yaml").write_text(
+            f"# Active learning export: review labels/ sebelum training\n"
+            f"path: {out.resolve()}\ntrain: images\nval: images\nnames:\n{names}\n"
+        )
+        return len(samples)
+
+    def snapshot(self):
+        with self.lock:
+            reasons = {}
+            for meta in self.entries.values():
+                for reason in meta['reasons']:
+                    reasons[reason] = reasons.get(reason, 0) + 1
+            scores = [m['score'] for m in self.entries.values()]
+            return dict(
+                self.counters,
+                pool_size=len(self.entries),
+                capacity=self.capacity,
+                min_pool_score=min(scores) if scores else 0.0,
+                reasons=reasons
+            )
+
+def yolo_labels(meta):
+    """
+    Detections (xyxy pixel) → baris YOLO "cls xc yc w h" ter-normalisasi
+    """
+    w, h = meta['width'], meta['height']
+    lines = []
+    for x1, y1, x2, y2, _, cls in meta['detections']:
+        lines.append(f"{int(cls)} {(x1 + x2) / 2 / w:.6f} {(y1 + y2) / 2 / h:.6f} "
+                     f"{(x2 - x1) / w:.6f} {(y2 - y1) / h:.6f}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+def main():
+    parser = argparse.ArgumentParser(description="Active learning pool: stats / export YOLO")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    stats = sub.add_parser('stats', help="Ringkasan pool")
+    stats.add_argument('--pool', default=ACTIVE_LEARNING_DIR)
+
+    export = sub.add_parser('export', help="Export format YOLO")
+    export.add_argument('--pool', default=ACTIVE_LEARNING_DIR)
+    export.add_argument('--out', required=True)
+    export.add_argument('--min-score', type=float, default=0.0)
+    args = parser.parse_args()
+
+    selector = ActiveLearningSelector(args.pool, capacity=sys.maxsize)
+
+    if args.command == 'stats':
+        s = selector.snapshot()
+        print(f"📦 Pool: {s['pool_size']} sample | skor min {s['min_pool_score']:.2f}")
+        for reason, count in sorted(s['reasons'].items()):
+            print(f"   {reason:14} {count}")
+        return
+
+    count = selector.export(args.out, args.min_score)
+    print(f"✅ {count} sample → {args.out} (review labels/ sebelum training)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - AUTO DISPATCH
+Trigger otomatis untuk laptop_inference.py (tanpa tekan SPACE)
+=============================================================================
+
+FITUR:
+✅ Frame differencing murah (grayscale kecil) untuk deteksi item masuk,
+   diam (settle), dan keluar dari view
+✅ Inference hanya saat item sudah diam; klasifikasi 1x per item setelah
+   deteksi stabil (class sama + box overlap di N frame berturut-turut)
+✅ Setelah dispatch, inference pause sampai scene kosong lagi
+✅ Re-baseline: scene berubah permanen (cahaya, benda tertinggal) tidak
+   membuat state macet di WAIT_CLEAR
+✅ Statistik: items/menit (sesi & 60 detik terakhir), dispatch latency
+   (item diam → command terkirim), frame yang tidak perlu inference
+
+STATE:
+    IDLE       scene kosong; background diperbarui pelan-pelan
+    SETTLING   item terdeteksi (beda dengan background), tunggu diam lalu
+               voting deteksi sampai stabil
+    WAIT_CLEAR sudah dispatch (atau gagal stabil); tunggu item diambil.
+               Scene diam N frame tapi tetap beda dengan background → 1x
+               inference probe; tanpa deteksi (atau lewat timeout) scene
+               sekarang dijadikan background baru (re-baseline)
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from inference_utils import box_iou
+
+IDLE = "IDLE"
+SETTLING = "SETTLING"
+WAIT_CLEAR = "WAIT_CLEAR"
+
+DIFF_SIZE = (160, 120)  # Resolusi frame differencing (w, h)
+
+def preprocess(frame):
+    """
+    Frame BGR → grayscale kecil ter-blur (float32) untuk differencing
+    """
+    import cv2
+
+    small = cv2.resize(frame, DIFF_SIZE, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return cv2.GaussianBlur(gray, (5, 5), 0).astype(np.float32)
+
+def changed_fraction(a, b, pixel_delta=25):
+    """
+    Fraksi pixel yang berubah > pixel_delta antara 2 frame preprocess
+    """
+    return float(np.count_nonzero(np.abs(a - b) > pixel_delta)) / a.size
+
+class AutoDispatcher:
+    """
+    State machine per frame:
+        needs_inference = dispatcher.observe(gray)        # tiap frame
+        if needs_inference:
+            decision = dispatcher.vote(detection)         # (cls, conf, box) / None
+            if decision: kirim CLASS:{cls}, lalu dispatcher.dispatched()
+    """
+
+    def __init__(self, presence_threshold=0.02, motion_threshold=0.005, still_frames=5,
+                 stable_frames=3, min_iou=0.5, max_attempts=15, clear_frames=10,
+                 background_alpha=0.05, pixel_delta=25, rebaseline_frames=30,
+                 rebaseline_timeout_s=120.0):
+        self.presence_threshold = presence_threshold
+        self.motion_threshold = motion_threshold
+        self.still_frames = still_frames
+        self.stable_frames = stable_frames
+        self.min_iou = min_iou
+        self.max_attempts = max_attempts
+        self.clear_frames = clear_frames
+        self.background_alpha = background_alpha
+        self.pixel_delta = pixel_delta
+        self.rebaseline_frames = rebaseline_frames
+        self.rebaseline_timeout_s = rebaseline_timeout_s
+
+        self.state = IDLE
+        self.background = None
+        self.previous = None
+        self.still_count = 0
+        self.clear_count = 0
+        self.wait_still = 0
+        self.wait_since = None
+        self.probing = False
+        self.votes = deque(maxlen=stable_frames)
+        self.attempts = 0
+        self.entered_at = None
+        self.settled_at = None
+        self.pending = None
+
+        self.started = time.time()
+        self.dispatch_times = deque()
+        self.latencies_ms = deque(maxlen=500)
+        self.counters = {'frames': 0, 'inference_frames': 0, 'dispatched': 0,
+                         'unstable': 0, 'passed_through': 0, 'rebaselines': 0}
+
+    # ---- frame differencing ----
+    def observe(self, gray, now=None):
+        """
+        Update state dari frame preprocess
+
+        Returns:
+            True jika frame ini perlu di-inference (item sudah diam)
+        """
+        now = time.time() if now is None else now
+        self.counters['frames'] += 1
+
+        if self.background is None:
+            # Frame pertama dianggap scene kosong
+            self.background = gray.copy()
+            self.previous = gray
+            return False
+
+        presence = changed_fraction(gray, self.background, self.pixel_delta)
+        motion = changed_fraction(gray, self.previous, self.pixel_delta)
+        self.previous = gray
+
+        if self.state == IDLE:
+            if presence > self.presence_threshold:
+                self._enter(now)
+            else:
+                # Adaptasi perubahan cahaya pelan-pelan
+                self.background += self.background_alpha * (gray - self.background)
+                return False
+
+        if self.state == SETTLING:
+            if presence <= self.presence_threshold:
+                # Item lewat / diambil sebelum sempat diklasifikasi
+                self.counters['passed_through'] += 1
+                self.state = IDLE
+                return False
+
+            if motion > self.motion_threshold:
+                self.still_count = 0
+                self.votes.clear()
+                self.settled_at = None
+                return False
+
+            self.still_count += 1
+            if self.still_count < self.still_frames:
+                return False
+            if self.settled_at is None:
+                self.settled_at = now
+            self.counters['inference_frames'] += 1
+            return True
+
+        # WAIT_CLEAR: inference pause sampai scene kembali seperti background
+        if presence <= self.presence_threshold:
+            self.clear_count += 1
+            if self.clear_count >= self.clear_frames:
+                self.state = IDLE
+            return False
+
+        self.clear_count = 0
+        if self.wait_since is None:
+            self.wait_since = now
+        if self.rebaseline_timeout_s is not None and now - self.wait_since >= self.rebaseline_timeout_s:
+            self._rebaseline()
+            return False
+        if self.probing:
+            # Hasil probe belum di-vote (frame di-skip caller): probe ulang
+            self.probing = False
+        if motion > self.motion_threshold:
+            self.wait_still = 0
+            return False
+
+        self.wait_still += 1
+        if self.wait_still < self.rebaseline_frames:
+            return False
+        # Scene diam tapi beda dengan background: cek apakah masih ada item
+        self.wait_still = 0
+        self.probing = True
+        self.counters['inference_frames'] += 1
+        return True
+
+    def _enter(self, now):
+        self.state = SETTLING
+        self.entered_at = now
+        self.settled_at = None
+        self.still_count = 0
+        self.votes.clear()
+        self.attempts = 0
+
+    # ---- detection stability ----
+    def vote(self, detection):
+        """
+        Tambah hasil inference frame diam
+
+        Args:
+            detection: (class_id, confidence, box xyxy) deteksi terbaik / None
+
+        Returns:
+            (class_id, mean_confidence) saat stabil, selain itu None
+        """
+        if self.state == WAIT_CLEAR:
+            # Probe re-baseline: tanpa deteksi = scene berubah, bukan item
+            if self.probing and detection is None:
+                self._rebaseline()
+            self.probing = False
+            return None
+
+        self.attempts += 1
+
+        if detection is None:
+            self.votes.clear()
+        else:
+            cls, conf, box = detection
+            if self.votes and (self.votes[-1][0] != cls or box_iou(self.votes[-1][2], box) < self.min_iou):
+                self.votes.clear()
+            self.votes.append((cls, conf, box))
+
+        if len(self.votes) == self.stable_frames:
+            cls = self.votes[-1][0]
+            conf = sum(v[1] for v in self.votes) / len(self.votes)
+            self.pending = (cls, conf)
+            return self.pending
+
+        if self.attempts >= self.max_attempts:
+            # Tidak pernah stabil: jangan dispatch, tunggu item diambil
+            self.counters['unstable'] += 1
+            self._wait_clear()
+        return None
+
+    def dispatched(self, now=None):
+        """
+        Catat command terkirim; return dispatch latency (ms, sejak item diam)
+        """
+        now = time.time() if now is None else now
+        latency_ms = (now - (self.settled_at or now)) * 1000
+
+        self.counters['dispatched'] += 1
+        self.latencies_ms.append(latency_ms)
+        self.dispatch_times.append(now)
+        self._wait_clear()
+        return latency_ms
+
+    def _wait_clear(self):
+        self.state = WAIT_CLEAR
+        self.clear_count = 0
+        self.wait_still = 0
+        self.wait_since = None
+        self.probing = False
+        self.votes.clear()
+        self.pending = None
+
+    def _rebaseline(self):
+        """
+        Scene sekarang jadi background baru, kembali ke IDLE
+        """
+        self.background = self.previous.copy()
+        self.state = IDLE
+        self.probing = False
+        self.counters['rebaselines'] += 1
+
+    # ---- statistik ----
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        while self.dispatch_times and now - self.dispatch_times[0] > 60:
+            self.dispatch_times.popleft()
+
+        ordered = sorted(self.latencies_ms)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]
+
+        elapsed_min = max(now - self.started, 1e-6) / 60
+        frames = self.counters['frames']
+        return dict(
+            self.counters,
+            state=self.state,
+            items_per_min=self.counters['dispatched'] / elapsed_min,
+            items_last_min=len(self.dispatch_times),
+            dispatch_p50_ms=pct(50),
+            dispatch_p95_ms=pct(95),
+            inference_skipped=1 - self.counters['inference_frames'] / frames if frames else 0.0
+        )
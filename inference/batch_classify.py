@@ -0,0 +1,308 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - OFFLINE BATCH RE-CLASSIFICATION
+Re-klasifikasi arsip captured_images (folder / tar shard) secara batch
+=============================================================================
+
+FITUR:
+✅ Sumber: folder (rekursif) atau tar shard (*.tar, *.tar.gz)
+✅ Decoder multi-thread dengan prefetch (bounded, urutan tetap)
+✅ Batched inference YOLOv8 dengan parameter yang sama dengan server
+✅ Output CSV atau Parquet, ditulis incremental per batch
+✅ Resume: item yang sudah ada di output dilewati
+✅ Laporan throughput (images/sec)
+
+CARA PAKAI:
+    python batch_classify.py captured_images --output logs/reclassify.csv
+    python batch_classify.py shards/*.tar --output logs/reclassify.parquet --batch 16
+    (jalankan ulang perintah yang sama untuk resume setelah interrupt)
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import csv
+import time
+import glob
+import tarfile
+import argparse
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from inference_utils import predict_kwargs, best_detection, IMAGE_EXTENSIONS
+from platform_roi import PlatformROI, offset_boxes
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    MODEL_PATH = "models/best.pt"
+    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
+    PLATFORM_ROI_PATH = "models/platform_roi.json"
+
+OUTPUT_COLUMNS = [
+    'key',
+    'predicted_class',
+    'class_name',
+    'confidence',
+    'num_detections',
+    'x1', 'y1', 'x2', 'y2',
+    'width',
+    'height'
+]
+
+# ========== SOURCES ==========
+def iter_sources(inputs):
+    """
+    Yield (key, loader) untuk tiap image; loader() → bytes
+
+    Folder: key = path relatif. Tar: key = "<shard>::<member>".
+    """
+    for item in inputs:
+        paths = glob.glob(item) if any(c in item for c in "*?[") else [item]
+        for path in sorted(paths):
+            path = Path(path)
+            if path.is_dir():
+                for file in sorted(path.rglob("*")):
+                    if file.suffix.lower() in IMAGE_EXTENSIONS:
+                        yield str(file.relative_to(path.parent)), file.read_bytes
+            elif tarfile.is_tarfile(path):
+                yield from _iter_tar(path)
+            elif path.suffix.lower() in IMAGE_EXTENSIONS:
+                yield str(path), path.read_bytes
+            else:
+                print(f"⚠️  Sumber diabaikan: {path}")
+
+def _iter_tar(path):
+    # Tar dibaca sekuensial (streaming), bytes member langsung dibaca di sini
+    with tarfile.open(path, 'r|*') as tar:
+        for member in tar:
+            if not member.isfile() or Path(member.name).suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            data = tar.extractfile(member).read()
+            yield f"{path.name}::{member.name}", (lambda d=data: d)
+
+def prefetch_decode(sources, skip_keys, workers=4, prefetch=64):
+    """
+    Decode paralel dengan prefetch terbatas; yield (key, image) berurutan
+    """
+    def load(key, loader):
+        data = loader()
+        return key, cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for key, loader in sources:
+            if key in skip_keys:
+                continue
+            pending.append(pool.submit(load, key, loader))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ========== OUTPUT ==========
+class CSVResultWriter:
+    def __init__(self, path):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS)
+        if not exists:
+            self.writer.writeheader()
+
+    @staticmethod
+    def done_keys(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path, newline='') as f:
+            return {row['key'] for row in csv.DictReader(f)}
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        # Flush per batch supaya resume akurat setelah crash
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+class ParquetResultWriter:
+    """
+    Parquet tidak bisa di-append; tiap batch ditulis sebagai part file
+    lengkap di folder output (tmp → rename), jadi run yang di-kill hanya
+    kehilangan batch yang sedang ditulis
+    """
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        parts = [os.path.basename(p)[5:-8] for p in glob.glob(os.path.join(path, "part-*.parquet"))]
+        self.next_part = max((int(n) for n in parts if n.isdigit()), default=-1) + 1
+
+    @staticmethod
+    def done_keys(path):
+        if not os.path.isdir(path):
+            return set()
+        import pyarrow.parquet as pq
+        keys = set()
+        for part in glob.glob(os.path.join(path, "part-*.parquet")):
+            try:
+                keys.update(pq.read_table(part, columns=['key']).column('key').to_pylist())
+            except Exception as e:
+                print(f"⚠️  Part diabaikan ({e}): {part}")
+        return keys
+
+    def schema(self):
+        pa = self.pa
+        types = {'key': pa.string(), 'class_name': pa.string(), 'confidence': pa.float32()}
+        return pa.schema([(col, types.get(col, pa.int32())) for col in OUTPUT_COLUMNS])
+
+    def write(self, rows):
+        if not rows:
+            return
+        part_path = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+        tmp_path = part_path + ".tmp"
+        self.pq.write_table(self.pa.Table.from_pylist(rows, schema=self.schema()), tmp_path)
+        # Rename atomik: part yang terlihat done_keys selalu punya footer
+        os.replace(tmp_path, part_path)
+        self.next_part += 1
+
+    def close(self):
+        pass
+
+def open_writer(path):
+    if path.endswith(".parquet"):
+        return ParquetResultWriter, path
+    return CSVResultWriter, path
+
+# ========== INFERENCE ==========
+def classify_batch(model, batch, roi=None, imgsz=None):
+    """
+    Jalankan 1 batch; return list row output
+    """
+    rows = []
+    valid = [(key, image) for key, image in batch if image is not None]
+    for key, image in batch:
+        if image is None:
+            row = dict.fromkeys(OUTPUT_COLUMNS)
+            row.update({'key': key, 'predicted_class': -2, 'class_name': 'decode_error'})
+            rows.append(row)
+
+    if not valid:
+        return rows
+
+    frames, offsets = [], []
+    for _, image in valid:
+        if roi is not None:
+            crop, offset = roi.crop(image)
+        else:
+            crop, offset = image, (0, 0)
+        frames.append(crop)
+        offsets.append(offset)
+
+    results = model(frames, **predict_kwargs(imgsz=imgsz))
+
+    for (key, image), result, offset in zip(valid, results, offsets):
+        h, w = image.shape[:2]
+        row = dict.fromkeys(OUTPUT_COLUMNS)
+        row.update({'key': key, 'num_detections': len(result.boxes), 'width': w, 'height': h})
+        best = best_detection(result.boxes)
+        if best is None:
+            row.update({'predicted_class': -1, 'class_name': 'no_detection', 'confidence': 0.0})
+        else:
+            cls, conf, idx = best
+            xyxy = offset_boxes(result.boxes.xyxy[idx:idx + 1].cpu().numpy(), offset)[0]
+            row.update({
+                'predicted_class': cls,
+                'class_name': CLASS_NAMES.get(cls, "unknown"),
+                'confidence': round(conf, 4),
+                'x1': int(xyxy[0]), 'y1': int(xyxy[1]), 'x2': int(xyxy[2]), 'y2': int(xyxy[3])
+            })
+        rows.append(row)
+
+    return rows
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch re-classification")
+    parser.add_argument('inputs', nargs='+', help="Folder, image, atau tar shard (glob OK)")
+    parser.add_argument('--output', default="logs/reclassify.csv", help=".csv atau .parquet (folder)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4, help="Thread decoder")
+    parser.add_argument('--prefetch', type=int, default=64, help="Max image ter-decode yang antri")
+    parser.add_argument('--imgsz', type=int, default=None)
+    parser.add_argument('--use-roi', action='store_true', help="Crop ke ROI platform (PLATFORM_ROI_PATH)")
+    parser.add_argument('--report-every', type=float, default=10.0, help="Interval laporan (detik)")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("📦 OFFLINE BATCH RE-CLASSIFICATION")
+    print("=" * 70)
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("❌ Error: ultralytics tidak terinstall!")
+        sys.exit(1)
+
+    writer_cls, out_path = open_writer(args.output)
+    done = writer_cls.done_keys(out_path)
+    if done:
+        print(f"⏩ Resume: {len(done)} item sudah diproses, dilewati")
+
+    roi = PlatformROI.load(PLATFORM_ROI_PATH) if args.use_roi else None
+    if args.use_roi and roi is None:
+        print(f"⚠️  ROI tidak ditemukan ({PLATFORM_ROI_PATH}), full frame")
+
+    model = YOLO(args.model, task='detect')
+    writer = writer_cls(out_path)
+
+    processed = 0
+    start = last_report = time.time()
+    try:
+        images = prefetch_decode(iter_sources(args.inputs), done, args.workers, args.prefetch)
+        for batch in batched(images, args.batch):
+            writer.write(classify_batch(model, batch, roi, args.imgsz))
+            processed += len(batch)
+
+            now = time.time()
+            if now - last_report >= args.report_every:
+                print(f"   {processed} images | {processed / (now - start):.1f} img/s")
+                last_report = now
+    except KeyboardInterrupt:
+        print("\n🛑 Dihentikan; jalankan ulang untuk resume")
+    finally:
+        writer.close()
+
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"\n✅ {processed} images dalam {elapsed:.1f}s ({processed / elapsed:.1f} img/s)")
+    print(f"💾 Output: {out_path}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
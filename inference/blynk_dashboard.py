@@ -7,9 +7,11 @@ Script untuk update Blynk IoT dashboard
 FITUR:
 ✅ Send data ke Blynk virtual pins
 ✅ Push notifications (bin full warning)
+✅ Forecast time-to-full per bin + warning sebelum overflow
 ✅ Real-time dashboard update
 ✅ Manual control (reset counters)
 ✅ Image upload (last captured waste)
+✅ Interval sync (BLYNK_SYNC_INTERVAL) bisa diubah tanpa restart (hot reload config)
 
 VIRTUAL PINS:
 V0 = Counter Organik
@@ -33,25 +35,22 @@ Untuk: UAS Sistem Pemilah Sampah Cerdas
 =============================================================================
 """
 
-import os
 import sys
 import time
 import requests
 from datetime import datetime
 import threading
 
-# Import config
+# Load config (validasi + override env) sebelum modul lain import config
+from config_loader import load_config, ConfigError
 try:
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
-    from config import *
-except ImportError:
-    print("⚠️  Warning: config.py tidak ditemukan")
-    # Default config
-    BLYNK_AUTH = "YourBlynkAuthToken"
-    BLYNK_SERVER = "blynk.cloud"
-    BLYNK_PORT = 80
-    ESP32_MAIN_IP = "192.168.1.102"
-    ESP32_MAIN_PORT = 80
+    config_store = load_config()
+except ConfigError as e:
+    print(f"❌ {e}")
+    sys.exit(1)
+from config import *
+
+from fill_forecast import FillForecastService
 
 # ========== BLYNK API ==========
 class BlynkDashboard:
@@ -162,12 +161,13 @@ class DataSync:
     Class untuk sync data antara ESP32 dan Blynk
     """
     
-    def __init__(self, blynk, esp32_ip, esp32_port):
+    def __init__(self, blynk, esp32_ip, esp32_port, forecast=None, sync_interval=5):
         self.blynk = blynk
+        self.forecast = forecast
         self.esp32_ip = esp32_ip
         self.esp32_port = esp32_port
         self.last_sync = 0
-        self.sync_interval = 5  # seconds
+        self.sync_interval = sync_interval  # seconds (hot reload: BLYNK_SYNC_INTERVAL)
         
         # Cache untuk menghindari duplicate notifications
         self.last_bin_status = {
@@ -182,7 +182,7 @@ class DataSync:
         """
         try:
             url = f"http://{self.esp32_ip}:{self.esp32_port}/status"
-            response = requests.get(url, timeout=5)
+            response = requests.get(url, timeout=config_store.current.HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 return response.json()
@@ -236,6 +236,11 @@ class DataSync:
         # Check bin full dan kirim notification jika perlu
         self.check_bin_full_notifications(bin_status)
         
+        # Record jarak & throughput, warning sebelum bin penuh
+        if self.forecast is not None:
+            self.forecast.update(status)
+            self.check_bin_forecast_warnings()
+        
         print("   ✓ Sync complete")
         
         return True
@@ -260,6 +265,25 @@ class DataSync:
             # Update cache
             self.last_bin_status[bin_name] = is_full
     
+    def check_bin_forecast_warnings(self):
+        """
+        Kirim warning untuk bin yang diprediksi penuh dalam horizon
+        """
+        for bin_name, seconds in self.forecast.pending_warnings():
+            # Bin yang sudah penuh ditangani check_bin_full_notifications
+            if seconds <= 0:
+                continue
+            
+            minutes = max(1, round(seconds / 60))
+            per_hour = self.forecast.throughput_per_hour(bin_name)
+            message = (f"⏳ BIN {bin_name.upper()} diperkirakan penuh dalam ~{minutes} menit "
+                       f"({per_hour} item/jam terakhir)")
+            
+            self.blynk.send_notification(message)
+            self.blynk.log_event('bin_forecast', f"Bin {bin_name} full in ~{minutes} min")
+            
+            print(f"   🔔 Forecast warning: {message}")
+    
     def run_continuous_sync(self):
         """
         Run continuous sync di background thread
@@ -306,11 +330,31 @@ def main():
         sys.exit(1)
     
     # Initialize data sync
-    sync = DataSync(blynk, ESP32_MAIN_IP, ESP32_MAIN_PORT)
+    forecast = None
+    if FORECAST_ENABLED:
+        forecast = FillForecastService(
+            {
+                'organik': THRESHOLD_ORGANIK_FULL,
+                'anorganik': THRESHOLD_ANORGANIK_FULL,
+                'b3': THRESHOLD_B3_FULL
+            },
+            horizon_s=FORECAST_HORIZON_MIN * 60,
+            history_size=FORECAST_HISTORY_SIZE,
+            trace_path=FORECAST_TRACE_FILE or None
+        )
+        print(f"📈 Fill forecast: warning {FORECAST_HORIZON_MIN} menit sebelum penuh")
+    
+    sync = DataSync(blynk, ESP32_MAIN_IP, ESP32_MAIN_PORT, forecast, BLYNK_SYNC_INTERVAL)
+    
+    # Hot reload: interval sync dipakai di iterasi berikutnya
+    config_store.subscribe(("BLYNK_SYNC_INTERVAL",),
+                           lambda cfg: setattr(sync, 'sync_interval', cfg.BLYNK_SYNC_INTERVAL))
+    if CONFIG_HOT_RELOAD:
+        config_store.start()
     
     print("\n✅ SISTEM SIAP!")
     print("=" * 70)
-    print("Dashboard akan update otomatis setiap 5 detik")
+    print(f"Dashboard akan update otomatis setiap {BLYNK_SYNC_INTERVAL} detik")
     print("Tekan Ctrl+C untuk stop")
     print("=" * 70)
     print()
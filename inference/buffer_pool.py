@@ -0,0 +1,181 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - BUFFER POOL
+Pool buffer NumPy reusable per size class, dengan batas memori global
+=============================================================================
+
+FITUR:
+✅ Size class pangkat 2 (min 64 KB): buffer dipakai ulang untuk shape
+   berbeda selama muat di class yang sama
+✅ Lease eksplisit (acquire/release) atau context manager (borrow)
+✅ Batas memori global: buffer bebas di-evict dulu; jika tetap penuh,
+   alokasi biasa di luar pool (tidak pernah blocking) dan dihitung over_cap,
+   atau raise PoolExhausted (overflow=False, body request → 503)
+✅ Statistik utilisasi (hit rate, bytes in use / allocated) + peak RSS proses
+
+DIPAKAI UNTUK:
+- Body request JPEG sebelum decode (/upload)
+- Canvas annotation (save image & /preview)
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+MIN_CLASS_BYTES = 64 * 1024
+
+class PoolExhausted(Exception):
+    """
+    Pool penuh oleh buffer yang sedang dipakai (acquire overflow=False)
+    """
+
+def size_class(nbytes):
+    """
+    Size class (bytes) untuk permintaan nbytes: pangkat 2 >= nbytes
+    """
+    return max(MIN_CLASS_BYTES, 1 << max(0, int(nbytes) - 1).bit_length())
+
+def peak_rss_mb():
+    """
+    Peak resident set size proses (MB); None jika tidak tersedia (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class Lease:
+    """
+    Buffer pinjaman: .array (ndarray shape/dtype yang diminta), .release()
+    """
+
+    __slots__ = ("pool", "backing", "array")
+
+    def __init__(self, pool, backing, array):
+        self.pool = pool
+        self.backing = backing
+        self.array = array
+
+    def release(self):
+        if self.array is not None:
+            self.pool._release(self.backing)
+            self.array = None
+            self.backing = None
+
+    def __enter__(self):
+        return self.array
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+class BufferPool:
+    """
+    Pool thread-safe; max_bytes = batas total backing buffer (in use + bebas)
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.lock = threading.Lock()
+        self.free = {}  # size class → list backing buffer bebas
+
+        self.allocated_bytes = 0
+        self.in_use_bytes = 0
+        self.peak_in_use_bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'over_cap': 0, 'exhausted': 0}
+
+    def acquire(self, shape, dtype=np.uint8, overflow=True):
+        """
+        Pinjam buffer untuk shape/dtype (isi tidak di-inisialisasi)
+
+        overflow=False: pool penuh → raise PoolExhausted, bukan alokasi di
+        luar pool (memori tetap dibatasi max_bytes)
+
+        Returns:
+            Lease (panggil .release() setelah selesai)
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        cls = size_class(nbytes)
+
+        with self.lock:
+            free = self.free.get(cls)
+            if free:
+                backing = free.pop()
+                self.counters['hits'] += 1
+            else:
+                self.counters['misses'] += 1
+                if not self._reserve(cls):
+                    if not overflow:
+                        self.counters['exhausted'] += 1
+                        raise PoolExhausted(f"Buffer pool penuh ({self.in_use_bytes // 1024} KB dipakai)")
+                    # Pool penuh oleh buffer yang sedang dipakai: alokasi di luar pool
+                    self.counters['over_cap'] += 1
+                    return Lease(_UNPOOLED, None, np.empty(shape, dtype=dtype))
+                backing = None
+
+            self.in_use_bytes += cls
+            self.peak_in_use_bytes = max(self.peak_in_use_bytes, self.in_use_bytes)
+
+        if backing is None:
+            backing = np.empty(cls, dtype=np.uint8)
+
+        array = backing[:nbytes].view(dtype).reshape(shape)
+        return Lease(self, backing, array)
+
+    def borrow(self, shape, dtype=np.uint8):
+        """
+        Context manager: with pool.borrow(shape) as array: ...
+        """
+        return self.acquire(shape, dtype)
+
+    def _reserve(self, cls):
+        # Dipanggil dengan lock; evict buffer bebas (class terbesar dulu) sampai muat
+        while self.allocated_bytes + cls > self.max_bytes:
+            victims = [c for c, buffers in self.free.items() if buffers]
+            if not victims:
+                return False
+            victim = max(victims)
+            self.free[victim].pop()
+            self.allocated_bytes -= victim
+            self.counters['evictions'] += 1
+
+        self.allocated_bytes += cls
+        return True
+
+    def _release(self, backing):
+        cls = backing.nbytes
+        with self.lock:
+            self.in_use_bytes -= cls
+            self.free.setdefault(cls, []).append(backing)
+
+    def snapshot(self):
+        with self.lock:
+            requests = self.counters['hits'] + self.counters['misses']
+            return dict(
+                self.counters,
+                max_mb=self.max_bytes / (1024 * 1024),
+                allocated_mb=self.allocated_bytes / (1024 * 1024),
+                in_use_mb=self.in_use_bytes / (1024 * 1024),
+                peak_in_use_mb=self.peak_in_use_bytes / (1024 * 1024),
+                utilization=self.in_use_bytes / self.max_bytes if self.max_bytes else 0.0,
+                hit_rate=self.counters['hits'] / requests if requests else 0.0,
+                free_buffers={f"{cls // 1024}KB": len(buffers) for cls, buffers in sorted(self.free.items()) if buffers},
+                peak_rss_mb=peak_rss_mb()
+            )
+
+class _Unpooled:
+    # Lease di luar pool: release tidak mengembalikan apa-apa
+    def _release(self, backing):
+        pass
+
+_UNPOOLED = _Unpooled()
@@ -0,0 +1,226 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - TWO-STAGE CASCADE
+Classifier ringan dulu, detector YOLOv8 penuh hanya jika ragu
+=============================================================================
+
+FITUR:
+✅ Stage 1: YOLOv8-cls (atau classifier kecil lain) pada center crop
+✅ Stage 2: detector penuh hanya jika confidence < threshold atau B3
+✅ Log keputusan routing ke CSV (LOG_DIR/CASCADE_LOG_FILE), handle
+   dibuka sekali & di-flush per N baris (bukan open() per frame)
+✅ Statistik: fraksi frame yang di-escalate & latency per path
+
+KENAPA:
+Di platform selalu hanya ada 1 objek, jadi klasifikasi whole-image
+sudah cukup untuk mayoritas frame. Detector tetap dipakai untuk kasus
+ragu dan kelas berbahaya (B3) supaya tidak ada salah buang.
+
+CARA PAKAI:
+1. Training classifier: yolo classify train data=... model=yolov8n-cls.pt
+2. Simpan ke CASCADE_MODEL_PATH (default models/best-cls.pt)
+3. Set CASCADE_ENABLED = True di config.py
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import csv
+import time
+import logging
+import threading
+from datetime import datetime
+
+from structured_logging import sampled
+
+log = logging.getLogger("cascade")
+
+ROUTE_CLASSIFIER = "classifier"
+ROUTE_DETECTOR = "detector"
+
+class CascadeRouter:
+    """
+    Router two-stage: classifier → (opsional) detector
+    """
+
+    def __init__(self, classifier, class_names, threshold=0.85,
+                 escalate_classes=(2,), crop_fraction=0.8, imgsz=224,
+                 device=None, log_path=None, flush_every=50):
+        self.classifier = classifier
+        self.class_names = class_names
+        self.threshold = threshold
+        self.escalate_classes = set(escalate_classes)
+        self.crop_fraction = crop_fraction
+        self.imgsz = imgsz
+        self.device = device
+        self.log_path = log_path
+        self.flush_every = max(1, int(flush_every))
+        self.log_file = None
+        self.log_writer = None
+        self.unflushed = 0
+
+        # Mapping index classifier → index CLASS_NAMES (via nama class)
+        self.class_map = self._build_class_map(getattr(classifier, 'names', {}) or {})
+
+        self.lock = threading.Lock()
+        self.stats = {
+            'frames': 0,
+            'escalated': 0,
+            'escalated_low_conf': 0,
+            'escalated_class': 0,
+            'classifier_ms_total': 0.0,
+            'detector_ms_total': 0.0
+        }
+
+        if log_path:
+            self._setup_log()
+
+    def _build_class_map(self, cls_names):
+        by_name = {name.lower(): idx for idx, name in self.class_names.items()}
+        class_map = {}
+        for idx, name in dict(cls_names).items():
+            class_map[int(idx)] = by_name.get(str(name).lower(), int(idx))
+        return class_map
+
+    def _setup_log(self):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        exists = os.path.exists(self.log_path) and os.path.getsize(self.log_path) > 0
+        self.log_file = open(self.log_path, 'a', newline='')
+        self.log_writer = csv.writer(self.log_file)
+        if not exists:
+            self.log_writer.writerow([
+                'timestamp',
+                'route',
+                'reason',
+                'classifier_class',
+                'classifier_conf',
+                'final_class',
+                'final_conf',
+                'classifier_ms',
+                'detector_ms'
+            ])
+            self.log_file.flush()
+
+    def center_crop(self, image):
+        """
+        Crop tengah image (objek selalu di tengah platform)
+        """
+        h, w = image.shape[:2]
+        ch, cw = int(h * self.crop_fraction), int(w * self.crop_fraction)
+        y0, x0 = (h - ch) // 2, (w - cw) // 2
+        return image[y0:y0 + ch, x0:x0 + cw]
+
+    def classify(self, image):
+        """
+        Stage 1: jalankan classifier
+
+        Returns:
+            (predicted_class, confidence, latency_ms)
+        """
+        t0 = time.perf_counter()
+        kwargs = {'imgsz': self.imgsz, 'verbose': False}
+        if self.device is not None:
+            kwargs['device'] = self.device
+
+        results = self.classifier(self.center_crop(image), **kwargs)
+        probs = results[0].probs
+        top1 = int(probs.top1)
+        confidence = float(probs.top1conf)
+
+        latency_ms = (time.perf_counter() - t0) * 1000
+        return self.class_map.get(top1, top1), confidence, latency_ms
+
+    def route(self, image):
+        """
+        Tentukan apakah hasil classifier cukup atau perlu detector
+
+        Returns:
+            dict {escalate, reason, class, confidence, classifier_ms}
+        """
+        predicted_class, confidence, latency_ms = self.classify(image)
+
+        if predicted_class in self.escalate_classes:
+            escalate, reason = True, "class"
+        elif confidence < self.threshold:
+            escalate, reason = True, "low_conf"
+        else:
+            escalate, reason = False, "confident"
+
+        return {
+            'escalate': escalate,
+            'reason': reason,
+            'class': predicted_class,
+            'confidence': confidence,
+            'classifier_ms': latency_ms
+        }
+
+    def record(self, decision, final_class, final_conf, detector_ms=0.0):
+        """
+        Catat keputusan routing (stats + CSV)
+        """
+        route = ROUTE_DETECTOR if decision['escalate'] else ROUTE_CLASSIFIER
+
+        with self.lock:
+            self.stats['frames'] += 1
+            self.stats['classifier_ms_total'] += decision['classifier_ms']
+            if decision['escalate']:
+                self.stats['escalated'] += 1
+                self.stats['detector_ms_total'] += detector_ms
+                if decision['reason'] == "class":
+                    self.stats['escalated_class'] += 1
+                else:
+                    self.stats['escalated_low_conf'] += 1
+
+            if self.log_writer is not None:
+                self.log_writer.writerow([
+                    datetime.now().isoformat(),
+                    route,
+                    decision['reason'],
+                    decision['class'],
+                    f"{decision['confidence']:.4f}",
+                    final_class,
+                    f"{final_conf:.4f}",
+                    f"{decision['classifier_ms']:.1f}",
+                    f"{detector_ms:.1f}"
+                ])
+                self.unflushed += 1
+                if self.unflushed >= self.flush_every:
+                    self.log_file.flush()
+                    self.unflushed = 0
+
+        class_name = self.class_names.get(decision['class'], "unknown")
+        log.debug(f"🔀 Cascade: {route} ({decision['reason']}) | "
+                  f"cls {class_name} {decision['confidence']:.2%} | "
+                  f"{decision['classifier_ms']:.1f}ms + {detector_ms:.1f}ms",
+                  extra=sampled("cascade", route=route, reason=decision['reason']))
+
+    def close(self):
+        """
+        Flush & tutup CSV log routing
+        """
+        with self.lock:
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+                self.log_writer = None
+
+    def snapshot(self):
+        """
+        Statistik routing untuk endpoint /stats
+        """
+        with self.lock:
+            frames = self.stats['frames']
+            escalated = self.stats['escalated']
+            direct = frames - escalated
+            return {
+                'frames': frames,
+                'escalated': escalated,
+                'escalated_low_conf': self.stats['escalated_low_conf'],
+                'escalated_class': self.stats['escalated_class'],
+                'escalation_rate': escalated / frames if frames else 0.0,
+                'avg_classifier_ms': self.stats['classifier_ms_total'] / frames if frames else 0.0,
+                'avg_detector_ms': self.stats['detector_ms_total'] / escalated if escalated else 0.0,
+                'direct_frames': direct
+            }
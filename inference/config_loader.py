@@ -0,0 +1,505 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - CONFIG LOADER
+Config bertipe, tervalidasi, override environment & hot reload
+=============================================================================
+
+FITUR:
+✅ Urutan load: config.example.py (default) → config.py → environment
+   PEMILAH_<KEY> (mis. PEMILAH_CONFIDENCE_THRESHOLD=0.6)
+✅ Tanpa config.py → pakai config.example.py dengan WARNING (tidak diam-diam);
+   key baru yang belum ada di config.py lama diisi default + WARNING
+✅ Validasi saat load: tipe mengikuti default di config.example.py, range &
+   pilihan dari SCHEMA, cek antar-field; error → ConfigError (server stop),
+   lalu validate_config() milik file config untuk peringatan tambahan
+✅ Config immutable (akses atribut: cfg.CONFIDENCE_THRESHOLD), di-install
+   sebagai module "config" supaya modul lain yang "from config import *"
+   ikut memakai nilai yang sama (termasuk override env)
+✅ Hot reload: file config dipantau (mtime); field aman (threshold, timeout,
+   sync interval, logging) diterapkan tanpa restart & tanpa reload model.
+   Config baru divalidasi penuh dulu, lalu snapshot diganti 1x (swap
+   referensi) dan subscriber dipanggil di bawah 1 lock. Field lain yang
+   berubah dicatat sebagai restart_required
+
+PEMAKAIAN:
+    config_store = load_config()              # sebelum import modul lain
+    from config import *
+
+    config_store.subscribe(("CASCADE_THRESHOLD",),
+                           lambda cfg: setattr(cascade, 'threshold', cfg.CASCADE_THRESHOLD))
+    config_store.start()                      # watcher hot reload
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import types
+import runpy
+import logging
+import threading
+
+log = logging.getLogger("config")
+
+CONFIG_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'config'))
+CONFIG_PATH = os.path.join(CONFIG_DIR, "config.py")
+EXAMPLE_PATH = os.path.join(CONFIG_DIR, "config.example.py")
+ENV_PREFIX = "PEMILAH_"
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+class ConfigError(ValueError):
+    """
+    Config tidak valid (pesan berisi semua error sekaligus)
+    """
+
+class Field:
+    """
+    Aturan tambahan 1 key: range, pilihan, hot reload
+    (tipe diambil dari default di config.example.py, kecuali number=True:
+    int & float sama-sama diterima, mis. timeout 2.5 detik)
+    """
+
+    def __init__(self, min=None, max=None, choices=None, hot=False, number=False):
+        self.number = number
+        self.min = min
+        self.max = max
+        self.choices = choices
+        self.hot = hot
+
+    def check(self, name, value):
+        if self.choices is not None and value not in self.choices:
+            return f"{name} harus salah satu dari {list(self.choices)} (sekarang {value!r})"
+        if self.min is not None and value < self.min:
+            return f"{name} minimal {self.min} (sekarang {value!r})"
+        if self.max is not None and value > self.max:
+            return f"{name} maksimal {self.max} (sekarang {value!r})"
+        return None
+
+PORT = dict(min=1, max=65535)
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+SCHEMA = {
+    # Network
+    'ESP32CAM_PORT': Field(**PORT),
+    'ESP32_MAIN_PORT': Field(**PORT),
+    'LAPTOP_PORT': Field(**PORT),
+    'STREAM_INGEST_PORT': Field(**PORT),
+    'ESP32_BINARY_PORT': Field(**PORT),
+    'BLYNK_PORT': Field(**PORT),
+    'STREAM_QUEUE_SIZE': Field(min=1),
+    'STREAM_MAX_FRAME_BYTES': Field(min=1),
+    'ACTUATION_PROTOCOL': Field(choices=("http", "binary_udp", "binary_tcp")),
+    'GATEWAY_NODE_BASE_PORT': Field(**PORT),
+    'GATEWAY_ACTUATION': Field(choices=("gateway", "node")),
+    'GATEWAY_STICKY_SLACK': Field(min=0),
+
+    # Timeout & interval (hot)
+    'ACTUATION_HTTP_TIMEOUT': Field(min=0.1, hot=True, number=True),
+    'ACTUATION_ACK_TIMEOUT': Field(min=0.01, hot=True),
+    'ACTUATION_RETRIES': Field(min=0, max=10, hot=True),
+    'HTTP_TIMEOUT': Field(min=0.1, hot=True, number=True),
+    'BLYNK_SYNC_INTERVAL': Field(min=1, hot=True, number=True),
+    'SERIAL_TIMEOUT': Field(min=0, number=True),
+    'SERIAL_PROBE_TIMEOUT': Field(min=0.1),
+    'SERIAL_DISCOVERY_TIMEOUT': Field(min=0.1),
+    'SERIAL_RECONNECT_INTERVAL': Field(min=0.1),
+    'CONFIG_RELOAD_INTERVAL': Field(min=0.1, number=True),
+    'GATEWAY_HEALTH_INTERVAL': Field(min=0.1, number=True),
+    'GATEWAY_HEALTH_TIMEOUT': Field(min=0.1, number=True),
+    'GATEWAY_REQUEST_TIMEOUT': Field(min=0.1, number=True),
+    'OUTBOX_COMMAND_TTL_S': Field(min=0, number=True),
+    'OUTBOX_RETRY_BASE_S': Field(min=0.01, number=True),
+    'OUTBOX_RETRY_MAX_S': Field(min=0.01, number=True),
+
+    # Model & threshold (threshold hot)
+    'CONFIDENCE_THRESHOLD': Field(min=0.0, max=1.0, hot=True),
+    'IOU_THRESHOLD': Field(min=0.0, max=1.0, hot=True),
+    'IMAGE_SIZE': Field(min=32),
+    'MAX_DETECTIONS': Field(min=1),
+    'YOLO_MAX_DET': Field(min=1),
+    'MODEL_LATENCY_BUDGET_MS': Field(min=1, number=True),
+    'MODEL_MAX_ACCURACY_DROP': Field(min=0.0, max=1.0),
+    'ADAPTIVE_TARGET_LATENCY_MS': Field(min=1, number=True),
+    'CASCADE_THRESHOLD': Field(min=0.0, max=1.0, hot=True),
+    'CASCADE_CROP_FRACTION': Field(min=0.1, max=1.0),
+    'TTA_BAND_LOW': Field(min=0.0, max=1.0, hot=True),
+    'TTA_BAND_HIGH': Field(min=0.0, max=1.0, hot=True),
+    'TTA_LATENCY_BUDGET_MS': Field(min=0, hot=True, number=True),
+    'TTA_WBF_IOU': Field(min=0.0, max=1.0),
+    'ACTIVE_LEARNING_MIN_SCORE': Field(min=0.0, max=1.0, hot=True),
+    'ACTIVE_LEARNING_POOL_SIZE': Field(min=1),
+
+    # Load shedding & profiler
+    'INGRESS_QUEUE_SIZE': Field(min=1),
+    'LOAD_SHED_POLICY': Field(choices=("reject", "drop_oldest", "degrade")),
+    'LOAD_SHED_RETRY_AFTER': Field(min=0, number=True),
+    'BUFFER_POOL_MAX_MB': Field(min=1),
+    'UPLOAD_MAX_BYTES': Field(min=1),
+    'UPLOAD_BATCH_MAX_IMAGES': Field(min=1, max=256),
+    'UPLOAD_BATCH_MAX_IMAGE_BYTES': Field(min=1),
+    'UPLOAD_BATCH_DECODE_WORKERS': Field(min=1),
+    'SLOW_REQUEST_THRESHOLD_MS': Field(min=0, hot=True, number=True),
+
+    # Outbox
+    'OUTBOX_REPLAY_BATCH': Field(min=1),
+    'OUTBOX_RETENTION_H': Field(min=0, number=True),
+    'OUTBOX_SYNC': Field(choices=("NORMAL", "FULL")),
+
+    # Logging (hot)
+    'LOG_LEVEL': Field(choices=LOG_LEVELS, hot=True),
+    'LOG_FORMAT': Field(choices=("text", "json")),
+    'LOG_QUEUE_SIZE': Field(min=1),
+    'LOG_SAMPLE_EVERY': Field(hot=True),
+
+    # Preview & forecast
+    'PREVIEW_MAX_FPS': Field(min=0.1, number=True),
+    'PREVIEW_JPEG_QUALITY': Field(min=1, max=100),
+    'FORECAST_HORIZON_MIN': Field(min=1),
+    'FORECAST_HISTORY_SIZE': Field(min=10),
+}
+
+# ========== LOAD ==========
+def read_config_file(path):
+    """
+    Eksekusi file config; return (nilai UPPERCASE, namespace lengkap)
+    """
+    namespace = runpy.run_path(path)
+    values = {k: v for k, v in namespace.items() if k.isupper() and not k.startswith('_')}
+    return values, namespace
+
+def parse_env_value(name, raw, default):
+    """
+    String environment → tipe sama dengan default
+    """
+    if isinstance(default, bool):
+        lowered = raw.strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"{name}: bool harus salah satu dari {TRUE_VALUES + FALSE_VALUES}")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    if isinstance(default, (list, tuple, dict)):
+        # Literal Python (dict dengan key int, tuple warna) atau JSON
+        try:
+            return ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            return json.loads(raw)
+    return raw
+
+def env_overrides(defaults, environ=None):
+    """
+    Ambil PEMILAH_<KEY> dari environment
+
+    Returns:
+        (overrides dict, errors list)
+    """
+    environ = os.environ if environ is None else environ
+    overrides, errors = {}, []
+    for env_name, raw in environ.items():
+        if not env_name.startswith(ENV_PREFIX):
+            continue
+        name = env_name[len(ENV_PREFIX):]
+        if name not in defaults:
+            errors.append(f"{env_name}: key config tidak dikenal")
+            continue
+        try:
+            overrides[name] = parse_env_value(name, raw, expected_default(name, defaults))
+        except (ValueError, SyntaxError) as e:
+            errors.append(f"{env_name}: {e}")
+    return overrides, errors
+
+def expected_default(name, defaults):
+    """
+    Nilai contoh untuk cek tipe (float jika Field number=True)
+    """
+    field = SCHEMA.get(name)
+    if field is not None and field.number:
+        return 0.0
+    return defaults[name]
+
+def type_matches(value, default):
+    if isinstance(default, bool):
+        return isinstance(value, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(default, int):
+        return isinstance(value, int) and not isinstance(value, bool)
+    if isinstance(default, (list, tuple)):
+        return isinstance(value, (list, tuple))
+    if default is None:
+        return True
+    return isinstance(value, type(default))
+
+def validate(values, defaults):
+    """
+    Validasi tipe (vs default), SCHEMA, dan aturan antar-field
+
+    Returns:
+        list error (kosong = valid)
+    """
+    errors = []
+    for name, value in values.items():
+        if name in defaults and not type_matches(value, expected_default(name, defaults)):
+            errors.append(f"{name} harus bertipe {type(expected_default(name, defaults)).__name__} "
+                          f"(sekarang {type(value).__name__}: {value!r})")
+            continue
+        field = SCHEMA.get(name)
+        if field is not None:
+            error = field.check(name, value)
+            if error:
+                errors.append(error)
+
+    if errors:
+        return errors
+
+    # Aturan antar-field
+    if values['TTA_BAND_LOW'] >= values['TTA_BAND_HIGH']:
+        errors.append("TTA_BAND_LOW harus < TTA_BAND_HIGH")
+    if not all(isinstance(k, int) and isinstance(v, str) for k, v in values['CLASS_NAMES'].items()):
+        errors.append("CLASS_NAMES harus dict {int: str}")
+    if not set(values['CASCADE_ESCALATE_CLASSES']) <= set(values['CLASS_NAMES']):
+        errors.append("CASCADE_ESCALATE_CLASSES berisi class di luar CLASS_NAMES")
+    if any(s % 32 for s in values['ADAPTIVE_SIZES']):
+        errors.append("ADAPTIVE_SIZES harus kelipatan 32")
+    ports = [values[k] for k in ('LAPTOP_PORT', 'STREAM_INGEST_PORT')]
+    if values['STREAM_INGEST_ENABLED'] and len(set(ports)) < len(ports):
+        errors.append("STREAM_INGEST_PORT tidak boleh sama dengan LAPTOP_PORT")
+    if values['OUTBOX_RETRY_BASE_S'] > values['OUTBOX_RETRY_MAX_S']:
+        errors.append("OUTBOX_RETRY_BASE_S harus <= OUTBOX_RETRY_MAX_S")
+    return errors
+
+class Config:
+    """
+    Snapshot config immutable; akses nilai sebagai atribut
+    """
+
+    __slots__ = ('_values', 'source', 'loaded_at', 'version')
+
+    def __init__(self, values, source, version=1):
+        object.__setattr__(self, '_values', types.MappingProxyType(dict(values)))
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'loaded_at', time.time())
+        object.__setattr__(self, 'version', version)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"Config tidak punya key {name}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Config immutable; ubah file config (hot reload)")
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def as_dict(self):
+        return dict(self._values)
+
+def build_config(path=None, environ=None, example_path=EXAMPLE_PATH, version=1):
+    """
+    Load + override env + validasi
+
+    Returns:
+        (Config, namespace file config, warnings list)
+
+    Raises:
+        ConfigError jika ada nilai tidak valid
+    """
+    path = path or CONFIG_PATH
+    warnings = []
+
+    defaults, example_namespace = read_config_file(example_path)
+    if os.path.exists(path):
+        values, namespace = read_config_file(path)
+        missing = sorted(set(defaults) - set(values))
+        if missing:
+            shown = ', '.join(missing[:8]) + (", ..." if len(missing) > 8 else "")
+            warnings.append(f"{len(missing)} key belum ada di {os.path.basename(path)}, "
+                            f"pakai default: {shown}")
+        merged = dict(defaults, **values)
+        source = path
+    else:
+        warnings.append(f"{path} tidak ditemukan, pakai {os.path.basename(example_path)} "
+                        "(copy jadi config.py untuk setup Anda)")
+        merged, namespace, source = dict(defaults), example_namespace, example_path
+
+    overrides, errors = env_overrides(defaults, environ)
+    merged.update(overrides)
+    errors += validate(merged, defaults)
+    if errors:
+        raise ConfigError("Config tidak valid:\n  - " + "\n  - ".join(errors))
+
+    if overrides:
+        warnings.append(f"Override environment: {', '.join(sorted(overrides))}")
+    return Config(merged, source, version), namespace, warnings
+
+def install(config):
+    """
+    Pasang config sebagai module "config" (dipakai "from config import *")
+    """
+    module = types.ModuleType("config")
+    module.__dict__.update(config.as_dict())
+    module.__file__ = config.source
+    sys.modules["config"] = module
+    return module
+
+# ========== HOT RELOAD ==========
+class ConfigStore:
+    """
+    Config aktif + watcher file untuk hot reload field aman
+    """
+
+    def __init__(self, config, path=None, environ=None, poll_interval=1.0):
+        self.path = path
+        self.environ = environ
+        self.poll_interval = poll_interval
+        self._current = config
+
+        self.lock = threading.Lock()
+        self.subscribers = []  # (set field, callback)
+        self.restart_required = set()
+        self.last_error = None
+        self.reloads = 0
+        self.mtime = self._mtime()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def current(self):
+        # Baca 1x per request lalu pakai snapshot yang sama (konsisten)
+        return self._current
+
+    def subscribe(self, fields, callback):
+        """
+        callback(config) dipanggil saat salah satu field berubah lewat hot reload
+        """
+        unknown = [f for f in fields if f not in SCHEMA or not SCHEMA[f].hot]
+        if unknown:
+            raise ValueError(f"Field bukan hot reload: {unknown}")
+        with self.lock:
+            self.subscribers.append((set(fields), callback))
+
+    def _mtime(self):
+        try:
+            return os.stat(self._current.source).st_mtime
+        except OSError:
+            return None
+
+    def reload(self):
+        """
+        Load ulang file config; terapkan field hot secara atomik
+
+        Returns:
+            dict field hot yang diterapkan {name: (lama, baru)}
+        """
+        try:
+            fresh, _, _ = build_config(self.path, self.environ, version=self._current.version + 1)
+        except Exception as e:
+            # Config baru rusak: tetap jalan dengan config lama
+            self.last_error = str(e)
+            log.error(f"❌ Hot reload ditolak, config lama tetap dipakai: {e}")
+            return {}
+
+        with self.lock:
+            old = self._current.as_dict()
+            new = fresh.as_dict()
+            changed = {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+            hot = {k for k in changed if k in SCHEMA and SCHEMA[k].hot}
+            cold = changed - hot
+
+            # Snapshot baru = config lama + field hot baru
+            applied = {k: new[k] for k in hot}
+            self._current = Config(dict(old, **applied), fresh.source, fresh.version)
+            self.restart_required |= cold
+
+            # Module "config" ikut diperbarui (untuk yang membaca config.X)
+            module = sys.modules.get("config")
+            if module is not None:
+                module.__dict__.update(applied)
+            self.last_error = None
+            self.reloads += 1
+
+            for fields, callback in self.subscribers:
+                if fields & hot:
+                    try:
+                        callback(self._current)
+                    except Exception as e:
+                        log.error(f"❌ Gagal menerapkan {sorted(fields & hot)}: {e}")
+
+        for name in sorted(hot):
+            log.info(f"🔄 Config {name}: {old.get(name)!r} → {new[name]!r}")
+        if cold:
+            log.warning(f"⚠️  Perlu restart untuk: {', '.join(sorted(cold))}")
+        return {k: (old.get(k), new[k]) for k in hot}
+
+    def check(self):
+        """
+        Reload jika file config berubah sejak dicek terakhir
+        """
+        mtime = self._mtime()
+        if mtime is not None and mtime != self.mtime:
+            self.mtime = mtime
+            return self.reload()
+        return None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self.thread.start()
+
+    def _watch(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.check()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'source': self._current.source,
+                'version': self._current.version,
+                'loaded_at': self._current.loaded_at,
+                'reloads': self.reloads,
+                'hot_reload': self.thread is not None,
+                'restart_required': sorted(self.restart_required),
+                'last_error': self.last_error
+            }
+
+def load_config(path=None, environ=None, poll_interval=None):
+    """
+    Load config untuk server: validasi, install module "config", lalu
+    validate_config() milik file config (peringatan setup)
+    poll_interval None = CONFIG_RELOAD_INTERVAL
+
+    Raises:
+        ConfigError jika config tidak valid
+    """
+    config, namespace, warnings = build_config(path, environ)
+    for warning in warnings:
+        log.warning(f"⚠️  {warning}")
+
+    install(config)
+
+    # validate_config() membaca global file config: samakan dengan nilai final
+    validate_file = namespace.get('validate_config')
+    if callable(validate_file):
+        validate_file.__globals__.update(config.as_dict())
+        validate_file()
+
+    if poll_interval is None:
+        poll_interval = config.CONFIG_RELOAD_INTERVAL
+    return ConfigStore(config, path, environ, poll_interval)
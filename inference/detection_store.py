@@ -0,0 +1,370 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - DETECTION HISTORY STORE
+Log deteksi ter-index (SQLite) + rollup per jam untuk query /history
+=============================================================================
+
+FITUR:
+✅ SQLite embedded (stdlib, tanpa server), mode WAL
+✅ Index: timestamp, (class, timestamp), (station, timestamp)
+✅ Rollup per jam (count, confidence, latency, success) di-update saat insert
+✅ Query time-range + filter class/station dengan pagination
+✅ Aggregate per hour / day / class / station dari tabel rollup
+✅ Importer one-shot dari waste_sorting.csv lama
+✅ event_key unik (opsional): insert ulang event yang sama (replay outbox)
+   diabaikan, rollup tidak dihitung 2x
+
+CARA PAKAI (import CSV lama):
+    python detection_store.py import logs/waste_sorting.csv --station station-1
+
+QUERY (server):
+    GET /history?start=2026-10-13T00:00&end=2026-10-14T00:00&class=b3&station=station-1
+    GET /history?aggregate=hour&start=...&end=...
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import csv
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    HISTORY_DB_PATH = "logs/detections.db"
+    STATION_ID = "station-1"
+    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
+
+MAX_PAGE_SIZE = 1000
+AGGREGATES = ("hour", "day", "class", "station")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts              REAL    NOT NULL,
+    station         TEXT    NOT NULL,
+    predicted_class INTEGER NOT NULL,
+    class_name      TEXT,
+    confidence      REAL,
+    bin_status      TEXT,
+    success         INTEGER,
+    communication   TEXT,
+    latency_ms      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS idx_detections_class_ts ON detections (predicted_class, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_station_ts ON detections (station, ts);
+
+CREATE TABLE IF NOT EXISTS hourly_rollup (
+    hour            INTEGER NOT NULL,
+    station         TEXT    NOT NULL,
+    predicted_class INTEGER NOT NULL,
+    count           INTEGER NOT NULL,
+    success_count   INTEGER NOT NULL,
+    sum_confidence  REAL    NOT NULL,
+    sum_latency_ms  REAL    NOT NULL,
+    PRIMARY KEY (hour, station, predicted_class)
+);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO hourly_rollup
+    (hour, station, predicted_class, count, success_count, sum_confidence, sum_latency_ms)
+VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (hour, station, predicted_class) DO UPDATE SET
+    count = count + 1,
+    success_count = success_count + excluded.success_count,
+    sum_confidence = sum_confidence + excluded.sum_confidence,
+    sum_latency_ms = sum_latency_ms + excluded.sum_latency_ms
+"""
+
+def parse_time(value):
+    """
+    Parse waktu query: epoch detik atau ISO 8601 (None jika kosong)
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
+
+def parse_class(value):
+    """
+    Parse filter class: index atau nama class
+    """
+    if value is None or value == "":
+        return None
+    if str(value).lstrip('-').isdigit():
+        return int(value)
+    for idx, name in CLASS_NAMES.items():
+        if name.lower() == str(value).lower():
+            return idx
+    raise ValueError(f"Class tidak dikenal: {value}")
+
+def event_key(timestamp, predicted_class, confidence, station):
+    """
+    Key deterministik 1 deteksi dari field yang sama persis dengan baris CSV
+    (timestamp ISO, class, confidence 4 desimal, station). Server & importer
+    memakai key yang sama, jadi import ulang / import CSV live tidak dobel
+    """
+    raw = f"{timestamp}|{int(predicted_class)}|{float(confidence):.4f}|{station}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+class DetectionStore:
+    """
+    Store SQLite untuk history deteksi (thread-safe, 1 koneksi + lock)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # DB lama (sebelum event_key): tambah kolom + unique index
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(detections)")}
+        with self.conn:
+            if 'event_key' not in columns:
+                self.conn.execute("ALTER TABLE detections ADD COLUMN event_key TEXT")
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_detections_event_key "
+                "ON detections (event_key) WHERE event_key IS NOT NULL"
+            )
+
+    def insert(self, predicted_class, class_name, confidence, success,
+               comm_method, latency_ms, station, bin_status="OK", ts=None, event_key=None):
+        """
+        Simpan 1 deteksi + update rollup per jam (1 transaksi)
+
+        Returns:
+            False jika event_key sudah pernah disimpan (duplikat diabaikan)
+        """
+        ts = datetime.now().timestamp() if ts is None else ts
+        with self.lock, self.conn:
+            return self._insert_row(ts, station, predicted_class, class_name, confidence,
+                                    bin_status, success, comm_method, latency_ms, event_key)
+
+    def _insert_row(self, ts, station, predicted_class, class_name, confidence,
+                    bin_status, success, comm_method, latency_ms, event_key=None):
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO detections (ts, station, predicted_class, class_name, confidence, "
+            "bin_status, success, communication, latency_ms, event_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (ts, station, predicted_class, class_name, confidence,
+             bin_status, int(bool(success)), comm_method, latency_ms, event_key)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self.conn.execute(ROLLUP_UPSERT, (
+            int(ts // 3600) * 3600, station, predicted_class,
+            int(bool(success)), confidence or 0.0, latency_ms or 0.0
+        ))
+        return True
+
+    def _where(self, start, end, predicted_class, station, ts_column="ts"):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f"{ts_column} >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append(f"{ts_column} < ?")
+            params.append(end)
+        if predicted_class is not None:
+            clauses.append("predicted_class = ?")
+            params.append(predicted_class)
+        if station:
+            clauses.append("station = ?")
+            params.append(station)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start=None, end=None, predicted_class=None, station=None,
+              limit=100, offset=0):
+        """
+        Query deteksi (terbaru dulu) dengan pagination
+
+        Returns:
+            dict {total, limit, offset, next_offset, items}
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        where, params = self._where(start, end, predicted_class, station)
+
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM detections{where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT * FROM detections{where} ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        items = []
+        for row in rows:
+            item = dict(row)
+            item['timestamp'] = datetime.fromtimestamp(item['ts']).isoformat()
+            item['success'] = bool(item['success'])
+            items.append(item)
+
+        next_offset = offset + len(items)
+        return {
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'next_offset': next_offset if next_offset < total else None,
+            'items': items
+        }
+
+    def aggregate(self, group_by, start=None, end=None, predicted_class=None, station=None):
+        """
+        Aggregate dari tabel rollup per jam (granularitas 1 jam)
+
+        group_by: hour | day | class | station
+        """
+        if group_by not in AGGREGATES:
+            raise ValueError(f"aggregate harus salah satu dari {AGGREGATES}")
+
+        # Rollup per jam: start dibulatkan ke bawah ke awal jam
+        if start is not None:
+            start = int(start // 3600) * 3600
+        where, params = self._where(start, end, predicted_class, station, ts_column="hour")
+
+        # Day di-fold dari bucket jam di Python supaya batas hari ikut timezone lokal
+        key = {
+            'hour': "hour",
+            'day': "hour",
+            'class': "predicted_class",
+            'station': "station"
+        }[group_by]
+
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {key} AS bucket, SUM(count) AS count, SUM(success_count) AS success_count, "
+                f"SUM(sum_confidence) AS sum_confidence, SUM(sum_latency_ms) AS sum_latency_ms "
+                f"FROM hourly_rollup{where} GROUP BY bucket ORDER BY bucket",
+                params
+            ).fetchall()
+
+        folded = {}
+        for row in rows:
+            bucket = row['bucket']
+            if group_by == "hour":
+                label = datetime.fromtimestamp(bucket).isoformat()
+            elif group_by == "day":
+                label = datetime.fromtimestamp(bucket).date().isoformat()
+            elif group_by == "class":
+                label = CLASS_NAMES.get(bucket, str(bucket))
+            else:
+                label = bucket
+            acc = folded.setdefault(label, [0, 0, 0.0, 0.0])
+            acc[0] += row['count']
+            acc[1] += row['success_count']
+            acc[2] += row['sum_confidence']
+            acc[3] += row['sum_latency_ms']
+
+        buckets = []
+        for label, (count, success_count, sum_conf, sum_latency) in folded.items():
+            buckets.append({
+                group_by: label,
+                'count': count,
+                'success_rate': success_count / count if count else 0.0,
+                'avg_confidence': sum_conf / count if count else 0.0,
+                'avg_latency_ms': sum_latency / count if count else 0.0
+            })
+
+        return {'group_by': group_by, 'buckets': buckets}
+
+    def import_csv(self, csv_path, station, batch_size=5000):
+        """
+        Import waste_sorting.csv lama (1 transaksi per batch); row yang
+        sudah ada (event_key sama) dilewati
+
+        Returns:
+            Jumlah row yang benar-benar di-insert
+        """
+        imported = 0
+        with open(csv_path, newline='') as f:
+            reader = csv.DictReader(f)
+            batch = []
+            for row in reader:
+                try:
+                    batch.append((
+                        datetime.fromisoformat(row['timestamp']).timestamp(),
+                        station,
+                        int(row['predicted_class']),
+                        row.get('class_name'),
+                        float(row.get('confidence') or 0),
+                        row.get('bin_status'),
+                        str(row.get('success')).lower() in ("true", "1"),
+                        row.get('communication'),
+                        float(row.get('latency_ms') or 0),
+                        event_key(row['timestamp'], row['predicted_class'],
+                                  row.get('confidence') or 0, station)
+                    ))
+                except (KeyError, ValueError) as e:
+                    print(f"   ⚠️  Row dilewati ({e}): {row}")
+                    continue
+
+                if len(batch) >= batch_size:
+                    imported += self._insert_many(batch)
+                    batch = []
+            if batch:
+                imported += self._insert_many(batch)
+
+        return imported
+
+    def _insert_many(self, rows):
+        with self.lock, self.conn:
+            return sum(1 for row in rows if self._insert_row(*row))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Detection history store (SQLite)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help="Import waste_sorting.csv lama")
+    imp.add_argument('csv', nargs='+')
+    imp.add_argument('--station', default=STATION_ID)
+    imp.add_argument('--db', default=HISTORY_DB_PATH)
+
+    agg = sub.add_parser('aggregate', help="Print aggregate dari rollup")
+    agg.add_argument('group_by', choices=AGGREGATES)
+    agg.add_argument('--start', default=None)
+    agg.add_argument('--end', default=None)
+    agg.add_argument('--db', default=HISTORY_DB_PATH)
+
+    args = parser.parse_args()
+    store = DetectionStore(args.db)
+
+    if args.command == 'import':
+        for path in args.csv:
+            count = store.import_csv(path, args.station)
+            print(f"✅ {count} rows imported dari {path} (station {args.station})")
+    else:
+        result = store.aggregate(args.group_by, parse_time(args.start), parse_time(args.end))
+        for bucket in result['buckets']:
+            print(f"   {str(bucket[args.group_by]):25} {bucket['count']:8d} | "
+                  f"conf {bucket['avg_confidence']:.2%} | {bucket['avg_latency_ms']:.0f}ms")
+
+    store.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - EVALUATION HARNESS
+Ukur akurasi & latency model dalam konfigurasi serving (hold-out set)
+=============================================================================
+
+FITUR:
+✅ Replay folder berlabel lewat preprocessing & decision logic production
+   (ROI crop, cascade, threshold, policy best box) via classify_frame
+✅ Confusion matrix atas CLASS_NAMES + kolom no_detection
+✅ Precision / recall per class, no-detection rate
+✅ Distribusi latency (mean, p50, p90, p95, p99, max)
+✅ Bisa sweep beberapa input size & confidence threshold
+✅ --tta: evaluasi dengan test-time augmentation; report berapa keputusan
+   yang diubah TTA (fixed = jadi benar, broke = jadi salah)
+✅ Report JSON untuk dibandingkan antar optimisasi (cek regresi akurasi)
+
+CARA PAKAI:
+    python evaluate.py --samples datasets/holdout
+    python evaluate.py --samples datasets/holdout --sizes 416 640 --conf 0.5 0.7 --output logs/eval.json
+    python evaluate.py --samples datasets/holdout --tta
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import cv2
+
+from inference_utils import (
+    classify_frame,
+    load_labelled_samples,
+    percentile,
+    NO_DETECTION_LABEL
+)
+from platform_roi import PlatformROI
+from tta import TestTimeAugmenter
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    MODEL_PATH = "models/best.pt"
+    IMAGE_SIZE = 640
+    CONFIDENCE_THRESHOLD = 0.70
+    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
+    USE_PLATFORM_ROI = True
+    PLATFORM_ROI_PATH = "models/platform_roi.json"
+    CASCADE_ENABLED = False
+    CASCADE_MODEL_PATH = "models/best-cls.pt"
+    CASCADE_THRESHOLD = 0.85
+    CASCADE_ESCALATE_CLASSES = [2]
+    CASCADE_CROP_FRACTION = 0.8
+    CASCADE_IMAGE_SIZE = 224
+    TTA_BAND_LOW = 0.40
+    TTA_BAND_HIGH = 0.85
+    TTA_SCALES = [1.0, 0.83, 1.17]
+    TTA_FLIPS = ["hflip"]
+    TTA_LATENCY_BUDGET_MS = 300
+    TTA_WBF_IOU = 0.55
+
+# ========== EVALUATION ==========
+def evaluate(model, images, roi=None, cascade=None, imgsz=None, conf=None, tta=None):
+    """
+    Jalankan decision logic production untuk semua (image, label)
+
+    Returns:
+        dict report (confusion matrix, precision/recall, latency, + tta)
+    """
+    labels = sorted(CLASS_NAMES) + [NO_DETECTION_LABEL]
+    matrix = {actual: {pred: 0 for pred in labels} for actual in labels}
+    latencies = []
+    tta_outcome = {'fixed': 0, 'broke': 0}
+
+    for image, label in images:
+        t0 = time.perf_counter()
+        result = classify_frame(model, image, roi, cascade, imgsz, conf, tta)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        best = result['best']
+        predicted = NO_DETECTION_LABEL if best is None else best[0]
+        if predicted not in matrix[label]:
+            predicted = NO_DETECTION_LABEL
+        matrix[label][predicted] += 1
+
+        # Keputusan yang diubah TTA: jadi benar / jadi salah
+        if result['tta'] is not None and result['tta']['before'] != predicted:
+            if predicted == label:
+                tta_outcome['fixed'] += 1
+            elif result['tta']['before'] == label:
+                tta_outcome['broke'] += 1
+
+    report = build_report(matrix, latencies)
+    if tta is not None:
+        report['tta'] = dict(tta.snapshot(), **tta_outcome)
+    return report
+
+def build_report(matrix, latencies):
+    labels = list(matrix)
+    total = sum(sum(row.values()) for row in matrix.values())
+    correct = sum(matrix[label][label] for label in labels)
+
+    per_class = {}
+    for cls in sorted(CLASS_NAMES):
+        tp = matrix[cls][cls]
+        predicted = sum(matrix[actual][cls] for actual in labels)
+        actual = sum(matrix[cls].values())
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[CLASS_NAMES[cls]] = {
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'support': actual
+        }
+
+    # No-detection rate dihitung pada sample yang seharusnya ada objek
+    with_object = [cls for cls in labels if cls != NO_DETECTION_LABEL]
+    object_total = sum(sum(matrix[cls].values()) for cls in with_object)
+    missed = sum(matrix[cls][NO_DETECTION_LABEL] for cls in with_object)
+
+    def name(label):
+        return "no_detection" if label == NO_DETECTION_LABEL else CLASS_NAMES[label]
+
+    return {
+        'n': total,
+        'accuracy': correct / total if total else 0.0,
+        'no_detection_rate': missed / object_total if object_total else 0.0,
+        'per_class': per_class,
+        'confusion_matrix': {
+            name(actual): {name(pred): count for pred, count in row.items()}
+            for actual, row in matrix.items()
+        },
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies) if latencies else 0.0
+        }
+    }
+
+def print_report(report, title):
+    print("\n" + "-" * 70)
+    print(f"📊 {title}")
+    print("-" * 70)
+
+    names = list(report['confusion_matrix'])
+    print("Confusion matrix (baris = actual, kolom = predicted):")
+    print(" " * 14 + "".join(f"{n[:12]:>13}" for n in names))
+    for actual in names:
+        row = report['confusion_matrix'][actual]
+        print(f"{actual[:12]:>13} " + "".join(f"{row[p]:>13}" for p in names))
+
+    print("\nPer class:")
+    for cls_name, m in report['per_class'].items():
+        print(f"   {cls_name:12} P {m['precision']:6.2%} | R {m['recall']:6.2%} | "
+              f"F1 {m['f1']:6.2%} | n {m['support']}")
+
+    lat = report['latency_ms']
+    print(f"\nAccuracy          : {report['accuracy']:.2%} ({report['n']} samples)")
+    print(f"No-detection rate : {report['no_detection_rate']:.2%}")
+    print(f"Latency (ms)      : mean {lat['mean']:.1f} | p50 {lat['p50']:.1f} | p90 {lat['p90']:.1f} | "
+          f"p95 {lat['p95']:.1f} | p99 {lat['p99']:.1f} | max {lat['max']:.1f}")
+
+    if 'tta' in report:
+        t = report['tta']
+        print(f"TTA               : {t['triggered']} frame ({t['trigger_rate']:.1%}) | "
+              f"diubah {t['changed']} (fixed {t['fixed']}, broke {t['broke']}) | "
+              f"p95 {t['tta_p95_ms']:.1f}ms | capped {t['budget_capped']}")
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi akurasi & latency konfigurasi serving")
+    parser.add_argument('--samples', required=True, help="Folder dataset berlabel (subfolder per class)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[IMAGE_SIZE])
+    parser.add_argument('--conf', type=float, nargs='+', default=[CONFIDENCE_THRESHOLD])
+    parser.add_argument('--no-roi', action='store_true', help="Abaikan ROI platform")
+    # --no-cascade: argparse.BooleanOptionalAction baru ada di Python 3.9
+    parser.add_argument('--cascade', dest='cascade', action='store_true', default=CASCADE_ENABLED,
+                        help="Sertakan cascade classifier (default: CASCADE_ENABLED)")
+    parser.add_argument('--no-cascade', dest='cascade', action='store_false',
+                        help="Tanpa cascade walau CASCADE_ENABLED = True (pembanding)")
+    parser.add_argument('--tta', action='store_true', help="Aktifkan test-time augmentation (TTA_* di config)")
+    parser.add_argument('--limit', type=int, default=None, help="Max sample per class")
+    parser.add_argument('--output', default=None, help="Simpan report JSON")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("🧪 EVALUATION HARNESS")
+    print("=" * 70)
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("❌ Error: ultralytics tidak terinstall!")
+        sys.exit(1)
+
+    samples = load_labelled_samples(args.samples, args.limit)
+    images = []
+    for path, label in samples:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"   ⚠️  Gagal decode: {path}")
+            continue
+        images.append((image, label))
+    print(f"📂 {len(images)} sample dari {args.samples}")
+
+    model = YOLO(args.model, task='detect')
+
+    roi = None
+    if USE_PLATFORM_ROI and not args.no_roi:
+        roi = PlatformROI.load(PLATFORM_ROI_PATH)
+    print(f"🎯 ROI: {roi.to_dict() if roi else 'full frame'}")
+
+    cascade = None
+    if args.cascade and os.path.exists(CASCADE_MODEL_PATH):
+        from cascade import CascadeRouter
+        cascade = CascadeRouter(
+            YOLO(CASCADE_MODEL_PATH),
+            CLASS_NAMES,
+            threshold=CASCADE_THRESHOLD,
+            escalate_classes=CASCADE_ESCALATE_CLASSES,
+            crop_fraction=CASCADE_CROP_FRACTION,
+            imgsz=CASCADE_IMAGE_SIZE
+        )
+    print(f"🔀 Cascade: {'ON' if cascade else 'OFF'}")
+
+    # Warmup supaya latency pertama tidak mendistorsi distribusi
+    if images:
+        classify_frame(model, images[0][0], roi, None, args.sizes[0])
+
+    reports = []
+    for size in args.sizes:
+        for conf in args.conf:
+            # Statistik TTA terpisah per kombinasi size & conf
+            tta = None
+            if args.tta:
+                tta = TestTimeAugmenter(TTA_BAND_LOW, TTA_BAND_HIGH, TTA_SCALES, TTA_FLIPS,
+                                        TTA_LATENCY_BUDGET_MS, TTA_WBF_IOU, size)
+            report = evaluate(model, images, roi, cascade, size, conf, tta)
+            report.update({'imgsz': size, 'conf': conf})
+            reports.append(report)
+            print_report(report, f"imgsz {size} | conf {conf:.2f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(),
+                'model': args.model,
+                'samples': args.samples,
+                'roi': roi.to_dict() if roi else None,
+                'cascade': cascade is not None,
+                'tta': args.tta,
+                'reports': reports
+            }, f, indent=2)
+        print(f"\n💾 Report: {args.output}")
+
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
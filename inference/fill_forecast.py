@@ -0,0 +1,304 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - BIN FILL-LEVEL FORECASTING
+Prediksi kapan bin penuh dari history jarak sensor ultrasonik
+=============================================================================
+
+FITUR:
+✅ History jarak & throughput per bin di ring buffer compact (array float)
+✅ Forecaster online per bin: Holt exponential smoothing (level + trend),
+   aware terhadap interval sampling yang tidak rata
+✅ Deteksi bin dikosongkan (jarak melonjak) → reset forecaster
+✅ Prediksi time-to-full + warning sebelum overflow (sekali per siklus isi)
+✅ Trace recorder CSV + evaluasi offline (error time-to-full & lead time)
+
+INPUT: ESP32 /status field dist_organik, dist_anorganik, dist_b3 (cm)
+       dan counter organik_count, anorganik_count, b3_count
+
+CARA PAKAI (evaluasi offline):
+    python fill_forecast.py evaluate logs/bin_trace.csv --horizon 30
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+from array import array
+from datetime import datetime
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    THRESHOLD_ORGANIK_FULL = 5
+    THRESHOLD_ANORGANIK_FULL = 5
+    THRESHOLD_B3_FULL = 5
+    FORECAST_HORIZON_MIN = 30
+    FORECAST_HISTORY_SIZE = 2880
+
+BINS = ("organik", "anorganik", "b3")
+
+# Lonjakan jarak (cm) yang dianggap bin baru dikosongkan
+EMPTY_JUMP_CM = 10.0
+
+class RingBuffer:
+    """
+    Ring buffer fixed-size untuk pasangan (timestamp, value) float64
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array('d', [0.0] * capacity)
+        self.values = array('d', [0.0] * capacity)
+        self.start = 0
+        self.size = 0
+
+    def append(self, ts, value):
+        idx = (self.start + self.size) % self.capacity
+        self.times[idx] = ts
+        self.values[idx] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def items(self):
+        for i in range(self.size):
+            idx = (self.start + i) % self.capacity
+            yield self.times[idx], self.values[idx]
+
+    def last(self):
+        if self.size == 0:
+            return None
+        idx = (self.start + self.size - 1) % self.capacity
+        return self.times[idx], self.values[idx]
+
+    def __len__(self):
+        return self.size
+
+class BinForecaster:
+    """
+    Holt linear exponential smoothing pada jarak (cm) vs waktu (detik)
+
+    Jarak mengecil saat bin terisi, jadi trend negatif = sedang terisi.
+    """
+
+    def __init__(self, full_threshold_cm, alpha=0.3, beta=0.1):
+        self.full_threshold_cm = full_threshold_cm
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        self.level = None
+        self.trend = 0.0  # cm per detik
+        self.last_ts = None
+
+    def update(self, ts, distance_cm):
+        """
+        Update dengan 1 observasi; return True jika terdeteksi bin dikosongkan
+        """
+        emptied = self.level is not None and distance_cm - self.level > EMPTY_JUMP_CM
+        if self.level is None or emptied:
+            self.level = distance_cm
+            self.trend = 0.0
+            self.last_ts = ts
+            return emptied
+
+        dt = ts - self.last_ts
+        if dt <= 0:
+            return False
+
+        predicted = self.level + self.trend * dt
+        new_level = self.alpha * distance_cm + (1 - self.alpha) * predicted
+        observed_trend = (new_level - self.level) / dt
+        self.trend = self.beta * observed_trend + (1 - self.beta) * self.trend
+        self.level = new_level
+        self.last_ts = ts
+        return False
+
+    def time_to_full(self):
+        """
+        Estimasi detik sampai jarak <= threshold (None jika tidak sedang terisi)
+        """
+        if self.level is None:
+            return None
+        if self.level <= self.full_threshold_cm:
+            return 0.0
+        if self.trend >= -1e-6:
+            return None
+        return (self.level - self.full_threshold_cm) / -self.trend
+
+class FillForecastService:
+    """
+    Forecaster semua bin + history ring buffer + logika warning
+    """
+
+    def __init__(self, thresholds, horizon_s=1800, history_size=2880, trace_path=None):
+        self.horizon_s = horizon_s
+        self.trace_path = trace_path
+        self.forecasters = {name: BinForecaster(thresholds[name]) for name in BINS}
+        self.distance_history = {name: RingBuffer(history_size) for name in BINS}
+        self.throughput_history = {name: RingBuffer(history_size) for name in BINS}
+        self.last_counts = {}
+        self.warned = {name: False for name in BINS}
+
+        if trace_path and not os.path.exists(trace_path):
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+            with open(trace_path, 'w', newline='') as f:
+                csv.writer(f).writerow(['timestamp', 'bin', 'distance_cm', 'count'])
+
+    def update(self, status, ts=None):
+        """
+        Update dari 1 response ESP32 /status
+        """
+        ts = time.time() if ts is None else ts
+        rows = []
+
+        for name in BINS:
+            count = status.get(f'{name}_count')
+            if count is not None:
+                previous = self.last_counts.get(name)
+                # Counter bisa di-reset (/reset): anggap throughput 0
+                items = max(0, count - previous) if previous is not None else 0
+                self.throughput_history[name].append(ts, items)
+                self.last_counts[name] = count
+
+            distance = status.get(f'dist_{name}')
+            # 0 / negatif = sensor timeout atau belum terbaca
+            if distance is None or distance <= 0:
+                continue
+
+            self.distance_history[name].append(ts, distance)
+            if self.forecasters[name].update(ts, distance):
+                self.warned[name] = False
+            rows.append((ts, name, distance, count))
+
+        if self.trace_path and rows:
+            with open(self.trace_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                for ts_row, name, distance, count in rows:
+                    writer.writerow([datetime.fromtimestamp(ts_row).isoformat(), name, distance, count])
+
+    def forecast(self):
+        """
+        Time-to-full (detik) per bin, None jika tidak sedang terisi
+        """
+        return {name: f.time_to_full() for name, f in self.forecasters.items()}
+
+    def throughput_per_hour(self, name, window_s=3600, now=None):
+        now = time.time() if now is None else now
+        return sum(items for ts, items in self.throughput_history[name].items() if now - ts <= window_s)
+
+    def pending_warnings(self):
+        """
+        Bin yang diprediksi penuh dalam horizon dan belum di-warning
+
+        Returns:
+            List of (bin_name, seconds_to_full)
+        """
+        warnings = []
+        for name, eta in self.forecast().items():
+            if eta is None:
+                continue
+            if eta <= self.horizon_s and not self.warned[name]:
+                self.warned[name] = True
+                warnings.append((name, eta))
+        return warnings
+
+# ========== OFFLINE EVALUATION ==========
+def load_trace(path):
+    """
+    Load trace CSV → {bin: [(ts, distance), ...]}
+    """
+    traces = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            ts = datetime.fromisoformat(row['timestamp']).timestamp()
+            traces.setdefault(row['bin'], []).append((ts, float(row['distance_cm'])))
+    for points in traces.values():
+        points.sort()
+    return traces
+
+def evaluate_trace(points, threshold_cm, horizon_s, alpha=0.3, beta=0.1):
+    """
+    Replay trace 1 bin; bandingkan prediksi vs waktu penuh sebenarnya
+
+    Returns:
+        dict {fills, mae_minutes, warnings, mean_lead_minutes, missed}
+    """
+    # Pecah trace per siklus isi (dipisah lonjakan jarak = bin dikosongkan),
+    # waktu penuh aktual = crossing threshold pertama di siklus tsb
+    cycles = []
+    prev = None
+    for ts, distance in points:
+        if prev is None or distance - prev > EMPTY_JUMP_CM:
+            cycles.append([])
+        cycles[-1].append((ts, distance))
+        prev = distance
+
+    forecaster = BinForecaster(threshold_cm, alpha, beta)
+    errors, leads = [], []
+    fills = 0
+
+    for cycle in cycles:
+        full_at = next((ts for ts, distance in cycle if distance <= threshold_cm), None)
+        fills += full_at is not None
+        warned = False
+
+        for ts, distance in cycle:
+            forecaster.update(ts, distance)
+            # Hanya titik sebelum penuh yang dinilai
+            if full_at is None or ts >= full_at:
+                continue
+            eta = forecaster.time_to_full()
+            if eta is None:
+                continue
+
+            errors.append(abs((ts + eta) - full_at) / 60.0)
+            if eta <= horizon_s and not warned:
+                warned = True
+                leads.append((full_at - ts) / 60.0)
+
+    return {
+        'fills': fills,
+        'mae_minutes': sum(errors) / len(errors) if errors else None,
+        'warnings': len(leads),
+        'mean_lead_minutes': sum(leads) / len(leads) if leads else None,
+        'missed': fills - len(leads)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bin fill-level forecasting tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    ev = sub.add_parser('evaluate', help="Evaluasi forecaster pada trace CSV")
+    ev.add_argument('trace')
+    ev.add_argument('--horizon', type=float, default=FORECAST_HORIZON_MIN, help="Menit")
+    ev.add_argument('--alpha', type=float, default=0.3)
+    ev.add_argument('--beta', type=float, default=0.1)
+    args = parser.parse_args()
+
+    thresholds = {
+        'organik': THRESHOLD_ORGANIK_FULL,
+        'anorganik': THRESHOLD_ANORGANIK_FULL,
+        'b3': THRESHOLD_B3_FULL
+    }
+
+    print("\n📈 FILL FORECAST EVALUATION")
+    print("=" * 70)
+    for name, points in load_trace(args.trace).items():
+        result = evaluate_trace(points, thresholds.get(name, 5), args.horizon * 60, args.alpha, args.beta)
+        mae = f"{result['mae_minutes']:.1f} min" if result['mae_minutes'] is not None else "n/a"
+        lead = f"{result['mean_lead_minutes']:.1f} min" if result['mean_lead_minutes'] is not None else "n/a"
+        print(f"   {name:10} | fills {result['fills']:3d} | MAE time-to-full {mae:>10} | "
+              f"warned {result['warnings']:3d} (lead {lead}) | missed {result['missed']}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
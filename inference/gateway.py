@@ -0,0 +1,532 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - INFERENCE GATEWAY
+Load balancer ringan di depan beberapa node laptop_inference_dual.py
+=============================================================================
+
+FITUR:
+✅ Kamera POST /upload ke gateway (API sama dengan node), gateway
+   meneruskan ke node inference
+✅ Routing least-outstanding-requests (request yang sedang diproses per
+   node); seri → node dengan latency EWMA terendah
+✅ Sticky routing: 1 station → 1 node (konsistensi temporal, mis. voting /
+   disagreement per station), pindah hanya jika node down atau jauh lebih
+   sibuk (GATEWAY_STICKY_SLACK)
+✅ Health check GET /status per node di background + passive (error
+   forward → node langsung ditandai down)
+✅ Failover tanpa kehilangan command aktuasi:
+   - GATEWAY_ACTUATION = "gateway" (default): node hanya inference
+     (X-Actuate: 0), gateway yang kirim command ke ESP32 setelah hasil
+     diterima. Node mati di tengah request → frame diulang di node lain,
+     tidak ada command ganda
+   - GATEWAY_ACTUATION = "node": node kirim command sendiri; retry hanya
+     jika request pasti belum diproses (koneksi ditolak / 503)
+✅ Mode lokal untuk testing: --spawn N menjalankan N node di 1 mesin
+
+ARSITEKTUR:
+    ESP32-CAM ──► gateway :5000 ──┬──► node :5101  (laptop_inference_dual.py)
+                      │           ├──► node :5102
+                      │           └──► node :5103
+                      └──► ESP32 Main (HTTP / binary / serial)
+
+CARA PAKAI:
+    # 3 node lokal + gateway di LAPTOP_PORT
+    python gateway.py --spawn 3
+
+    # Node yang sudah jalan (mesin lain / manual)
+    python gateway.py --nodes http://192.168.1.110:5000 http://192.168.1.111:5000
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import time
+import uuid
+import atexit
+import logging
+import argparse
+import threading
+import subprocess
+
+from flask import Flask, request, jsonify
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Load config (validasi + override env) sebelum modul lain import config
+from config_loader import load_config, ConfigError
+try:
+    config_store = load_config()
+except ConfigError as e:
+    print(f"❌ {e}")
+    sys.exit(1)
+from config import *
+
+from structured_logging import setup_logging, request_log, sampled
+from serial_manager import SerialManager
+from wire_protocol import ProtocolClient, UdpTransport, StreamTransport
+from outbox import Outbox
+
+ACTUATION_MODES = ("gateway", "node")
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "laptop_inference_dual.py")
+
+log = logging.getLogger("gateway")
+
+# ========== NODE POOL ==========
+class Node:
+    """
+    1 node inference (state routing dijaga NodePool di bawah lock)
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.healthy = False
+        self.outstanding = 0
+        self.ewma_ms = None
+        self.last_error = None
+        self.counters = {'forwarded': 0, 'ok': 0, 'failed': 0, 'overloaded': 0}
+
+        # Koneksi keep-alive per node
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+
+    def snapshot(self):
+        return dict(
+            self.counters,
+            url=self.url,
+            healthy=self.healthy,
+            outstanding=self.outstanding,
+            ewma_ms=round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            last_error=self.last_error
+        )
+
+class NodePool:
+    """
+    Pilih node per request: sticky station → least outstanding
+    """
+
+    def __init__(self, urls, sticky_slack=2, health_interval=2.0, health_timeout=1.0):
+        if not urls:
+            raise ValueError("Minimal 1 node inference")
+        self.nodes = [Node(url) for url in urls]
+        self.sticky_slack = sticky_slack
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+
+        self.lock = threading.Lock()
+        self.sticky = {}  # station → Node
+        self.counters = {'sticky_hits': 0, 'assigned': 0, 'reassigned': 0, 'failovers': 0}
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def acquire(self, station, exclude=()):
+        """
+        Pilih node sehat (selain exclude) & tambah outstanding-nya
+
+        Returns:
+            Node atau None jika tidak ada node sehat
+        """
+        with self.lock:
+            candidates = [n for n in self.nodes if n.healthy and n.url not in exclude]
+            if not candidates:
+                return None
+
+            least = min(n.outstanding for n in candidates)
+            node = self.sticky.get(station)
+            if node in candidates and node.outstanding <= least + self.sticky_slack:
+                self.counters['sticky_hits'] += 1
+            else:
+                # Seri outstanding → latency EWMA terendah (node belum diukur duluan)
+                node = min(candidates, key=lambda n: (n.outstanding, n.ewma_ms or 0.0))
+                self.counters['reassigned' if station in self.sticky else 'assigned'] += 1
+                self.sticky[station] = node
+
+            node.outstanding += 1
+            node.counters['forwarded'] += 1
+            return node
+
+    def release(self, node, latency_ms=None, outcome="ok", error=None):
+        """
+        outcome: "ok" | "overloaded" (503, node sehat) | "failed" (node down)
+        """
+        with self.lock:
+            node.outstanding -= 1
+            node.counters[outcome] += 1
+            if latency_ms is not None and outcome == "ok":
+                node.ewma_ms = latency_ms if node.ewma_ms is None else 0.8 * node.ewma_ms + 0.2 * latency_ms
+            if outcome == "failed":
+                if node.healthy:
+                    log.warning(f"⚠️  Node {node.url} down: {error}")
+                node.healthy = False
+                node.last_error = error
+
+    def failover(self):
+        with self.lock:
+            self.counters['failovers'] += 1
+
+    # ---- health check ----
+    def check_health(self):
+        for node in self.nodes:
+            try:
+                response = node.session.get(f"{node.url}/status", timeout=self.health_timeout)
+                healthy = response.status_code == 200 and response.json().get('model_loaded', False)
+                error = None if healthy else f"/status {response.status_code}"
+            except (requests.RequestException, ValueError) as e:
+                healthy, error = False, str(e)
+
+            with self.lock:
+                if healthy and not node.healthy:
+                    log.info(f"✅ Node {node.url} sehat")
+                elif not healthy and node.healthy:
+                    log.warning(f"⚠️  Node {node.url} down: {error}")
+                node.healthy = healthy
+                node.last_error = error if not healthy else node.last_error
+
+    def start(self):
+        self.check_health()
+        self.thread = threading.Thread(target=self._watch, name="gateway-health", daemon=True)
+        self.thread.start()
+
+    def _watch(self):
+        while not self.stop_event.wait(self.health_interval):
+            self.check_health()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'nodes': [n.snapshot() for n in self.nodes],
+                'healthy': sum(n.healthy for n in self.nodes),
+                'stations': {station: node.url for station, node in self.sticky.items()},
+                **self.counters
+            }
+
+# ========== ACTUATION ==========
+class GatewayActuator:
+    """
+    Command ke ESP32 Main dari gateway: WiFi (HTTP / binary) → Serial fallback
+    """
+
+    def __init__(self, serial_manager=None, client=None):
+        self.serial_manager = serial_manager
+        self.client = client
+        self.lock = threading.Lock()
+        self.counters = {'sent': 0, 'delivered': 0, 'failed': 0}
+
+    def send(self, predicted_class, confidence, station, command_id=None):
+        success, method = self._send_wifi(predicted_class, confidence, station, command_id)
+        if not success and self.serial_manager is not None:
+            log.warning("⚠️  WiFi failed, trying Serial...")
+            success = self.serial_manager.write(f"{predicted_class}\n", role="main")
+            method = "Serial"
+
+        with self.lock:
+            self.counters['sent'] += 1
+            self.counters['delivered' if success else 'failed'] += 1
+        return success, method
+
+    def _send_wifi(self, predicted_class, confidence, station, command_id=None):
+        if self.client is not None:
+            try:
+                ack = self.client.send_command(station, predicted_class, confidence)
+            except OSError as e:
+                log.warning(f"❌ Binary actuation error: {e}")
+                return False, "WiFi-Binary"
+            return ack is not None and ack['status'] == "ok", "WiFi-Binary"
+
+        try:
+            response = requests.post(
+                f"http://{ESP32_MAIN_IP}:{ESP32_MAIN_PORT}/classify",
+                json={'class': predicted_class, 'id': command_id} if command_id else {'class': predicted_class},
+                timeout=config_store.current.ACTUATION_HTTP_TIMEOUT
+            )
+            return response.status_code == 200, "WiFi"
+        except requests.RequestException as e:
+            log.warning(f"❌ WiFi error: {e}")
+            return False, "WiFi"
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+# ========== GATEWAY ==========
+def request_delivered(error):
+    """
+    Apakah request mungkin sudah sampai ke node (False = koneksi tidak pernah jadi)
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return False
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return not isinstance(reason, NewConnectionError)
+
+class Gateway:
+    """
+    Forward frame ke node + failover + aktuasi (mode gateway)
+    """
+
+    def __init__(self, pool, actuator=None, mode="gateway", request_timeout=10.0, max_attempts=None,
+                 outbox=None):
+        if mode not in ACTUATION_MODES:
+            raise ValueError(f"GATEWAY_ACTUATION harus salah satu dari {ACTUATION_MODES}")
+        self.pool = pool
+        self.actuator = actuator
+        self.mode = mode
+        self.request_timeout = request_timeout
+        self.max_attempts = max_attempts or len(pool.nodes)
+        self.outbox = outbox
+
+    def dispatch(self, body, station, request_id):
+        """
+        Returns:
+            (status_code, result dict)
+        """
+        tried = set()
+        while len(tried) < self.max_attempts:
+            node = self.pool.acquire(station, tried)
+            if node is None:
+                break
+            if tried:
+                self.pool.failover()
+            tried.add(node.url)
+
+            start = time.perf_counter()
+            try:
+                response = node.session.post(
+                    f"{node.url}/upload",
+                    data=body,
+                    params={'station': station},
+                    headers={
+                        'Content-Type': 'image/jpeg',
+                        'X-Request-ID': request_id,
+                        'X-Actuate': "1" if self.mode == "node" else "0"
+                    },
+                    timeout=(1.0, self.request_timeout)
+                )
+            except requests.RequestException as e:
+                self.pool.release(node, outcome="failed", error=str(e))
+                if self.mode == "node" and request_delivered(e):
+                    # Node mungkin sudah kirim command: jangan diulang (command ganda)
+                    return 504, {'status': 'unknown', 'message': f"Node {node.url} tidak menjawab: {e}",
+                                 'node': node.url}
+                continue
+
+            latency_ms = (time.perf_counter() - start) * 1000
+            if response.status_code == 503:
+                # Node overload menolak sebelum inference: aman dicoba node lain
+                self.pool.release(node, outcome="overloaded")
+                continue
+            if response.status_code >= 500 and self.mode == "gateway":
+                self.pool.release(node, outcome="failed", error=f"HTTP {response.status_code}")
+                continue
+
+            self.pool.release(node, latency_ms)
+            try:
+                result = response.json()
+            except ValueError:
+                return 502, {'status': 'error', 'message': f"Response node tidak valid ({node.url})"}
+            result['node'] = node.url
+
+            if self.mode == "gateway" and response.status_code == 200:
+                self._actuate(result, station, request_id)
+            return response.status_code, result
+
+        return 503, {'status': 'unavailable', 'message': "Semua node inference sibuk / tidak sehat",
+                     'tried': sorted(tried)}
+
+    def _actuate(self, result, station, request_id):
+        if result.get('status') != 'success' or result.get('class', -1) < 0:
+            return
+        command = {'class': result['class'], 'confidence': result.get('confidence', 0.0), 'station': station}
+        if self.outbox is not None:
+            # Dicatat durable dulu, gagal → dicoba ulang outbox (lihat outbox.py)
+            success, method = self.outbox.submit("actuation", command, key=f"{request_id}:actuation",
+                                                 stream=station)
+        else:
+            success, method = self.actuator.send(command['class'], command['confidence'], station)
+        result['communication'] = method
+        result['delivered'] = success
+        log.info(f"✅ {result.get('class_name', result['class'])} via {method} (node {result['node']})",
+                 extra=sampled("detection", class_id=result['class'], node=result['node'],
+                               delivered=success))
+
+# ========== FLASK ==========
+app = Flask(__name__)
+gateway = None
+node_processes = []
+
+@app.route('/upload', methods=['POST'])
+def upload_image():
+    """
+    API sama dengan /upload node: body JPEG (raw / multipart 'file')
+    """
+    station = request.args.get('station') or request.headers.get('X-Station-ID') or STATION_ID
+    request_id = request_log.begin(request.headers.get('X-Request-ID') or uuid.uuid4().hex[:12], station)
+    try:
+        body = request.files['file'].read() if 'file' in request.files else request.get_data()
+        if not body:
+            return jsonify({'status': 'error', 'message': 'No image data received'}), 400
+
+        status_code, result = gateway.dispatch(body, station, request_id)
+        response = jsonify(result)
+        response.headers['X-Request-ID'] = request_id
+        if status_code == 503:
+            response.headers['Retry-After'] = str(LOAD_SHED_RETRY_AFTER)
+        return response, status_code
+    finally:
+        request_log.finish()
+
+@app.route('/status', methods=['GET'])
+def get_status():
+    snapshot = gateway.pool.snapshot()
+    return jsonify({
+        'status': 'running',
+        'mode': 'gateway',
+        # Kompatibel dengan health check node (gateway bisa di-chain)
+        'model_loaded': snapshot['healthy'] > 0,
+        'healthy_nodes': snapshot['healthy'],
+        'nodes': len(snapshot['nodes'])
+    })
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    response = {'routing': gateway.pool.snapshot(), 'actuation_mode': gateway.mode}
+    if gateway.actuator is not None:
+        response['actuation'] = gateway.actuator.snapshot()
+    if gateway.outbox is not None:
+        response['outbox'] = gateway.outbox.snapshot()
+    return jsonify(response)
+
+# ========== SETUP ==========
+def spawn_nodes(count, base_port):
+    """
+    Jalankan N node laptop_inference_dual.py lokal (port base_port + i)
+
+    Override env per node: port, file log/DB terpisah, tanpa serial /
+    stream ingest / preview (dipegang gateway atau tidak dipakai)
+    """
+    urls = []
+    for i in range(count):
+        port = base_port + i
+        env = dict(
+            os.environ,
+            PEMILAH_LAPTOP_PORT=str(port),
+            PEMILAH_SERIAL_ENABLED="false",
+            PEMILAH_STREAM_INGEST_ENABLED="false",
+            PEMILAH_SHOW_GUI="false",
+            PEMILAH_LOG_FILE=f"waste_sorting-node{i + 1}.csv",
+            PEMILAH_HISTORY_DB_PATH=os.path.join(LOG_DIR, f"detections-node{i + 1}.db"),
+            PEMILAH_ACTIVE_LEARNING_DIR=os.path.join(LOG_DIR, f"active_learning-node{i + 1}"),
+            PEMILAH_SERIAL_PORT_CACHE=os.path.join(LOG_DIR, f"serial_ports-node{i + 1}.json"),
+            PEMILAH_OUTBOX_DB_PATH=os.path.join(LOG_DIR, f"outbox-node{i + 1}.db")
+        )
+        node_processes.append(subprocess.Popen([sys.executable, SERVER_SCRIPT], env=env))
+        urls.append(f"http://127.0.0.1:{port}")
+        log.info(f"🚀 Node {i + 1}: {urls[-1]} (pid {node_processes[-1].pid})")
+
+    atexit.register(stop_nodes)
+    return urls
+
+def stop_nodes():
+    for process in node_processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in node_processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def setup_actuator():
+    """
+    Actuator gateway: binary client (jika ACTUATION_PROTOCOL binary_*) + serial fallback
+    """
+    client = None
+    if ACTUATION_PROTOCOL == "binary_udp":
+        client = ProtocolClient(UdpTransport(ESP32_MAIN_IP, ESP32_BINARY_PORT),
+                                ACTUATION_ACK_TIMEOUT, ACTUATION_RETRIES)
+    elif ACTUATION_PROTOCOL == "binary_tcp":
+        client = ProtocolClient(StreamTransport.tcp(ESP32_MAIN_IP, ESP32_BINARY_PORT),
+                                ACTUATION_ACK_TIMEOUT, ACTUATION_RETRIES)
+
+    serial_manager = None
+    if SERIAL_ENABLED:
+        port = SERIAL_PORT_WINDOWS if sys.platform.startswith('win') else SERIAL_PORT_LINUX
+        serial_manager = SerialManager(
+            roles=SERIAL_BOARDS,
+            baud=SERIAL_BAUD_RATE,
+            preferred_ports=[port],
+            probe_timeout=SERIAL_PROBE_TIMEOUT,
+            discovery_timeout=SERIAL_DISCOVERY_TIMEOUT,
+            reconnect_interval=SERIAL_RECONNECT_INTERVAL,
+            cache_path=SERIAL_PORT_CACHE,
+            require_handshake=SERIAL_REQUIRE_HANDSHAKE,
+            write_timeout=SERIAL_TIMEOUT
+        )
+        if not serial_manager.start():
+            log.warning(f"⚠️  Serial not available: board {serial_manager.missing_roles()} tidak ditemukan")
+    return GatewayActuator(serial_manager, client)
+
+def setup_outbox(actuator):
+    """
+    Outbox command aktuasi gateway (None jika OUTBOX_ENABLED = False)
+    """
+    if not OUTBOX_ENABLED:
+        return None
+    outbox = Outbox(OUTBOX_DB_PATH, OUTBOX_RETRY_BASE_S, OUTBOX_RETRY_MAX_S, OUTBOX_REPLAY_BATCH,
+                    OUTBOX_RETENTION_H * 3600, OUTBOX_SYNC)
+    outbox.register(
+        "actuation",
+        lambda key, command: actuator.send(command['class'], command['confidence'], command['station'], key),
+        ttl_s=OUTBOX_COMMAND_TTL_S,
+        latest_only=True
+    )
+    outbox.start()
+    return outbox
+
+def main():
+    global gateway
+
+    parser = argparse.ArgumentParser(description="Gateway load balancing ke node inference")
+    parser.add_argument('--nodes', nargs='+', default=GATEWAY_NODES, help="URL node inference")
+    parser.add_argument('--spawn', type=int, default=0, help="Jalankan N node lokal")
+    parser.add_argument('--base-port', type=int, default=GATEWAY_NODE_BASE_PORT)
+    parser.add_argument('--port', type=int, default=LAPTOP_PORT, help="Port gateway (default LAPTOP_PORT)")
+    parser.add_argument('--actuation', choices=ACTUATION_MODES, default=GATEWAY_ACTUATION)
+    args = parser.parse_args()
+
+    logging_setup = setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_EVERY)
+    log.info("🔀 SISTEM PEMILAH SAMPAH CERDAS - INFERENCE GATEWAY")
+
+    urls = spawn_nodes(args.spawn, args.base_port) if args.spawn else list(args.nodes)
+    if any(url.rstrip("/").endswith(f":{args.port}") for url in urls):
+        log.error(f"❌ Port gateway {args.port} bentrok dengan node")
+        sys.exit(1)
+
+    pool = NodePool(urls, GATEWAY_STICKY_SLACK, GATEWAY_HEALTH_INTERVAL, GATEWAY_HEALTH_TIMEOUT)
+    pool.start()
+
+    actuator = outbox = None
+    if args.actuation == "gateway":
+        actuator = setup_actuator()
+        outbox = setup_outbox(actuator)
+    gateway = Gateway(pool, actuator, args.actuation, GATEWAY_REQUEST_TIMEOUT, outbox=outbox)
+
+    log.info(f"✓ {len(urls)} node, aktuasi oleh {args.actuation}, sticky slack {GATEWAY_STICKY_SLACK}")
+    log.info(f"🌐 Gateway di http://0.0.0.0:{args.port} (node sehat: {pool.snapshot()['healthy']})")
+
+    try:
+        app.run(host='0.0.0.0', port=args.port, threaded=True, use_reloader=False)
+    finally:
+        pool.stop()
+        if outbox is not None:
+            outbox.stop()
+        stop_nodes()
+        logging_setup.stop()
+
+if __name__ == '__main__':
+    main()
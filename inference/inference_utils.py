@@ -0,0 +1,304 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - INFERENCE UTILITIES
+Helper bersama untuk parameter inference YOLOv8 dan dataset berlabel
+=============================================================================
+
+FITUR:
+✅ Build argumen model(...) dari config (conf, iou, imgsz, max_det, device, half)
+✅ Resolusi device (GPU/CPU) sesuai USE_CUDA & YOLO_DEVICE
+✅ Pilih detection terbaik (policy argmax confidence seperti di server)
+✅ box_iou bersama (auto dispatch, active learning, TTA)
+✅ classify_frame: ROI crop → cascade → detector (→ TTA), dipakai server & evaluasi;
+   classify_frames: versi batch (1 panggilan detector untuk N frame)
+✅ Loader dataset berlabel (folder per class) untuk profiling & evaluasi
+
+FORMAT DATASET BERLABEL:
+    samples/
+    ├── organik/      *.jpg
+    ├── anorganik/    *.jpg
+    ├── b3/           *.jpg
+    └── none/         *.jpg   (opsional: tray kosong, expected no_detection)
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    # Default config (sama dengan config.example.py)
+    CONFIDENCE_THRESHOLD = 0.70
+    IOU_THRESHOLD = 0.45
+    IMAGE_SIZE = 640
+    MAX_DETECTIONS = 10
+    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
+    USE_CUDA = True
+    USE_HALF_PRECISION = False
+    NUM_THREADS = 4
+    YOLO_DEVICE = "0"
+    YOLO_VERBOSE = False
+    YOLO_AGNOSTIC_NMS = False
+    YOLO_MAX_DET = 10
+
+# Label folder untuk sample tanpa objek (expected no_detection)
+NO_DETECTION_LABEL = -1
+NO_DETECTION_DIRS = ("none", "empty", "no_detection")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+_device_cache = None
+
+# Threshold aktif (conf, iou); diganti utuh saat hot reload config
+_thresholds = (CONFIDENCE_THRESHOLD, IOU_THRESHOLD)
+
+# ========== MODEL PARAMETERS ==========
+def resolve_device():
+    """
+    Tentukan device inference dari USE_CUDA & YOLO_DEVICE
+    Fallback ke CPU jika CUDA tidak tersedia (YOLO_DEVICE="0" di laptop tanpa GPU)
+    """
+    global _device_cache
+
+    if _device_cache is not None:
+        return _device_cache
+
+    device = "cpu"
+    if USE_CUDA and str(YOLO_DEVICE).lower() != "cpu":
+        try:
+            import torch
+            if torch.cuda.is_available():
+                device = str(YOLO_DEVICE)
+        except ImportError:
+            pass
+
+    if device == "cpu":
+        try:
+            import torch
+            torch.set_num_threads(NUM_THREADS)
+        except ImportError:
+            pass
+
+    _device_cache = device
+    return device
+
+def set_thresholds(conf, iou):
+    """
+    Ganti threshold default tanpa restart (1 swap tuple, atomik)
+    """
+    global _thresholds
+    _thresholds = (conf, iou)
+
+def predict_kwargs(imgsz=None, conf=None):
+    """
+    Argumen untuk model(...) sesuai config
+
+    Semua parameter inference di config ikut dipakai: CONFIDENCE_THRESHOLD,
+    IOU_THRESHOLD, IMAGE_SIZE, MAX_DETECTIONS/YOLO_MAX_DET (diambil yang
+    paling kecil), YOLO_AGNOSTIC_NMS, USE_HALF_PRECISION, YOLO_DEVICE.
+    Threshold bisa diganti saat runtime via set_thresholds.
+    """
+    device = resolve_device()
+    default_conf, iou = _thresholds
+
+    return {
+        'conf': default_conf if conf is None else conf,
+        'iou': iou,
+        'imgsz': IMAGE_SIZE if imgsz is None else int(imgsz),
+        'max_det': min(MAX_DETECTIONS, YOLO_MAX_DET),
+        'agnostic_nms': YOLO_AGNOSTIC_NMS,
+        # FP16 hanya didukung di GPU
+        'half': bool(USE_HALF_PRECISION and device != "cpu"),
+        'device': device,
+        'verbose': YOLO_VERBOSE
+    }
+
+def box_iou(box, boxes):
+    """
+    IoU box [x1, y1, x2, y2, ...] terhadap 1 box → float,
+    atau terhadap M box (M x 4+) → array M
+    """
+    box = np.asarray(box, dtype=np.float64)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    single = boxes.ndim == 1
+    if single:
+        boxes = boxes[None, :]
+
+    ix = np.clip(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0, None)
+    iy = np.clip(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0, None)
+    inter = ix * iy
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = area + areas - inter
+    iou = np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+    return float(iou[0]) if single else iou
+
+def best_detection(boxes):
+    """
+    Pilih detection dengan confidence tertinggi (policy production)
+
+    Returns:
+        (predicted_class, confidence, index) atau None jika tidak ada deteksi
+    """
+    if boxes is None or len(boxes) == 0:
+        return None
+
+    best_idx = int(boxes.conf.argmax())
+    return int(boxes.cls[best_idx]), float(boxes.conf[best_idx]), best_idx
+
+def classify_frame(model, image, roi=None, cascade=None, imgsz=None, conf=None, tta=None):
+    """
+    Decision logic production untuk 1 frame
+
+    1. Crop ke ROI platform (jika dikalibrasi)
+    2. Cascade classifier (jika aktif); detector dilewati jika yakin
+    3. Detector YOLOv8 + policy best box
+    4. TTA (jika aktif) untuk frame dengan conf di band ragu
+
+    Returns:
+        dict {best, detection, roi_offset, decision, detector_ms, tta}
+        best = (class, confidence, box_index|None) atau None (no detection)
+        detector_ms = None jika detector tidak dijalankan
+        tta = None jika TTA tidak dijalankan; selain itu box_index merujuk
+              ke tta['detections'] (koordinat ROI), bukan detection.boxes
+    """
+    return classify_frames(model, [image], roi, cascade, imgsz, conf, tta)[0]
+
+def classify_frames(model, images, roi=None, cascade=None, imgsz=None, conf=None, tta=None,
+                    batch=True):
+    """
+    classify_frame untuk beberapa frame: frame yang tidak dijawab cascade
+    masuk 1 panggilan detector (batch). TTA tetap per frame ragu
+
+    batch=False: detector dipanggil per frame (variant ONNX fixed-shape
+    hanya menerima batch size 1)
+
+    Returns:
+        list dict (format classify_frame), urutan sama dengan images;
+        detector_ms = latency batch dibagi jumlah frame di batch
+    """
+    results = []
+    pending = []  # (index, frame ROI) yang perlu detector
+
+    for image in images:
+        if roi is not None:
+            frame, roi_offset = roi.crop(image)
+        else:
+            frame, roi_offset = image, (0, 0)
+
+        decision = cascade.route(frame) if cascade is not None else None
+        result = {
+            'best': None,
+            'detection': None,
+            'roi_offset': roi_offset,
+            'decision': decision,
+            'detector_ms': None,
+            'tta': None
+        }
+        if decision is not None and not decision['escalate']:
+            result['best'] = (decision['class'], decision['confidence'], None)
+        else:
+            pending.append((len(results), frame))
+        results.append(result)
+
+    if not pending:
+        return results
+
+    threshold = _thresholds[0] if conf is None else conf
+    # TTA: first pass di batas bawah band supaya box borderline ikut terlihat
+    first_conf = min(threshold, tta.band_low) if tta is not None else threshold
+
+    frames = [frame for _, frame in pending]
+    infer_start = time.perf_counter()
+    kwargs = predict_kwargs(imgsz=imgsz, conf=first_conf)
+    if batch:
+        detections = model(frames[0] if len(frames) == 1 else frames, **kwargs)
+    else:
+        detections = [model(frame, **kwargs)[0] for frame in frames]
+    detector_ms = (time.perf_counter() - infer_start) * 1000 / len(frames)
+
+    for (index, frame), detection in zip(pending, detections):
+        tta_result = None
+        if tta is not None:
+            tta_result = tta.refine(model, frame, detection, imgsz, threshold, detector_ms)
+            if tta_result is None and first_conf < threshold:
+                # Tidak ragu: keputusan single pass dengan threshold normal
+                detection = detection[detection.boxes.conf >= threshold]
+
+        results[index].update({
+            'best': tta_result['best'] if tta_result is not None else best_detection(detection.boxes),
+            'detection': detection,
+            'detector_ms': detector_ms,
+            'tta': tta_result
+        })
+
+    return results
+
+# ========== LABELLED DATASET ==========
+def label_from_dirname(name):
+    """
+    Konversi nama folder ke class index (nama class atau angka)
+    """
+    key = name.lower()
+
+    if key in NO_DETECTION_DIRS:
+        return NO_DETECTION_LABEL
+
+    for idx, class_name in CLASS_NAMES.items():
+        if class_name.lower() == key:
+            return idx
+
+    if key.isdigit() and int(key) in CLASS_NAMES:
+        return int(key)
+
+    return None
+
+def load_labelled_samples(root, limit_per_class=None):
+    """
+    Scan folder dataset berlabel
+
+    Returns:
+        List of (path, label) terurut deterministik
+    """
+    root = Path(root)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Folder sample tidak ditemukan: {root}")
+
+    samples = []
+    for class_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        label = label_from_dirname(class_dir.name)
+        if label is None:
+            print(f"   ⚠️  Folder diabaikan (bukan class): {class_dir.name}")
+            continue
+
+        files = sorted(
+            p for p in class_dir.iterdir()
+            if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if limit_per_class:
+            files = files[:limit_per_class]
+
+        samples.extend((str(p), label) for p in files)
+
+    return samples
+
+def percentile(values, pct):
+    """
+    Percentile sederhana (nearest-rank) tanpa numpy
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
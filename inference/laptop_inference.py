@@ -12,20 +12,25 @@ Requirements:
 - ESP32 terhubung via USB
 
 Usage:
-    python laptop_inference.py
+    python laptop_inference.py          # manual: tekan SPACE untuk klasifikasi
+    python laptop_inference.py --auto   # otomatis: dispatch saat item diam
+                                        # (lihat auto_dispatch.py)
 """
 
+import argparse
+import logging
 import cv2
-import serial
-import serial.tools.list_ports
 from ultralytics import YOLO
-import time
 import numpy as np
 
+from auto_dispatch import AutoDispatcher, preprocess
+from serial_manager import SerialManager
+
 # ========== CONFIGURATION ==========
 MODEL_PATH = "models/best.pt"
 CONF_THRESHOLD = 0.5
 SERIAL_BAUD = 115200
+SERIAL_PORT_CACHE = "logs/serial_ports.json"  # Hasil auto-discovery (board → port)
 
 # Class names (sesuaikan dengan dataset Anda)
 CLASS_NAMES = {
@@ -40,24 +45,52 @@ CLASS_COLORS = {
     2: (0, 0, 255)     # Red for B3
 }
 
-# ========== FUNCTIONS ==========
+# Auto mode (frame differencing di grayscale 160x120)
+AUTO_PRESENCE_THRESHOLD = 0.02   # Fraksi pixel beda dengan background = ada item
+AUTO_MOTION_THRESHOLD = 0.005    # Fraksi pixel beda antar frame = masih bergerak
+AUTO_STILL_FRAMES = 5            # Frame diam sebelum mulai inference
+AUTO_STABLE_FRAMES = 3           # Deteksi sama berturut-turut sebelum dispatch
+AUTO_MAX_ATTEMPTS = 15           # Inference max per item sebelum menyerah
+AUTO_CLEAR_FRAMES = 10           # Frame kosong sebelum siap item berikutnya
+AUTO_REBASELINE_FRAMES = 30      # Frame diam di WAIT_CLEAR sebelum probe re-baseline
+AUTO_REBASELINE_TIMEOUT_S = 120  # Re-baseline paksa jika scene tidak kosong selama ini
 
-def find_esp32_port():
-    """Auto-detect ESP32 serial port."""
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        if "USB" in port.description or "Serial" in port.description:
-            return port.device
-    return None
+# ========== FUNCTIONS ==========
 
-def send_to_esp32(ser, class_id):
+def send_to_esp32(serial_manager, class_id):
     """Send classification result to ESP32."""
-    if ser:
-        command = f"CLASS:{class_id}\n"
-        ser.write(command.encode())
+    command = f"CLASS:{class_id}\n"
+    if serial_manager.write(command, role="main"):
         print(f"📤 Sent to ESP32: {command.strip()}")
+    else:
+        print(f"⚠️ ESP32 tidak terhubung, {command.strip()} tidak terkirim")
+
+def create_dispatcher():
+    return AutoDispatcher(
+        presence_threshold=AUTO_PRESENCE_THRESHOLD,
+        motion_threshold=AUTO_MOTION_THRESHOLD,
+        still_frames=AUTO_STILL_FRAMES,
+        stable_frames=AUTO_STABLE_FRAMES,
+        max_attempts=AUTO_MAX_ATTEMPTS,
+        clear_frames=AUTO_CLEAR_FRAMES,
+        rebaseline_frames=AUTO_REBASELINE_FRAMES,
+        rebaseline_timeout_s=AUTO_REBASELINE_TIMEOUT_S
+    )
+
+def print_auto_stats(auto):
+    s = auto.snapshot()
+    print(f"   📈 {s['dispatched']} item | {s['items_per_min']:.1f}/menit "
+          f"({s['items_last_min']} di 60 detik terakhir) | dispatch p50 {s['dispatch_p50_ms']:.0f}ms "
+          f"p95 {s['dispatch_p95_ms']:.0f}ms | inference skip {s['inference_skipped']:.0%} "
+          f"| re-baseline {s['rebaselines']}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Laptop inference (webcam → ESP32 via Serial)")
+    parser.add_argument('--auto', action='store_true',
+                        help="Dispatch otomatis saat item diam (scene harus kosong saat start)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="   %(message)s")
+    
     print("=" * 60)
     print("🗑️ SISTEM PEMILAH SAMPAH CERDAS - INFERENCE")
     print("=" * 60)
@@ -74,23 +107,15 @@ def main():
         print("   2. Training model di Google Colab terlebih dahulu")
         return
     
-    # Setup serial connection to ESP32
+    # Setup serial connection to ESP32 (handshake + reconnect background)
     print("\n🔌 Mencari ESP32...")
-    port = find_esp32_port()
+    serial_manager = SerialManager(roles=["main"], baud=SERIAL_BAUD, cache_path=SERIAL_PORT_CACHE)
     
-    if port:
-        try:
-            ser = serial.Serial(port, SERIAL_BAUD, timeout=1)
-            time.sleep(2)  # Wait for connection
-            print(f"✅ ESP32 terhubung di port: {port}")
-        except Exception as e:
-            print(f"⚠️ Tidak dapat terhubung ke ESP32: {e}")
-            print("   Lanjut tanpa ESP32 (preview only)")
-            ser = None
+    if serial_manager.start():
+        print(f"✅ ESP32 terhubung di port: {serial_manager.get('main').device}")
     else:
         print("⚠️ ESP32 tidak terdeteksi")
-        print("   Lanjut tanpa ESP32 (preview only)")
-        ser = None
+        print("   Lanjut tanpa ESP32 (preview only), dicoba ulang di background")
     
     # Open webcam
     print("\n📹 Membuka webcam...")
@@ -107,10 +132,14 @@ def main():
     print("\nInstruksi:")
     print("   - Tunjukkan sampah ke kamera")
     print("   - Tekan SPACE untuk klasifikasi")
+    print("   - Tekan 'a' untuk toggle auto mode (scene kosong saat aktif)")
     print("   - Tekan 'q' untuk keluar")
     print("=" * 60)
     
     last_detection = None
+    auto = create_dispatcher() if args.auto else None
+    if auto:
+        print("🤖 Auto mode aktif")
     
     while True:
         ret, frame = cap.read()
@@ -120,11 +149,15 @@ def main():
         # Make a copy for display
         display_frame = frame.copy()
         
-        # Run inference
-        results = model(frame, conf=CONF_THRESHOLD, verbose=False)
+        # Auto mode: inference hanya saat item sudah diam di view
+        if auto is not None and not auto.observe(preprocess(frame)):
+            results = None
+        else:
+            results = model(frame, conf=CONF_THRESHOLD, verbose=False)
         
         # Process results
-        if len(results[0].boxes) > 0:
+        best = None
+        if results is not None and len(results[0].boxes) > 0:
             for box in results[0].boxes:
                 # Get box coordinates
                 x1, y1, x2, y2 = map(int, box.xyxy[0])
@@ -147,9 +180,26 @@ def main():
                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
                 
                 last_detection = (cls, class_name, conf)
+                if best is None or conf > best[1]:
+                    best = (cls, conf, [x1, y1, x2, y2])
+        
+        # Auto dispatch: 1x per item setelah deteksi stabil
+        if auto is not None and results is not None:
+            decision = auto.vote(best)
+            if decision:
+                cls, conf = decision
+                print(f"\n🤖 Auto klasifikasi: {CLASS_NAMES.get(cls, cls)} ({conf:.2%})")
+                send_to_esp32(serial_manager, cls)
+                latency_ms = auto.dispatched()
+                print(f"   ⏱️  Dispatch latency: {latency_ms:.0f}ms")
+                print_auto_stats(auto)
         
         # Display info
-        info_text = "Press SPACE to classify | 'q' to quit"
+        if auto is not None:
+            s = auto.snapshot()
+            info_text = f"AUTO [{s['state']}] {s['dispatched']} item | {s['items_per_min']:.1f}/min | 'a' manual"
+        else:
+            info_text = "Press SPACE to classify | 'q' to quit"
         cv2.putText(display_frame, info_text, (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
@@ -168,19 +218,28 @@ def main():
         if key == ord('q'):
             print("\n👋 Keluar dari program...")
             break
-        elif key == ord(' '):  # Space key
+        elif key == ord('a'):
+            if auto is None:
+                auto = create_dispatcher()
+                print("\n🤖 Auto mode aktif")
+            else:
+                print_auto_stats(auto)
+                auto = None
+                print("\n🖐️  Manual mode")
+        elif key == ord(' ') and auto is None:  # Space key
             if last_detection:
                 cls, class_name, conf = last_detection
                 print(f"\n📊 Klasifikasi: {class_name} ({conf:.2%})")
-                send_to_esp32(ser, cls)
+                send_to_esp32(serial_manager, cls)
             else:
                 print("\n⚠️ Tidak ada deteksi")
     
     # Cleanup
     cap.release()
     cv2.destroyAllWindows()
-    if ser:
-        ser.close()
+    serial_manager.close()
+    if auto is not None:
+        print_auto_stats(auto)
     
     print("\n✅ Program selesai!")
     print("=" * 60)
@@ -9,9 +9,20 @@ FITUR:
 ✅ YOLOv8 inference untuk klasifikasi sampah
 ✅ Send hasil ke ESP32 via WiFi (primary)
 ✅ Send hasil via Serial (backup)
-✅ GUI display real-time
+✅ Live preview stream /preview (MJPEG, headless-friendly)
 ✅ CSV logging dengan timestamp
+✅ History ter-index (SQLite) + query API /history
 ✅ Performance metrics (FPS, latency)
+✅ Adaptive input resolution (opsional, lihat resolution_tuner.py)
+✅ Two-stage cascade classifier → detector (opsional, lihat cascade.py)
+✅ Auto-select model variant FP32/FP16/INT8 (opsional, lihat model_variants.py)
+✅ ROI platform hasil kalibrasi tray kosong (lihat platform_roi.py)
+✅ Streaming ingest TCP / chunked HTTP per kamera (lihat stream_ingest.py)
+✅ Structured logging non-blocking, text / JSON + request ID (lihat structured_logging.py)
+✅ Config tervalidasi + override env PEMILAH_*, hot reload threshold / timeout /
+   logging tanpa restart (lihat config_loader.py)
+✅ Outbox durable command & event deteksi, kirim ulang otomatis (lihat outbox.py)
+✅ Upload multi-image /upload_batch, decode paralel + 1 batch inference (lihat upload_batch.py)
 ✅ Error handling & retry mechanism
 
 WORKFLOW:
@@ -19,7 +30,7 @@ WORKFLOW:
 2. Run YOLOv8 inference
 3. Kirim hasil ke ESP32 Main via WiFi
 4. Jika WiFi gagal, fallback ke Serial
-5. Display hasil di GUI
+5. Publish frame ter-annotasi ke /preview
 6. Log ke CSV file
 
 CARA PAKAI:
@@ -35,14 +46,14 @@ Untuk: UAS Sistem Pemilah Sampah Cerdas
 
 import os
 import sys
+import json
 import time
+import logging
 import cv2
 import numpy as np
 from datetime import datetime
-from flask import Flask, request, jsonify
-import threading
+from flask import Flask, request, jsonify, Response, stream_with_context
 import requests
-import serial
 from pathlib import Path
 import csv
 
@@ -54,35 +65,65 @@ except ImportError:
     print("Install dengan: pip install ultralytics")
     sys.exit(1)
 
-# Import config
+# Load config (validasi + override env) sebelum modul lain import config
+from config_loader import load_config, ConfigError
 try:
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
-    from config import *
-except ImportError:
-    print("⚠️  Warning: config.py tidak ditemukan, menggunakan default config")
-    # Default config
-    ESP32_MAIN_IP = "192.168.1.102"
-    ESP32_MAIN_PORT = 80
-    LAPTOP_PORT = 5000
-    MODEL_PATH = "models/best.pt"
-    CONFIDENCE_THRESHOLD = 0.70
-    CLASS_NAMES = {0: "organik", 1: "anorganik", 2: "b3"}
-    CLASS_COLORS = {0: (0, 255, 0), 1: (255, 0, 0), 2: (0, 0, 255)}
-    SERIAL_PORT_WINDOWS = "COM3"
-    SERIAL_PORT_LINUX = "/dev/ttyUSB0"
-    SERIAL_BAUD_RATE = 115200
-    SERIAL_TIMEOUT = 2
-    LOG_DIR = "logs"
-    LOG_FILE = "waste_sorting.csv"
-    IMAGE_SAVE_DIR = "captured_images"
-    SAVE_IMAGES = True
-    SHOW_GUI = True
-    DEBUG_MODE = True
+    config_store = load_config()
+except ConfigError as e:
+    print(f"❌ {e}")
+    sys.exit(1)
+from config import *
+
+from inference_utils import predict_kwargs, classify_frame, classify_frames, set_thresholds
+from resolution_tuner import AdaptiveResolution, load_profile
+from cascade import CascadeRouter
+from model_variants import load_manifest, select_variant
+from platform_roi import PlatformROI, ROICalibrator, offset_boxes
+from stream_ingest import MJPEGFrameParser, StreamIngestServer
+from preview_stream import PreviewBroadcaster, BOUNDARY as PREVIEW_BOUNDARY
+from annotation_renderer import AnnotationRenderer, extract_detections, canvas_shape
+from detection_store import DetectionStore, parse_time, parse_class, event_key, AGGREGATES
+from load_shedding import IngressQueue, Overloaded
+from buffer_pool import BufferPool, PoolExhausted, peak_rss_mb
+from slow_profiler import SlowRequestProfiler
+from structured_logging import setup_logging, request_log, sampled
+from serial_manager import SerialManager
+from wire_protocol import ProtocolClient, UdpTransport, StreamTransport
+from active_learning import ActiveLearningSelector
+from tta import TestTimeAugmenter
+from outbox import Outbox
+from upload_batch import BatchDecoder, unpack_frames
 
 # ========== GLOBAL VARIABLES ==========
 app = Flask(__name__)
+log = logging.getLogger("inference")
+logging_setup = None  # LoggingSetup (listener log non-blocking)
 model = None
-ser = None  # Serial connection
+model_imgsz = None  # Input size tetap untuk variant ONNX non-dynamic
+serial_manager = None  # SerialManager (discovery + reconnect board ESP32)
+actuation_client = None  # ProtocolClient binary (jika ACTUATION_PROTOCOL binary_*)
+resolution = None  # AdaptiveResolution controller (jika aktif)
+cascade = None  # CascadeRouter classifier stage (jika aktif)
+tta = None  # TestTimeAugmenter untuk frame ragu (jika TTA_ENABLED)
+platform_roi = None  # PlatformROI hasil kalibrasi
+roi_calibrator = None  # ROICalibrator (saat CALIBRATION_MODE)
+stream_server = None  # StreamIngestServer (jika aktif)
+preview = None  # PreviewBroadcaster untuk /preview (jika SHOW_GUI)
+renderer = AnnotationRenderer(CLASS_NAMES, CLASS_COLORS)
+history = None  # DetectionStore (jika HISTORY_DB_ENABLED)
+ingress = None  # IngressQueue di depan model (load shedding)
+degrade_model = None  # Model kecil untuk policy "degrade" (opsional)
+buffer_pool = None  # BufferPool body JPEG & canvas annotation (jika aktif)
+sample_selector = None  # ActiveLearningSelector (jika ACTIVE_LEARNING_ENABLED)
+outbox = None  # Outbox durable command & event deteksi (jika OUTBOX_ENABLED)
+batch_decoder = None  # BatchDecoder thread pool decode /upload_batch
+# Hook profiler selalu dipanggil; saat disabled langsung return
+profiler = SlowRequestProfiler(
+    SLOW_PROFILER_ENABLED,
+    SLOW_REQUEST_THRESHOLD_MS,
+    SLOW_PROFILER_RING_SIZE,
+    SLOW_PROFILER_SAMPLE_MS
+)
 stats = {
     'total_processed': 0,
     'organik': 0,
@@ -92,17 +133,16 @@ stats = {
     'avg_latency': 0
 }
 last_process_time = 0
-processing_lock = threading.Lock()
 
 # ========== INISIALISASI ==========
 def initialize():
     """
     Inisialisasi sistem
     """
-    print("\n" + "=" * 70)
-    print("🗑️  SISTEM PEMILAH SAMPAH CERDAS - LAPTOP INFERENCE")
-    print("=" * 70)
-    print()
+    # Setup logging (pertama, semua output lewat logger)
+    setup_structured_logging()
+    
+    log.info("🗑️  SISTEM PEMILAH SAMPAH CERDAS - LAPTOP INFERENCE")
     
     # Load model
     global model
@@ -111,61 +151,161 @@ def initialize():
     # Setup directories
     setup_directories()
     
+    # Setup buffer pool
+    setup_buffer_pool()
+    
     # Setup CSV logging
     setup_csv_logging()
     
+    # Setup detection history store
+    setup_history()
+    
+    # Setup active learning sample pool (optional)
+    setup_active_learning()
+    
     # Setup serial (optional)
     setup_serial()
     
-    print("\n✅ SISTEM SIAP!")
-    print("=" * 70)
-    print(f"🌐 Flask server akan berjalan di http://0.0.0.0:{LAPTOP_PORT}")
-    print("📡 Menunggu image dari ESP32-CAM...")
-    print("=" * 70)
-    print()
+    # Setup binary actuation protocol (optional)
+    setup_actuation()
+    
+    # Setup durable outbox (setelah history & actuation, replay pending)
+    setup_outbox()
+    
+    # Setup ingress queue & load shedding
+    setup_load_shedding()
+    
+    # Setup decoder paralel /upload_batch
+    setup_upload_batch()
+    
+    # Setup adaptive resolution (optional)
+    setup_adaptive_resolution()
+    
+    # Setup cascade classifier (optional)
+    setup_cascade()
+    
+    # Setup test-time augmentation (optional)
+    setup_tta()
+    
+    # Setup platform ROI / calibration
+    setup_platform_roi()
+    
+    # Setup streaming ingest (optional)
+    setup_stream_ingest()
+    
+    # Setup live preview
+    setup_preview()
+    
+    # Hot reload config (setelah semua komponen siap)
+    setup_config_reload()
+    
+    log.info("✅ SISTEM SIAP!")
+    log.info(f"🌐 Flask server akan berjalan di http://0.0.0.0:{LAPTOP_PORT}")
+    log.info("📡 Menunggu image dari ESP32-CAM...")
+
+def setup_structured_logging():
+    """
+    Setup logging berlevel non-blocking (text / JSON)
+    """
+    global logging_setup
+    
+    log_file = os.path.join(LOG_DIR, LOG_TO_FILE) if LOG_TO_FILE else None
+    if log_file:
+        Path(LOG_DIR).mkdir(exist_ok=True)
+    
+    logging_setup = setup_logging(
+        LOG_LEVEL,
+        LOG_FORMAT,
+        queue_size=LOG_QUEUE_SIZE,
+        sample_every=LOG_SAMPLE_EVERY,
+        log_file=log_file
+    )
+
+def select_model_path():
+    """
+    Tentukan file model: variant dari manifest (jika aktif) atau MODEL_PATH
+    """
+    global model_imgsz
+    
+    if not MODEL_AUTO_SELECT:
+        return MODEL_PATH
+    
+    manifest = load_manifest(MODEL_VARIANT_MANIFEST)
+    if manifest is None:
+        log.warning(f"⚠️  Manifest tidak ditemukan: {MODEL_VARIANT_MANIFEST}, pakai {MODEL_PATH}")
+        return MODEL_PATH
+    
+    variant = select_variant(manifest, MODEL_LATENCY_BUDGET_MS, MODEL_MAX_ACCURACY_DROP)
+    if variant is None:
+        log.warning(f"⚠️  Tidak ada variant valid di manifest, pakai {MODEL_PATH}")
+        return MODEL_PATH
+    
+    within = "✓" if variant['latency_p95_ms'] <= MODEL_LATENCY_BUDGET_MS else "⚠️  melebihi budget,"
+    log.info(f"{within} Variant {variant['precision'].upper()} "
+             f"(p95 {variant['latency_p95_ms']:.1f}ms, budget {MODEL_LATENCY_BUDGET_MS}ms)")
+    
+    # ONNX hasil export fixed-shape hanya menerima imgsz saat export
+    if variant['path'].endswith(".onnx") and not manifest.get('dynamic', False):
+        model_imgsz = manifest.get('imgsz', IMAGE_SIZE)
+    
+    return variant['path']
 
 def load_model():
     """
     Load YOLOv8 model
     """
-    print("🤖 Loading YOLOv8 model...")
+    log.info("🤖 Loading YOLOv8 model...")
     
-    if not os.path.exists(MODEL_PATH):
-        print(f"❌ Error: Model tidak ditemukan di {MODEL_PATH}")
-        print("Silakan training model terlebih dahulu menggunakan notebook yang tersedia")
+    model_path = select_model_path()
+    
+    if not os.path.exists(model_path):
+        log.error(f"❌ Error: Model tidak ditemukan di {model_path}")
+        log.info("Silakan training model terlebih dahulu menggunakan notebook yang tersedia")
         sys.exit(1)
     
     try:
-        model = YOLO(MODEL_PATH)
-        print(f"   ✓ Model loaded: {MODEL_PATH}")
+        model = YOLO(model_path, task='detect')
+        log.info(f"✓ Model loaded: {model_path}")
         
         # Test inference
         dummy_img = np.zeros((640, 640, 3), dtype=np.uint8)
-        results = model(dummy_img, verbose=False)
-        print("   ✓ Model test OK")
+        results = model(dummy_img, **predict_kwargs(imgsz=model_imgsz))
+        log.info("✓ Model test OK")
         
         return model
     except Exception as e:
-        print(f"❌ Error loading model: {e}")
+        log.error(f"❌ Error loading model: {e}")
         sys.exit(1)
 
 def setup_directories():
     """
     Setup directories untuk logging dan images
     """
-    print("📁 Setting up directories...")
+    log.info("📁 Setting up directories...")
     
     Path(LOG_DIR).mkdir(exist_ok=True)
     if SAVE_IMAGES:
         Path(IMAGE_SAVE_DIR).mkdir(exist_ok=True)
     
-    print("   ✓ Directories ready")
+    log.info("✓ Directories ready")
+
+def setup_buffer_pool():
+    """
+    Setup pool buffer reusable dengan batas memori global
+    """
+    global buffer_pool
+    
+    if not BUFFER_POOL_ENABLED:
+        return
+    
+    buffer_pool = BufferPool(BUFFER_POOL_MAX_MB * 1024 * 1024)
+    log.info(f"🧱 Buffer pool: max {BUFFER_POOL_MAX_MB} MB")
 
 def setup_csv_logging():
     """
     Setup CSV file untuk logging
     """
-    print("📝 Setting up CSV logging...")
+    log.info("📝 Setting up CSV logging...")
     
     csv_path = os.path.join(LOG_DIR, LOG_FILE)
     
@@ -183,38 +323,453 @@ def setup_csv_logging():
                 'communication',
                 'latency_ms'
             ])
-        print(f"   ✓ CSV created: {csv_path}")
+        log.info(f"✓ CSV created: {csv_path}")
     else:
-        print(f"   ✓ CSV exists: {csv_path}")
+        log.info(f"✓ CSV exists: {csv_path}")
+
+def setup_history():
+    """
+    Setup SQLite history store untuk /history
+    """
+    global history
+    
+    if not HISTORY_DB_ENABLED:
+        return
+    
+    log.info("🗄️  Setting up detection history...")
+    
+    try:
+        history = DetectionStore(HISTORY_DB_PATH)
+        log.info(f"✓ History DB: {HISTORY_DB_PATH}")
+    except Exception as e:
+        log.warning(f"⚠️  History DB not available: {e}")
+        history = None
+
+def setup_active_learning():
+    """
+    Setup pool sample informatif untuk retraining
+    """
+    global sample_selector
+    
+    if not ACTIVE_LEARNING_ENABLED:
+        return
+    
+    log.info("🎯 Setting up active learning pool...")
+    
+    try:
+        sample_selector = ActiveLearningSelector(
+            ACTIVE_LEARNING_DIR,
+            capacity=ACTIVE_LEARNING_POOL_SIZE,
+            min_score=ACTIVE_LEARNING_MIN_SCORE,
+            margin_threshold=ACTIVE_LEARNING_MARGIN,
+            disagreement_window_s=ACTIVE_LEARNING_WINDOW_S,
+            hash_distance=ACTIVE_LEARNING_HASH_DISTANCE
+        )
+        log.info(f"✓ Active learning: {len(sample_selector.entries)}/{ACTIVE_LEARNING_POOL_SIZE} "
+                 f"sample di {ACTIVE_LEARNING_DIR}")
+    except Exception as e:
+        log.warning(f"⚠️  Active learning not available: {e}")
+        sample_selector = None
 
 def setup_serial():
     """
     Setup serial connection (backup communication)
+    Auto-discovery + reconnect background, lihat serial_manager.py
     """
-    global ser
+    global serial_manager
+    
+    if not SERIAL_ENABLED:
+        log.info("🔌 Serial disabled (SERIAL_ENABLED = False)")
+        return False
+    
+    log.info("🔌 Setting up serial connection (backup)...")
     
-    print("🔌 Setting up serial connection (backup)...")
+    # Port config di-probe duluan
+    if sys.platform.startswith('win'):
+        port = SERIAL_PORT_WINDOWS
+    else:
+        port = SERIAL_PORT_LINUX
+    
+    serial_manager = SerialManager(
+        roles=SERIAL_BOARDS,
+        baud=SERIAL_BAUD_RATE,
+        preferred_ports=[port],
+        probe_timeout=SERIAL_PROBE_TIMEOUT,
+        discovery_timeout=SERIAL_DISCOVERY_TIMEOUT,
+        reconnect_interval=SERIAL_RECONNECT_INTERVAL,
+        cache_path=SERIAL_PORT_CACHE,
+        require_handshake=SERIAL_REQUIRE_HANDSHAKE,
+        write_timeout=SERIAL_TIMEOUT
+    )
+    
+    if serial_manager.start():
+        return True
+    
+    log.warning(f"⚠️  Serial not available: board {serial_manager.missing_roles()} tidak ditemukan")
+    log.info(f"WiFi communication only, reconnect dicoba tiap {SERIAL_RECONNECT_INTERVAL}s")
+    return False
+
+def setup_actuation():
+    """
+    Setup client binary wire protocol ke ESP32 Main (lihat wire_protocol.py)
+    """
+    global actuation_client
+    
+    if ACTUATION_PROTOCOL == "http":
+        return
+    
+    log.info(f"📦 Setting up binary actuation ({ACTUATION_PROTOCOL})...")
     
     try:
-        # Detect OS
-        if sys.platform.startswith('win'):
-            port = SERIAL_PORT_WINDOWS
+        if ACTUATION_PROTOCOL == "binary_udp":
+            transport = UdpTransport(ESP32_MAIN_IP, ESP32_BINARY_PORT)
+        elif ACTUATION_PROTOCOL == "binary_tcp":
+            transport = StreamTransport.tcp(ESP32_MAIN_IP, ESP32_BINARY_PORT)
         else:
-            port = SERIAL_PORT_LINUX
+            raise ValueError(f"ACTUATION_PROTOCOL tidak dikenal: {ACTUATION_PROTOCOL}")
         
-        ser = serial.Serial(
-            port=port,
-            baudrate=SERIAL_BAUD_RATE,
-            timeout=SERIAL_TIMEOUT
+        actuation_client = ProtocolClient(transport, ACTUATION_ACK_TIMEOUT, ACTUATION_RETRIES)
+        log.info(f"✓ Command ke {ESP32_MAIN_IP}:{ESP32_BINARY_PORT}, ack timeout {ACTUATION_ACK_TIMEOUT}s")
+    except (OSError, ValueError) as e:
+        log.warning(f"⚠️  Binary actuation not available: {e}, pakai HTTP")
+        actuation_client = None
+
+def setup_outbox():
+    """
+    Setup outbox durable: command aktuasi & event deteksi dicatat sebelum
+    dikirim, yang gagal dicoba ulang di background (lihat outbox.py)
+    """
+    global outbox
+    
+    if not OUTBOX_ENABLED:
+        return
+    
+    log.info("📬 Setting up outbox...")
+    
+    try:
+        outbox = Outbox(
+            OUTBOX_DB_PATH,
+            retry_base_s=OUTBOX_RETRY_BASE_S,
+            retry_max_s=OUTBOX_RETRY_MAX_S,
+            batch_size=OUTBOX_REPLAY_BATCH,
+            retention_s=OUTBOX_RETENTION_H * 3600,
+            sync=OUTBOX_SYNC
         )
-        
-        print(f"   ✓ Serial connected: {port}")
-        return True
     except Exception as e:
-        print(f"   ⚠️  Serial not available: {e}")
-        print("   WiFi communication only")
-        ser = None
-        return False
+        log.warning(f"⚠️  Outbox not available: {e}, command tidak dicoba ulang")
+        outbox = None
+        return
+    
+    outbox.register("actuation", deliver_actuation, ttl_s=OUTBOX_COMMAND_TTL_S, latest_only=True)
+    outbox.register("detection", record_detection)
+    attempted, delivered = outbox.start()
+    log.info(f"✓ Outbox: {OUTBOX_DB_PATH}, replay {delivered}/{attempted} event, "
+             f"TTL command {OUTBOX_COMMAND_TTL_S}s")
+
+def setup_upload_batch():
+    """
+    Setup thread pool decode JPEG untuk /upload_batch (lihat upload_batch.py)
+    """
+    global batch_decoder
+    
+    batch_decoder = BatchDecoder(UPLOAD_BATCH_DECODE_WORKERS)
+    log.info(f"✓ /upload_batch: max {UPLOAD_BATCH_MAX_IMAGES} image, "
+             f"decode {UPLOAD_BATCH_DECODE_WORKERS} thread")
+
+def setup_load_shedding():
+    """
+    Setup antrian masuk terbatas di depan model
+    """
+    global ingress, degrade_model
+    
+    log.info("🚦 Setting up ingress queue...")
+    ingress = IngressQueue(INGRESS_QUEUE_SIZE, LOAD_SHED_POLICY, LOAD_SHED_RETRY_AFTER)
+    log.info(f"✓ Max {ingress.max_pending} menunggu, policy overload: {ingress.policy}")
+    
+    if LOAD_SHED_POLICY != "degrade":
+        return
+    
+    if LOAD_SHED_DEGRADE_MODEL and os.path.exists(LOAD_SHED_DEGRADE_MODEL):
+        degrade_model = YOLO(LOAD_SHED_DEGRADE_MODEL, task='detect')
+        log.info(f"✓ Degrade model: {LOAD_SHED_DEGRADE_MODEL}")
+    elif model_imgsz is not None:
+        log.warning(f"⚠️  Variant ONNX fixed-shape ({model_imgsz}px) tanpa degrade model: degrade = no-op")
+    else:
+        log.info(f"✓ Degrade input size: {LOAD_SHED_DEGRADE_SIZE}px")
+
+def setup_adaptive_resolution():
+    """
+    Setup controller resolusi adaptif dari hasil profiling
+    """
+    global resolution
+    
+    if not ADAPTIVE_RESOLUTION:
+        return
+    
+    log.info("📐 Setting up adaptive resolution...")
+    
+    if model_imgsz is not None:
+        log.warning(f"⚠️  Variant ONNX fixed-shape ({model_imgsz}px), adaptive resolution disabled")
+        return
+    
+    # Size hasil profiling jadi batas atas; tanpa profile pakai IMAGE_SIZE
+    profile = load_profile(RESOLUTION_PROFILE_PATH)
+    max_size = profile['chosen_size'] if profile else IMAGE_SIZE
+    
+    resolution = AdaptiveResolution(
+        ADAPTIVE_SIZES,
+        ADAPTIVE_TARGET_LATENCY_MS,
+        max_size=max_size
+    )
+    
+    source = RESOLUTION_PROFILE_PATH if profile else "IMAGE_SIZE (belum ada profile)"
+    log.info(f"✓ Sizes {resolution.sizes}, start {resolution.current_size}px dari {source}")
+
+def setup_cascade():
+    """
+    Setup classifier stage untuk two-stage cascade
+    """
+    global cascade
+    
+    if not CASCADE_ENABLED:
+        return
+    
+    log.info("🔀 Setting up cascade classifier...")
+    
+    if not os.path.exists(CASCADE_MODEL_PATH):
+        log.warning(f"⚠️  Classifier tidak ditemukan: {CASCADE_MODEL_PATH}")
+        log.info("Semua frame langsung ke detector")
+        return
+    
+    try:
+        cascade = CascadeRouter(
+            YOLO(CASCADE_MODEL_PATH),
+            CLASS_NAMES,
+            threshold=CASCADE_THRESHOLD,
+            escalate_classes=CASCADE_ESCALATE_CLASSES,
+            crop_fraction=CASCADE_CROP_FRACTION,
+            imgsz=CASCADE_IMAGE_SIZE,
+            device=predict_kwargs()['device'],
+            log_path=os.path.join(LOG_DIR, CASCADE_LOG_FILE)
+        )
+        log.info(f"✓ Classifier loaded: {CASCADE_MODEL_PATH}")
+        log.info(f"✓ Threshold {CASCADE_THRESHOLD:.0%}, escalate class {CASCADE_ESCALATE_CLASSES}")
+    except Exception as e:
+        log.warning(f"⚠️  Cascade disabled: {e}")
+        cascade = None
+
+def setup_tta():
+    """
+    Setup test-time augmentation untuk frame dengan confidence di band ragu
+    """
+    global tta
+    
+    if not TTA_ENABLED:
+        return
+    
+    log.info("🔁 Setting up test-time augmentation...")
+    
+    # Variant ONNX non-dynamic hanya menerima 1 input size: flip saja
+    scales = [1.0] if model_imgsz is not None else TTA_SCALES
+    
+    try:
+        tta = TestTimeAugmenter(
+            band_low=TTA_BAND_LOW,
+            band_high=TTA_BAND_HIGH,
+            scales=scales,
+            flips=TTA_FLIPS,
+            budget_ms=TTA_LATENCY_BUDGET_MS,
+            wbf_iou=TTA_WBF_IOU,
+            base_size=model_imgsz or IMAGE_SIZE
+        )
+        log.info(f"✓ TTA band [{TTA_BAND_LOW:.0%}, {TTA_BAND_HIGH:.0%}), scales {scales}, "
+                 f"flips {TTA_FLIPS}, budget {TTA_LATENCY_BUDGET_MS}ms")
+    except ValueError as e:
+        log.warning(f"⚠️  TTA disabled: {e}")
+        tta = None
+
+def setup_platform_roi():
+    """
+    Load ROI platform, atau mulai kalibrasi jika CALIBRATION_MODE
+    """
+    global platform_roi, roi_calibrator
+    
+    log.info("🎯 Setting up platform ROI...")
+    
+    if CALIBRATION_MODE:
+        roi_calibrator = ROICalibrator(CALIBRATION_SAMPLES, PLATFORM_ROI_PATH, PLATFORM_ROI_MARGIN)
+        log.info(f"🔧 CALIBRATION MODE: kirim {CALIBRATION_SAMPLES} frame tray KOSONG")
+        return
+    
+    if not USE_PLATFORM_ROI:
+        log.info("✓ ROI disabled, inference full frame")
+        return
+    
+    platform_roi = PlatformROI.load(PLATFORM_ROI_PATH)
+    if platform_roi is None:
+        log.warning(f"⚠️  ROI belum dikalibrasi ({PLATFORM_ROI_PATH}), inference full frame")
+    else:
+        log.info(f"✓ ROI loaded: {platform_roi.to_dict()}")
+
+def calibrate_platform(image):
+    """
+    Tambah frame kalibrasi; aktifkan ROI saat sampel sudah cukup
+    """
+    global platform_roi, roi_calibrator
+    
+    try:
+        roi = roi_calibrator.add(image)
+    except ValueError as e:
+        log.error(f"❌ Kalibrasi gagal: {e}")
+        return {'status': 'calibration_failed', 'message': str(e)}
+    
+    if roi is None:
+        log.info(f"🔧 Calibration frame {roi_calibrator.collected}/{CALIBRATION_SAMPLES}")
+        return {
+            'status': 'calibrating',
+            'collected': roi_calibrator.collected,
+            'required': CALIBRATION_SAMPLES
+        }
+    
+    platform_roi = roi if USE_PLATFORM_ROI else None
+    roi_calibrator = None
+    log.info(f"✅ ROI calibrated: {roi.to_dict()} → {PLATFORM_ROI_PATH}")
+    
+    return {'status': 'calibrated', 'roi': roi.to_dict()}
+
+def setup_stream_ingest():
+    """
+    Start TCP stream ingest server di background thread
+    """
+    global stream_server
+    
+    if not STREAM_INGEST_ENABLED:
+        return
+    
+    log.info("📡 Setting up stream ingest...")
+    
+    try:
+        stream_server = StreamIngestServer(
+            '0.0.0.0',
+            STREAM_INGEST_PORT,
+            handle_stream_frame,
+            queue_size=STREAM_QUEUE_SIZE,
+            max_frame_bytes=STREAM_MAX_FRAME_BYTES
+        )
+        stream_server.start_background()
+        log.info(f"✓ Stream ingest listening on tcp://0.0.0.0:{STREAM_INGEST_PORT}")
+    except OSError as e:
+        log.warning(f"⚠️  Stream ingest not available: {e}")
+        stream_server = None
+
+def setup_preview():
+    """
+    Setup broadcaster untuk live preview /preview
+    """
+    global preview
+    
+    if not SHOW_GUI:
+        return
+    
+    preview = PreviewBroadcaster(
+        max_fps=PREVIEW_MAX_FPS,
+        width=GUI_WINDOW_WIDTH,
+        quality=PREVIEW_JPEG_QUALITY,
+        pool=buffer_pool
+    )
+    log.info(f"🖥️  Live preview: http://0.0.0.0:{LAPTOP_PORT}/preview (max {PREVIEW_MAX_FPS} FPS)")
+
+def setup_config_reload():
+    """
+    Daftarkan field hot reload ke komponen yang sudah jalan
+    
+    Model, port, serial, dll tidak ikut: perubahan field itu hanya dicatat
+    sebagai restart_required di /stats
+    """
+    config_store.subscribe(("CONFIDENCE_THRESHOLD", "IOU_THRESHOLD"),
+                           lambda cfg: set_thresholds(cfg.CONFIDENCE_THRESHOLD, cfg.IOU_THRESHOLD))
+    config_store.subscribe(("SLOW_REQUEST_THRESHOLD_MS",),
+                           lambda cfg: setattr(profiler, 'threshold_ms', cfg.SLOW_REQUEST_THRESHOLD_MS))
+    if logging_setup is not None:
+        config_store.subscribe(("LOG_LEVEL", "LOG_SAMPLE_EVERY"),
+                               lambda cfg: logging_setup.configure(cfg.LOG_LEVEL, cfg.LOG_SAMPLE_EVERY))
+    if cascade is not None:
+        config_store.subscribe(("CASCADE_THRESHOLD",),
+                               lambda cfg: setattr(cascade, 'threshold', cfg.CASCADE_THRESHOLD))
+    if tta is not None:
+        config_store.subscribe(("TTA_BAND_LOW", "TTA_BAND_HIGH", "TTA_LATENCY_BUDGET_MS"),
+                               lambda cfg: tta.configure(cfg.TTA_BAND_LOW, cfg.TTA_BAND_HIGH,
+                                                         cfg.TTA_LATENCY_BUDGET_MS))
+    if sample_selector is not None:
+        config_store.subscribe(("ACTIVE_LEARNING_MIN_SCORE",),
+                               lambda cfg: setattr(sample_selector, 'min_score', cfg.ACTIVE_LEARNING_MIN_SCORE))
+    if actuation_client is not None:
+        config_store.subscribe(("ACTUATION_ACK_TIMEOUT", "ACTUATION_RETRIES"),
+                               lambda cfg: actuation_client.configure(cfg.ACTUATION_ACK_TIMEOUT,
+                                                                      cfg.ACTUATION_RETRIES))
+    
+    if CONFIG_HOT_RELOAD:
+        config_store.start()
+        log.info(f"🔄 Hot reload config: {config_store.current.source} (cek tiap {CONFIG_RELOAD_INTERVAL}s)")
+
+def read_body_pooled(stream, length):
+    """
+    Baca body request (Content-Length) ke buffer pool
+
+    Returns:
+        Lease; .array = bytes yang benar-benar terbaca
+
+    Raises:
+        PoolExhausted jika pool penuh (tidak alokasi di luar pool)
+    """
+    lease = buffer_pool.acquire((length,), overflow=False)
+    view = memoryview(lease.array)
+    readinto = getattr(stream, 'readinto', None)
+    received = 0
+    
+    while received < length:
+        if readinto is not None:
+            n = readinto(view[received:])
+        else:
+            chunk = stream.read(min(65536, length - received))
+            n = len(chunk)
+            view[received:received + n] = chunk
+        if not n:
+            break
+        received += n
+    
+    lease.array = lease.array[:received]
+    return lease
+
+def handle_stream_frame(jpeg_bytes, camera_id, received_time):
+    """
+    Proses 1 frame dari stream (TCP atau /upload_stream)
+    """
+    profiler.begin(received_time)
+    request_id = request_log.begin(station=camera_id)
+    result = None
+    try:
+        image = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+        mark_stage("decode")
+        if image is None:
+            result = {'status': 'error', 'message': 'Failed to decode image'}
+        elif roi_calibrator is not None:
+            result = calibrate_platform(image)
+        else:
+            result = run_inference(image, received_time, station=camera_id)
+    except Overloaded as e:
+        result = {
+            'status': 'overloaded',
+            'message': str(e),
+            'reason': e.reason,
+            'retry_after': e.retry_after_s
+        }
+    finally:
+        profiler.finish(endpoint="stream", station=camera_id, request_id=request_id,
+                        status=result['status'] if result else 'error')
+        request_log.finish()
+    result['request_id'] = request_id
+    return result
 
 # ========== FLASK ENDPOINTS ==========
 @app.route('/')
@@ -262,6 +817,18 @@ def index():
             <div class="endpoint">
                 <strong>POST /upload</strong> - Upload image untuk inference
             </div>
+            <div class="endpoint">
+                <strong>POST /upload_batch</strong> - Beberapa JPEG (multipart / length-prefixed), 1 batch inference
+            </div>
+            <div class="endpoint">
+                <strong>POST /upload_stream</strong> - Stream JPEG (chunked), hasil NDJSON
+            </div>
+            <div class="endpoint">
+                <strong>GET <a href="/preview">/preview</a></strong> - Live preview (MJPEG)
+            </div>
+            <div class="endpoint">
+                <strong>GET /history</strong> - History deteksi (start, end, class, station, aggregate)
+            </div>
             <div class="endpoint">
                 <strong>GET /status</strong> - System status
             </div>
@@ -279,52 +846,275 @@ def upload_image():
     Endpoint untuk receive image dari ESP32-CAM
     """
     start_time = time.time()
+    profiler.begin(start_time)
+    station = request.args.get('station') or request.headers.get('X-Station-ID') or STATION_ID
+    request_id = request_log.begin(request.headers.get('X-Request-ID'), station)
     
-    print("\n" + "=" * 70)
-    print("📨 RECEIVED IMAGE FROM ESP32-CAM")
-    print("=" * 70)
+    log.debug("📨 Received image from ESP32-CAM", extra=sampled("upload"))
     
     try:
-        # Get image dari request
+        # Batas ukuran dicek dari header, sebelum body dibaca / buffer dipinjam
+        if request.content_length and request.content_length > UPLOAD_MAX_BYTES:
+            return jsonify({
+                'status': 'error',
+                'message': f'Body {request.content_length} byte melebihi batas {UPLOAD_MAX_BYTES} byte'
+            }), 413
+        
+        # Get image dari request (body raw dibaca ke buffer pool)
+        body = None
         if 'file' in request.files:
             file = request.files['file']
             image_bytes = file.read()
+        elif buffer_pool is not None and request.content_length:
+            body = read_body_pooled(request.stream, request.content_length)
+            image_bytes = body.array
         else:
             image_bytes = request.data
         
-        if len(image_bytes) == 0:
+        try:
+            if len(image_bytes) == 0:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'No image data received'
+                }), 400
+            
+            log.debug(f"📷 Image size: {len(image_bytes)} bytes", extra=sampled("upload"))
+            
+            # Convert bytes to image (hasil decode tidak berbagi memori dengan body)
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        finally:
+            if body is not None:
+                body.release()
+        mark_stage("decode")
+        
+        if image is None:
             return jsonify({
                 'status': 'error',
-                'message': 'No image data received'
+                'message': 'Failed to decode image'
             }), 400
         
-        print(f"📷 Image size: {len(image_bytes)} bytes")
+        log.debug(f"Image shape: {image.shape}", extra=sampled("upload"))
         
-        # Convert bytes to image
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Calibration mode: frame tray kosong, tanpa inference
+        if roi_calibrator is not None:
+            return jsonify(calibrate_platform(image)), 200
         
-        if image is None:
+        # Run inference (X-Actuate: 0 → aktuasi oleh gateway)
+        actuate = (request.headers.get('X-Actuate') or request.args.get('actuate', '1')) != '0'
+        result = run_inference(image, start_time, station, actuate)
+        
+        response = jsonify(result)
+        response.headers['X-Request-ID'] = request_id
+        return response, 200
+        
+    except Overloaded as e:
+        log.warning(f"🚦 Load shed: {e.reason}")
+        response = jsonify({
+            'status': 'overloaded',
+            'message': str(e),
+            'reason': e.reason
+        })
+        response.headers['Retry-After'] = str(e.retry_after_s)
+        response.headers['X-Request-ID'] = request_id
+        return response, 503
+        
+    except PoolExhausted as e:
+        log.warning(f"🧱 {e}")
+        response = jsonify({
+            'status': 'overloaded',
+            'message': str(e),
+            'reason': 'buffer_pool'
+        })
+        response.headers['Retry-After'] = str(LOAD_SHED_RETRY_AFTER)
+        response.headers['X-Request-ID'] = request_id
+        return response, 503
+        
+    except Exception as e:
+        log.exception(f"❌ Error processing image: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+    
+    finally:
+        profiler.finish(endpoint="/upload", station=station, request_id=request_id)
+        request_log.finish()
+
+@app.route('/upload_batch', methods=['POST'])
+def upload_batch():
+    """
+    Endpoint multi-image: multipart (field file berulang) atau body binary
+    length-prefixed, decode paralel, 1 batch inference, hasil per image urut
+    
+    Default tanpa aktuasi (drain backlog); ?actuate=1 / X-Actuate: 1 per item
+    """
+    start_time = time.time()
+    profiler.begin(start_time)
+    station = request.args.get('station') or request.headers.get('X-Station-ID') or STATION_ID
+    request_id = request_log.begin(request.headers.get('X-Request-ID'), station)
+    
+    try:
+        if roi_calibrator is not None:
             return jsonify({
                 'status': 'error',
-                'message': 'Failed to decode image'
+                'message': 'Calibration mode: kirim frame tray kosong ke /upload'
             }), 400
         
-        print(f"   Image shape: {image.shape}")
+        # Multipart: semua file sesuai urutan di body; selain itu length-prefixed
+        try:
+            if request.files:
+                files = [file for _, file in request.files.items(multi=True)]
+                if len(files) > UPLOAD_BATCH_MAX_IMAGES:
+                    raise ValueError(f"Maksimal {UPLOAD_BATCH_MAX_IMAGES} image per request")
+                blobs = []
+                for file in files:
+                    # Baca maks batas + 1 byte: cukup untuk tahu file kebesaran
+                    blob = file.read(UPLOAD_BATCH_MAX_IMAGE_BYTES + 1)
+                    if not blob or len(blob) > UPLOAD_BATCH_MAX_IMAGE_BYTES:
+                        raise ValueError(f"Image #{len(blobs)}: ukuran di luar batas "
+                                         f"(maks {UPLOAD_BATCH_MAX_IMAGE_BYTES} byte)")
+                    blobs.append(blob)
+            else:
+                blobs = unpack_frames(request.get_data(), UPLOAD_BATCH_MAX_IMAGES,
+                                      UPLOAD_BATCH_MAX_IMAGE_BYTES)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
         
-        # Run inference
-        result = run_inference(image, start_time)
+        if not blobs:
+            return jsonify({
+                'status': 'error',
+                'message': 'No image data received'
+            }), 400
+        
+        images = batch_decoder.decode(blobs)
+        mark_stage("decode")
+        
+        actuate = (request.headers.get('X-Actuate') or request.args.get('actuate', '0')) == '1'
+        results = run_inference_batch(images, start_time, station, actuate)
+        
+        response = jsonify({
+            'status': 'success',
+            'count': len(results),
+            'results': results,
+            'latency_ms': (time.time() - start_time) * 1000
+        })
+        response.headers['X-Request-ID'] = request_id
+        return response, 200
         
-        return jsonify(result), 200
+    except Overloaded as e:
+        log.warning(f"🚦 Load shed (batch): {e.reason}")
+        response = jsonify({
+            'status': 'overloaded',
+            'message': str(e),
+            'reason': e.reason
+        })
+        response.headers['Retry-After'] = str(e.retry_after_s)
+        response.headers['X-Request-ID'] = request_id
+        return response, 503
         
     except Exception as e:
-        print(f"❌ Error processing image: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"❌ Error processing batch: {e}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
+    
+    finally:
+        profiler.finish(endpoint="/upload_batch", station=station, request_id=request_id)
+        request_log.finish()
+
+@app.route('/upload_stream', methods=['POST'])
+def upload_stream():
+    """
+    Endpoint streaming: body chunked berisi JPEG berurutan (raw/MJPEG),
+    response NDJSON 1 baris per frame di koneksi yang sama
+    """
+    camera_id = request.args.get('camera', request.remote_addr)
+    stream = request.stream
+    
+    def generate():
+        parser = MJPEGFrameParser(STREAM_MAX_FRAME_BYTES)
+        seq = 0
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            for jpeg in parser.feed(chunk):
+                seq += 1
+                try:
+                    result = handle_stream_frame(jpeg, camera_id, time.time())
+                except Exception as e:
+                    result = {'status': 'error', 'message': str(e)}
+                result['seq'] = seq
+                result['camera'] = camera_id
+                yield json.dumps(result) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/history', methods=['GET'])
+def get_history():
+    """
+    Query history deteksi
+    
+    Params: start, end (ISO / epoch), class (nama / index), station,
+            limit, offset, aggregate (hour | day | class | station)
+    """
+    if history is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'History disabled (HISTORY_DB_ENABLED = False)'
+        }), 404
+    
+    try:
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+        predicted_class = parse_class(request.args.get('class'))
+        station = request.args.get('station')
+        aggregate = request.args.get('aggregate')
+        
+        if aggregate:
+            return jsonify(history.aggregate(aggregate, start, end, predicted_class, station))
+        
+        return jsonify(history.query(
+            start, end, predicted_class, station,
+            limit=request.args.get('limit', 100),
+            offset=request.args.get('offset', 0)
+        ))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'aggregates': list(AGGREGATES)
+        }), 400
+
+@app.route('/preview')
+def preview_stream():
+    """
+    Live MJPEG stream frame ter-annotasi
+    """
+    if preview is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Preview disabled (SHOW_GUI = False)'
+        }), 404
+    
+    return Response(
+        preview.stream(),
+        mimetype=f'multipart/x-mixed-replace; boundary={PREVIEW_BOUNDARY}'
+    )
+
+@app.route('/debug/slow', methods=['GET'])
+def debug_slow():
+    """
+    Request lambat yang ter-capture profiler
+    
+    Params: stacks=1 (folded stacks per request), format=folded (text flamegraph)
+    """
+    if request.args.get('format') == 'folded':
+        return Response(profiler.folded() + "\n", mimetype='text/plain')
+    
+    return jsonify(profiler.snapshot(include_stacks=request.args.get('stacks') == '1'))
 
 @app.route('/status', methods=['GET'])
 def get_status():
@@ -334,7 +1124,7 @@ def get_status():
     return jsonify({
         'status': 'running',
         'model_loaded': model is not None,
-        'serial_connected': ser is not None,
+        'serial_connected': serial_manager is not None and serial_manager.get("main") is not None,
         'stats': stats
     })
 
@@ -343,106 +1133,316 @@ def get_stats():
     """
     Get statistics
     """
-    return jsonify(stats)
+    response = dict(stats)
+    if resolution is not None:
+        response['resolution'] = resolution.snapshot()
+    if cascade is not None:
+        response['cascade'] = cascade.snapshot()
+    if tta is not None:
+        response['tta'] = tta.snapshot()
+    if preview is not None:
+        response['preview'] = preview.snapshot()
+    if ingress is not None:
+        response['load_shedding'] = ingress.snapshot()
+    if buffer_pool is not None:
+        response['buffer_pool'] = buffer_pool.snapshot()
+    else:
+        response['peak_rss_mb'] = peak_rss_mb()
+    if serial_manager is not None:
+        response['serial'] = serial_manager.snapshot()
+    if actuation_client is not None:
+        response['actuation'] = actuation_client.snapshot()
+    if logging_setup is not None:
+        response['logging'] = logging_setup.snapshot()
+    response['config'] = config_store.snapshot()
+    if sample_selector is not None:
+        response['active_learning'] = sample_selector.snapshot()
+    if outbox is not None:
+        response['outbox'] = outbox.snapshot()
+    return jsonify(response)
 
 # ========== INFERENCE ==========
-def run_inference(image, start_time):
+def acquire_model():
+    """
+    Admission ingress queue + tunggu giliran model
+    
+    Returns:
+        (ticket, model aktif, input size)
+    
+    Raises:
+        Overloaded jika ditolak / dibuang oleh ingress queue
+    """
+    # Admission dulu: request yang ditolak tidak ikut dihitung resolution
+    ticket = ingress.admit()
+    
+    # Input size dipilih sebelum antri lock supaya antrian ikut terhitung
+    imgsz = resolution.begin() if resolution is not None else model_imgsz
+    
+    active_model = model
+    if ticket.degraded:
+        if degrade_model is not None:
+            active_model = degrade_model
+        elif model_imgsz is None:
+            imgsz = min(imgsz or IMAGE_SIZE, LOAD_SHED_DEGRADE_SIZE)
+    
+    try:
+        ingress.acquire(ticket)
+        mark_stage("queue")
+    except Overloaded:
+        if resolution is not None:
+            resolution.end(None)
+        raise
+    
+    return ticket, active_model, imgsz
+
+def run_inference(image, start_time, station=None, actuate=True):
     """
     Run YOLOv8 inference dan kirim hasil ke ESP32
+    station = ID station asal image (default STATION_ID)
+    actuate = False: command tidak dikirim (dikirim oleh gateway, lihat gateway.py)
+    
+    Raises:
+        Overloaded jika ditolak / dibuang oleh ingress queue
     """
-    with processing_lock:
-        print("\n🤖 Running YOLOv8 inference...")
-        
-        # Run YOLOv8
-        results = model(image, conf=CONFIDENCE_THRESHOLD, verbose=False)
-        
-        # Get detections
-        detections = results[0].boxes
-        
-        if len(detections) == 0:
-            print("   ⚠️  No objects detected")
-            return {
-                'status': 'no_detection',
-                'message': 'No waste detected',
-                'class': -1
-            }
-        
-        # Ambil detection dengan confidence tertinggi
-        best_idx = detections.conf.argmax()
-        predicted_class = int(detections.cls[best_idx])
-        confidence = float(detections.conf[best_idx])
-        
-        class_name = CLASS_NAMES.get(predicted_class, "unknown")
-        
-        print(f"   ✅ Detection:")
-        print(f"      Class: {predicted_class} ({class_name.upper()})")
-        print(f"      Confidence: {confidence:.2%}")
-        
-        # Draw bounding box
-        annotated_image = draw_results(image, results[0])
-        
-        # Save image
-        if SAVE_IMAGES:
-            save_detection_image(annotated_image, predicted_class, confidence)
-        
-        # Display GUI
-        if SHOW_GUI:
-            display_gui(annotated_image, predicted_class, confidence)
+    ticket, active_model, imgsz = acquire_model()
+    
+    try:
+        log.debug("🤖 Running YOLOv8 inference..." + (" (degraded)" if ticket.degraded else ""),
+                  extra=sampled("inference"))
         
-        # Send to ESP32
-        success, comm_method = send_to_esp32(predicted_class)
+        # ROI crop → cascade → detector (detector_ms None jika dilewati cascade)
+        detector_ms = None
+        try:
+            # Saat degraded (overload) TTA dilewati
+            frame_result = classify_frame(active_model, image, platform_roi, cascade, imgsz,
+                                          tta=None if ticket.degraded else tta)
+            detector_ms = frame_result['detector_ms']
+        finally:
+            if resolution is not None:
+                # Latency jalur degrade tidak mewakili model/size normal
+                resolution.end(None if ticket.degraded else detector_ms)
         
-        # Calculate latency
-        latency_ms = (time.time() - start_time) * 1000
+        mark_stage("inference")
         
-        # Update stats
-        update_stats(predicted_class, latency_ms)
+        return process_frame_result(image, frame_result, start_time, station, actuate, ticket.degraded)
+    finally:
+        ingress.release()
+
+def run_inference_batch(images, start_time, station=None, actuate=False):
+    """
+    Inference beberapa image sebagai 1 batch model (lihat upload_batch.py)
+    images = list image BGR, None = gagal decode (slot hasil error)
+    actuate = True: command dikirim per item (default tidak, frame backlog)
+    
+    Returns:
+        list hasil per image, urutan sama dengan images
+    
+    Raises:
+        Overloaded jika ditolak / dibuang oleh ingress queue (1 slot untuk 1 batch)
+    """
+    ticket, active_model, imgsz = acquire_model()
+    
+    try:
+        valid = [image for image in images if image is not None]
+        log.debug(f"🤖 Running YOLOv8 batch inference ({len(valid)} image)..."
+                  + (" (degraded)" if ticket.degraded else ""), extra=sampled("inference"))
         
-        # Log to CSV
-        log_to_csv(predicted_class, class_name, confidence, success, comm_method, latency_ms)
+        try:
+            # Variant ONNX fixed-shape: batch size 1, detector per frame
+            frame_results = classify_frames(active_model, valid, platform_roi, cascade, imgsz,
+                                            tta=None if ticket.degraded else tta,
+                                            batch=model_imgsz is None)
+        finally:
+            if resolution is not None:
+                # Latency batch tidak sebanding dengan latency 1 frame
+                resolution.end(None)
         
-        print(f"\n⏱️  Total latency: {latency_ms:.1f}ms")
-        print("=" * 70)
+        mark_stage("inference")
         
-        return {
-            'status': 'success',
-            'class': predicted_class,
-            'class_name': class_name,
-            'confidence': confidence,
-            'communication': comm_method,
-            'latency_ms': latency_ms
-        }
+        # Idempotency key outbox per item: <request id>.<index>
+        request_id = request_log.request_id
+        frame_results = iter(frame_results)
+        results = []
+        for index, image in enumerate(images):
+            if image is None:
+                results.append({'status': 'error', 'message': 'Failed to decode image', 'class': -1})
+                continue
+            results.append(process_frame_result(
+                image, next(frame_results), start_time, station, actuate, ticket.degraded,
+                event_id=f"{request_id}.{index}" if request_id else None
+            ))
+        return results
+    finally:
+        ingress.release()
 
-def draw_results(image, result):
+def process_frame_result(image, frame_result, start_time, station, actuate, degraded, event_id=None):
     """
-    Draw bounding boxes dan labels di image
+    Setelah model: cascade stats, active learning, annotate, aktuasi,
+    stats & logging untuk 1 frame (dipanggil selama slot model dipegang)
+    event_id = ID event untuk idempotency key outbox (default request ID)
     """
-    annotated = image.copy()
+    best = frame_result['best']
+    detection = frame_result['detection']  # None jika dijawab classifier
+    roi_offset = frame_result['roi_offset']
+    decision = frame_result['decision']
+    tta_result = frame_result['tta']
+    detector_ms = frame_result['detector_ms']
     
-    for box in result.boxes:
-        # Get box coordinates
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-        cls = int(box.cls[0])
-        conf = float(box.conf[0])
-        
-        # Get color
-        color = CLASS_COLORS.get(cls, (255, 255, 255))
-        
-        # Draw box
-        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 3)
+    if decision is not None:
+        final_class, final_conf = (best[0], best[1]) if best else (-1, 0.0)
+        cascade.record(decision, final_class, final_conf, detector_ms or 0.0)
+    
+    if best is None:
+        if sample_selector is not None:
+            sample_selector.offer(image, extract_detections(None), station or STATION_ID)
+        log.info("⚠️  No objects detected", extra=sampled("detection", stages_ms=request_log.stages()))
+        return {
+            'status': 'no_detection',
+            'message': 'No waste detected',
+            'class': -1
+        }
+    
+    # Ambil detection dengan confidence tertinggi
+    predicted_class, confidence, best_idx = best
+    
+    class_name = CLASS_NAMES.get(predicted_class, "unknown")
+    
+    # Box dalam koordinat full-frame
+    bbox = None
+    if best_idx is not None:
+        if tta_result is not None:
+            xyxy = tta_result['detections'][best_idx:best_idx + 1, :4]
+        else:
+            xyxy = detection.boxes.xyxy[best_idx:best_idx + 1].cpu().numpy()
+        bbox = [int(v) for v in offset_boxes(xyxy, roi_offset)[0]]
+    
+    # Annotation hanya jika ada consumer (save / viewer preview)
+    preview_active = preview is not None and preview.active
+    if SAVE_IMAGES or preview_active or sample_selector is not None:
+        detections = frame_detections(frame_result)
         
-        # Draw label
-        label = f"{CLASS_NAMES.get(cls, 'unknown').upper()} {conf:.2%}"
+        # Frame tidak pasti → pool active learning (jawaban classifier cascade
+        # sudah confident, tidak dinilai)
+        if sample_selector is not None and detection is not None:
+            sample_selector.offer(image, detections, station or STATION_ID)
         
-        # Background untuk text
-        (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-        cv2.rectangle(annotated, (x1, y1 - h - 10), (x1 + w, y1), color, -1)
+        # Save image (canvas dari pool, kembali setelah imwrite)
+        if SAVE_IMAGES:
+            width = SAVE_IMAGE_WIDTH or None
+            if buffer_pool is not None:
+                with buffer_pool.borrow(canvas_shape(image.shape, width)) as canvas:
+                    annotated_image = draw_results(image, detections, width, canvas)
+                    save_detection_image(annotated_image, predicted_class, confidence)
+            else:
+                annotated_image = draw_results(image, detections, width)
+                save_detection_image(annotated_image, predicted_class, confidence)
         
-        # Text
-        cv2.putText(annotated, label, (x1, y1 - 5), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        # Live preview (annotate & encode di thread preview, bukan di sini)
+        if preview_active:
+            display_gui(image, predicted_class, confidence, detections)
+    
+    mark_stage("annotate")
     
-    return annotated
+    # Send to ESP32 (lewat outbox: dicatat dulu, dicoba ulang jika gagal)
+    request_id = event_id or request_log.request_id
+    if not actuate:
+        success, comm_method = False, "deferred"
+    elif outbox is not None:
+        success, comm_method = outbox.submit(
+            "actuation",
+            {'class': predicted_class, 'confidence': confidence, 'station': station or STATION_ID},
+            key=f"{request_id}:actuation" if request_id else None,
+            stream=station or STATION_ID
+        )
+    else:
+        success, comm_method = send_to_esp32(predicted_class, confidence, station or STATION_ID)
+    mark_stage("actuation")
+    
+    # Calculate latency
+    latency_ms = (time.time() - start_time) * 1000
+    
+    # Update stats
+    update_stats(predicted_class, latency_ms)
+    
+    # Log ke CSV & history DB (event outbox: tidak hilang jika crash di sini)
+    event = {
+        'ts': time.time(),
+        'class': predicted_class,
+        'class_name': class_name,
+        'confidence': confidence,
+        'success': success,
+        'communication': comm_method,
+        'latency_ms': latency_ms,
+        'station': station or STATION_ID
+    }
+    if outbox is not None:
+        outbox.submit("detection", event, key=f"{request_id}:detection" if request_id else None)
+    else:
+        record_detection(None, event)
+    
+    mark_stage("logging")
+    
+    # 1 record ringkasan per request (hot path, di-sample per LOG_SAMPLE_EVERY)
+    log.info(
+        f"✅ {class_name.upper()} {confidence:.2%} via {comm_method} | {latency_ms:.1f}ms",
+        extra=sampled(
+            "detection",
+            class_id=predicted_class,
+            class_name=class_name,
+            confidence=round(confidence, 4),
+            bbox=bbox,
+            communication=comm_method,
+            delivered=success,
+            degraded=degraded,
+            tta=tta_result is not None,
+            latency_ms=round(latency_ms, 1),
+            stages_ms=request_log.stages()
+        )
+    )
+    
+    return {
+        'status': 'success',
+        'class': predicted_class,
+        'class_name': class_name,
+        'confidence': confidence,
+        'bbox': bbox,
+        'communication': comm_method,
+        'latency_ms': latency_ms,
+        'degraded': degraded
+    }
+
+def frame_detections(frame_result):
+    """
+    Semua box hasil classify_frame (N x 6, koordinat full-frame);
+    hasil fusi TTA jika TTA dijalankan
+    """
+    tta_result = frame_result['tta']
+    if tta_result is not None:
+        detections = tta_result['detections'].copy()
+        detections[:, :4] = offset_boxes(detections[:, :4], frame_result['roi_offset'])
+        return detections
+    
+    detection = frame_result['detection']
+    return extract_detections(
+        detection.boxes if detection is not None else None, frame_result['roi_offset']
+    )
+
+def mark_stage(stage):
+    """
+    Tandai akhir stage request: profiler (jika aktif) + stage timing log
+    """
+    profiler.mark(stage)
+    request_log.mark(stage)
+
+def draw_results(image, detections, width=None, out=None):
+    """
+    Draw bounding boxes dan labels di image baru
+    detections = output extract_detections (koordinat full-frame)
+    width = downscale output (None = resolusi asli)
+    out = buffer tujuan (shape canvas_shape(image.shape, width)), opsional
+    """
+    roi_box = platform_roi.pixels(image.shape) if platform_roi is not None else None
+    return renderer.render(image, detections, width=width, roi_box=roi_box, out=out)
 
 def save_detection_image(image, predicted_class, confidence):
     """
@@ -454,87 +1454,124 @@ def save_detection_image(image, predicted_class, confidence):
     filepath = os.path.join(IMAGE_SAVE_DIR, filename)
     
     cv2.imwrite(filepath, image)
-    print(f"   💾 Image saved: {filename}")
+    log.debug(f"💾 Image saved: {filename}", extra=sampled("save_image"))
 
-def display_gui(image, predicted_class, confidence):
+def display_gui(image, predicted_class, confidence, detections):
     """
-    Display GUI dengan detection results
+    Publish detection results ke live preview /preview
+    Annotate (di lebar preview), info text & JPEG encode dilakukan thread
+    preview (rate-limited), jadi tidak memblokir inference dan aman di
+    server headless
     """
-    # Resize untuk display
-    h, w = image.shape[:2]
-    if w > 1280:
-        scale = 1280 / w
-        image = cv2.resize(image, None, fx=scale, fy=scale)
-    
-    # Add info text
     class_name = CLASS_NAMES.get(predicted_class, "unknown")
     info = f"CLASS: {class_name.upper()} | CONF: {confidence:.2%} | FPS: {stats['fps']:.1f}"
     
-    cv2.putText(image, info, (10, 30), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-    
-    # Show
-    cv2.imshow("Sistem Pemilah Sampah - Detection", image)
-    cv2.waitKey(1)
+    preview.publish(image, info, annotate=lambda img, width, out: draw_results(img, detections, width, out))
+
+def deliver_actuation(key, command):
+    """
+    Handler outbox "actuation" (kirim langsung & kirim ulang)
+    """
+    return send_to_esp32(command['class'], command['confidence'], command['station'], key)
+
+def record_detection(key, event):
+    """
+    Handler outbox "detection": CSV + history DB
+
+    event_key history diturunkan dari isi baris CSV (bukan key outbox), jadi
+    replay outbox & import CSV yang sama (detection_store.py import) tidak dobel
+    """
+    log_to_csv(event['class'], event['class_name'], event['confidence'], event['success'],
+               event['communication'], event['latency_ms'], event['ts'])
+    if history is not None:
+        timestamp = datetime.fromtimestamp(event['ts']).isoformat()
+        history.insert(event['class'], event['class_name'], event['confidence'], event['success'],
+                       event['communication'], event['latency_ms'], event['station'], ts=event['ts'],
+                       event_key=event_key(timestamp, event['class'], event['confidence'], event['station']))
+    return True, None
 
-def send_to_esp32(predicted_class):
+def send_to_esp32(predicted_class, confidence=0.0, station=None, command_id=None):
     """
     Kirim hasil klasifikasi ke ESP32 Main
-    Primary: WiFi (HTTP)
+    Primary: WiFi (HTTP, atau binary protocol jika ACTUATION_PROTOCOL binary_*)
     Fallback: Serial
+    command_id = idempotency key outbox (ikut di JSON HTTP sebagai "id" untuk
+    tracing; firmware tidak dedup, retry = at-least-once)
     """
-    print("\n📤 Sending result to ESP32...")
+    log.debug("📤 Sending result to ESP32...", extra=sampled("actuation"))
     
     # Try WiFi first
-    success, method = send_via_wifi(predicted_class)
+    if actuation_client is not None:
+        success, method = send_via_binary(predicted_class, confidence, station)
+    else:
+        success, method = send_via_wifi(predicted_class, command_id)
     
     if success:
         return True, method
     
     # Fallback ke Serial
-    print("   ⚠️  WiFi failed, trying Serial...")
+    log.warning("⚠️  WiFi failed, trying Serial...")
     success, method = send_via_serial(predicted_class)
     
     return success, method
 
-def send_via_wifi(predicted_class):
+def send_via_wifi(predicted_class, command_id=None):
     """
     Kirim via WiFi (HTTP POST)
     """
     try:
         url = f"http://{ESP32_MAIN_IP}:{ESP32_MAIN_PORT}/classify"
         payload = {'class': predicted_class}
+        if command_id:
+            payload['id'] = command_id
         
-        response = requests.post(url, json=payload, timeout=5)
+        response = requests.post(url, json=payload, timeout=config_store.current.ACTUATION_HTTP_TIMEOUT)
         
         if response.status_code == 200:
-            print(f"   ✅ Sent via WiFi to {ESP32_MAIN_IP}")
+            log.debug(f"✅ Sent via WiFi to {ESP32_MAIN_IP}", extra=sampled("actuation"))
             return True, "WiFi"
         else:
-            print(f"   ❌ WiFi failed: {response.status_code}")
+            log.warning(f"❌ WiFi failed: {response.status_code}")
             return False, "WiFi"
             
     except Exception as e:
-        print(f"   ❌ WiFi error: {e}")
+        log.warning(f"❌ WiFi error: {e}")
         return False, "WiFi"
 
+def send_via_binary(predicted_class, confidence, station):
+    """
+    Kirim via binary wire protocol (UDP/TCP), tunggu ACK dengan seq sama
+    """
+    try:
+        ack = actuation_client.send_command(station or STATION_ID, predicted_class, confidence)
+    except OSError as e:
+        log.warning(f"❌ Binary actuation error: {e}")
+        return False, "WiFi-Binary"
+    
+    if ack is None:
+        log.warning(f"❌ Binary actuation: ACK timeout ({ESP32_MAIN_IP}:{ESP32_BINARY_PORT})")
+        return False, "WiFi-Binary"
+    if ack['status'] != "ok":
+        log.warning(f"⚠️  ESP32 ACK seq {ack['seq']}: {ack['status']}")
+    
+    log.debug(f"✅ Sent via binary to {ESP32_MAIN_IP} (seq {ack['seq']})", extra=sampled("actuation"))
+    return ack['status'] == "ok", "WiFi-Binary"
+
 def send_via_serial(predicted_class):
     """
     Kirim via Serial (fallback)
     """
-    if ser is None:
-        print("   ❌ Serial not available")
+    if serial_manager is None or serial_manager.get("main") is None:
+        log.error("❌ Serial not available")
         return False, "Serial"
     
-    try:
-        message = f"{predicted_class}\n"
-        ser.write(message.encode())
-        print(f"   ✅ Sent via Serial: {predicted_class}")
+    # Write error → link down, watcher serial_manager reconnect di background
+    if serial_manager.write(f"{predicted_class}\n", role="main"):
+        log.debug(f"✅ Sent via Serial: {predicted_class}", extra=sampled("actuation"))
         return True, "Serial"
-        
-    except Exception as e:
-        print(f"   ❌ Serial error: {e}")
-        return False, "Serial"
+    
+    log.error("❌ Serial error: write gagal, menunggu reconnect")
+    return False, "Serial"
 
 def update_stats(predicted_class, latency_ms):
     """
@@ -564,16 +1601,17 @@ def update_stats(predicted_class, latency_ms):
     else:
         stats['avg_latency'] = (stats['avg_latency'] * (stats['total_processed'] - 1) + latency_ms) / stats['total_processed']
 
-def log_to_csv(predicted_class, class_name, confidence, success, comm_method, latency_ms):
+def log_to_csv(predicted_class, class_name, confidence, success, comm_method, latency_ms, ts=None):
     """
     Log hasil ke CSV file
     """
     csv_path = os.path.join(LOG_DIR, LOG_FILE)
+    timestamp = datetime.fromtimestamp(ts) if ts is not None else datetime.now()
     
     with open(csv_path, 'a', newline='') as f:
         writer = csv.writer(f)
         writer.writerow([
-            datetime.now().isoformat(),
+            timestamp.isoformat(),
             predicted_class,
             class_name,
             f"{confidence:.4f}",
@@ -594,11 +1632,20 @@ if __name__ == '__main__':
             host='0.0.0.0',
             port=LAPTOP_PORT,
             debug=DEBUG_MODE,
+            # Reloader menjalankan ulang script di child process: model
+            # di-load 2x dan serial port dibuka 2x
+            use_reloader=False,
             threaded=True
         )
     except KeyboardInterrupt:
-        print("\n\n🛑 Server stopped by user")
-        if ser is not None:
-            ser.close()
-        cv2.destroyAllWindows()
-        print("✅ Cleanup complete")
+        log.info("🛑 Server stopped by user")
+        if outbox is not None:
+            outbox.stop()
+        if serial_manager is not None:
+            serial_manager.close()
+        if cascade is not None:
+            cascade.close()
+        log.info("✅ Cleanup complete")
+    finally:
+        if logging_setup is not None:
+            logging_setup.stop()
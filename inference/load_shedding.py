@@ -0,0 +1,150 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - INGRESS QUEUE & LOAD SHEDDING
+Antrian masuk terbatas di depan model, dengan policy saat overload
+=============================================================================
+
+FITUR:
+✅ Antrian FIFO terbatas (ganti processing_lock yang antriannya tak terbatas)
+✅ Policy overload:
+   - reject      : request baru ditolak (HTTP 503 + Retry-After)
+   - drop_oldest : request terlama di antrian dibuang, yang baru masuk
+   - degrade     : request baru tetap masuk tapi pakai input size / model
+                   lebih kecil; di atas 2x kapasitas tetap ditolak
+✅ Counter load shedding (admitted, rejected, dropped, degraded) untuk /stats
+✅ Waktu tunggu antrian (rata-rata & max) dan peak antrian
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import time
+import threading
+from collections import deque
+
+POLICIES = ("reject", "drop_oldest", "degrade")
+
+class Overloaded(Exception):
+    """
+    Request tidak dilayani karena overload
+
+    reason = "rejected" (ditolak saat masuk) atau "dropped" (dibuang dari antrian)
+    """
+
+    def __init__(self, reason, retry_after_s):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after_s}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+class Ticket:
+    __slots__ = ("enqueued", "degraded", "dropped")
+
+    def __init__(self, degraded=False):
+        self.enqueued = time.perf_counter()
+        self.degraded = degraded
+        self.dropped = False
+
+class IngressQueue:
+    """
+    Slot processing tunggal + antrian tunggu FIFO berkapasitas max_pending
+
+    Pemakaian:
+        ticket = ingress.admit()          # bisa raise Overloaded
+        ingress.acquire(ticket)           # bisa raise Overloaded (dropped)
+        try:
+            ... inference ...
+        finally:
+            ingress.release()
+    """
+
+    def __init__(self, max_pending=4, policy="reject", retry_after_s=1):
+        if policy not in POLICIES:
+            raise ValueError(f"Policy harus salah satu dari {POLICIES}")
+
+        self.max_pending = max(1, int(max_pending))
+        self.policy = policy
+        self.retry_after_s = retry_after_s
+
+        self.cond = threading.Condition()
+        self.waiting = deque()
+        self.busy = False
+
+        self.counters = {'admitted': 0, 'rejected': 0, 'dropped': 0, 'degraded': 0}
+        self.peak_pending = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.served = 0
+
+    def admit(self):
+        """
+        Keputusan admission untuk request baru
+
+        Returns:
+            Ticket (ticket.degraded = True jika harus pakai jalur murah)
+        """
+        with self.cond:
+            pending = len(self.waiting)
+            degraded = False
+
+            if pending >= self.max_pending:
+                if self.policy == "reject":
+                    self.counters['rejected'] += 1
+                    raise Overloaded("rejected", self.retry_after_s)
+
+                if self.policy == "drop_oldest":
+                    oldest = self.waiting.popleft()
+                    oldest.dropped = True
+                    self.counters['dropped'] += 1
+                    self.cond.notify_all()
+
+                elif self.policy == "degrade":
+                    if pending >= self.max_pending * 2:
+                        self.counters['rejected'] += 1
+                        raise Overloaded("rejected", self.retry_after_s)
+                    degraded = True
+                    self.counters['degraded'] += 1
+
+            ticket = Ticket(degraded)
+            self.waiting.append(ticket)
+            self.counters['admitted'] += 1
+            self.peak_pending = max(self.peak_pending, len(self.waiting))
+            return ticket
+
+    def acquire(self, ticket):
+        """
+        Tunggu giliran (FIFO); raise Overloaded jika ticket dibuang saat antri
+        """
+        with self.cond:
+            while True:
+                if ticket.dropped:
+                    raise Overloaded("dropped", self.retry_after_s)
+                if not self.busy and self.waiting and self.waiting[0] is ticket:
+                    break
+                self.cond.wait()
+
+            self.waiting.popleft()
+            self.busy = True
+
+            wait_ms = (time.perf_counter() - ticket.enqueued) * 1000
+            self.served += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def release(self):
+        with self.cond:
+            self.busy = False
+            self.cond.notify_all()
+
+    def snapshot(self):
+        with self.cond:
+            return dict(
+                self.counters,
+                policy=self.policy,
+                max_pending=self.max_pending,
+                pending=len(self.waiting),
+                busy=self.busy,
+                peak_pending=self.peak_pending,
+                avg_wait_ms=self.total_wait_ms / self.served if self.served else 0.0,
+                max_wait_ms=self.max_wait_ms
+            )
@@ -0,0 +1,338 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - MODEL VARIANTS (FP32 / FP16 / INT8)
+Quantization & benchmark model untuk deployment CPU
+=============================================================================
+
+FITUR:
+✅ Export best.pt → ONNX FP32
+✅ Konversi ONNX FP16 (butuh onnxconverter-common)
+✅ Post-training INT8 quantization (onnxruntime, static QDQ)
+   dikalibrasi dengan folder captured images
+✅ Benchmark latency (p50/p95) & akurasi tiap variant di mesin ini
+✅ Tulis manifest JSON (models/variants.json)
+✅ Auto-select variant di server berdasarkan latency budget
+
+DEPENDENCIES (opsional, hanya untuk build variant):
+    pip install onnx onnxruntime onnxconverter-common
+
+CARA PAKAI:
+    python model_variants.py --calib captured_images --samples datasets/holdout
+
+    Lalu set MODEL_AUTO_SELECT = True dan MODEL_LATENCY_BUDGET_MS di config.py
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from pathlib import Path
+from datetime import datetime
+
+from inference_utils import (
+    predict_kwargs,
+    best_detection,
+    load_labelled_samples,
+    percentile,
+    NO_DETECTION_LABEL,
+    IMAGE_EXTENSIONS
+)
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    MODEL_PATH = "models/best.pt"
+    IMAGE_SIZE = 640
+    MODEL_VARIANT_MANIFEST = "models/variants.json"
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# ========== EXPORT ==========
+def export_fp32(model_path, imgsz, dynamic=False):
+    """
+    Export .pt ke ONNX FP32 (via ultralytics)
+    """
+    from ultralytics import YOLO
+
+    exported = YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True)
+    target = Path(model_path).with_name(Path(model_path).stem + "_fp32.onnx")
+    os.replace(exported, target)
+    return str(target)
+
+def convert_fp16(fp32_path):
+    """
+    Konversi ONNX FP32 → FP16 (input/output tetap float32)
+    """
+    import onnx
+    from onnxconverter_common import float16
+
+    model = onnx.load(fp32_path)
+    model_fp16 = float16.convert_float_to_float16(model, keep_io_types=True)
+    target = fp32_path.replace("_fp32.onnx", "_fp16.onnx")
+    onnx.save(model_fp16, target)
+    return target
+
+def letterbox(image, size, out=None):
+    """
+    Letterbox ke size x size (sama seperti preprocessing ultralytics)
+    out = buffer uint8 (size, size, 3) yang dipakai ulang (opsional)
+    """
+    import cv2
+    import numpy as np
+
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    resized = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+    if out is None:
+        canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    else:
+        canvas = out
+        canvas.fill(114)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    canvas[top:top + nh, left:left + nw] = resized
+    return canvas
+
+def list_images(folder, limit=None, seed=0):
+    """
+    List image di folder (rekursif), diacak deterministik
+    """
+    files = sorted(
+        str(p) for p in Path(folder).rglob("*")
+        if p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    random.Random(seed).shuffle(files)
+    return files[:limit] if limit else files
+
+class ImageFolderCalibrationReader:
+    """
+    CalibrationDataReader onnxruntime dari folder captured images
+    """
+
+    def __init__(self, input_name, files, imgsz):
+        self.input_name = input_name
+        self.files = iter(files)
+        self.imgsz = imgsz
+        self.canvas = None  # Buffer letterbox dipakai ulang antar image
+
+    def get_next(self):
+        import cv2
+        import numpy as np
+
+        for path in self.files:
+            image = cv2.imread(path, cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            if self.canvas is None:
+                self.canvas = np.empty((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+            # BGR → RGB, HWC → NCHW, 0-1
+            blob = letterbox(image, self.imgsz, self.canvas)[:, :, ::-1].transpose(2, 0, 1)
+            blob = np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+            return {self.input_name: blob}
+        return None
+
+def quantize_int8(fp32_path, calib_files, imgsz):
+    """
+    Post-training static INT8 quantization (QDQ, per-channel)
+    """
+    import onnxruntime
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+
+    session = onnxruntime.InferenceSession(fp32_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    del session
+
+    target = fp32_path.replace("_fp32.onnx", "_int8.onnx")
+    quantize_static(
+        fp32_path,
+        target,
+        ImageFolderCalibrationReader(input_name, calib_files, imgsz),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return target
+
+# ========== BENCHMARK ==========
+def benchmark_variant(path, bench_images, samples, imgsz, warmup=3):
+    """
+    Ukur latency (bench_images) dan akurasi (samples berlabel)
+    """
+    import cv2
+    from ultralytics import YOLO
+
+    model = YOLO(path, task='detect')
+    kwargs = predict_kwargs(imgsz=imgsz)
+    # ONNX di-run onnxruntime CPU; half tidak relevan
+    if path.endswith(".onnx"):
+        kwargs['half'] = False
+        kwargs['device'] = "cpu"
+
+    images = [img for img in (cv2.imread(p, cv2.IMREAD_COLOR) for p in bench_images) if img is not None]
+    for image in images[:warmup]:
+        model(image, **kwargs)
+
+    latencies = []
+    for image in images:
+        t0 = time.perf_counter()
+        model(image, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    accuracy = None
+    if samples:
+        correct = 0
+        for sample_path, label in samples:
+            image = cv2.imread(sample_path, cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            best = best_detection(model(image, **kwargs)[0].boxes)
+            predicted = NO_DETECTION_LABEL if best is None else best[0]
+            correct += int(predicted == label)
+        accuracy = correct / len(samples)
+
+    return {
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p95_ms': percentile(latencies, 95),
+        'accuracy': accuracy,
+        'n_latency': len(latencies)
+    }
+
+# ========== MANIFEST ==========
+def write_manifest(path, variants, imgsz, dynamic):
+    data = {
+        'created': datetime.now().isoformat(),
+        'host': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'imgsz': imgsz,
+        'dynamic': dynamic,
+        'variants': variants
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return data
+
+def load_manifest(path):
+    """
+    Load manifest variant (None jika belum ada / rusak)
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️  Manifest tidak valid: {e}")
+        return None
+
+def select_variant(manifest, latency_budget_ms, max_accuracy_drop=0.02):
+    """
+    Pilih variant untuk deployment
+
+    Kandidat: variant yang file-nya ada, p95 latency <= budget, dan akurasi
+    tidak turun lebih dari max_accuracy_drop dibanding variant terbaik.
+    Dari kandidat, ambil yang paling akurat (tie → paling cepat).
+    Jika tidak ada yang masuk budget, ambil yang paling cepat.
+    """
+    variants = [v for v in manifest.get('variants', []) if os.path.exists(v['path'])]
+    if not variants:
+        return None
+
+    accuracies = [v['accuracy'] for v in variants if v.get('accuracy') is not None]
+    best_accuracy = max(accuracies) if accuracies else None
+
+    def accurate_enough(v):
+        if best_accuracy is None or v.get('accuracy') is None:
+            return True
+        return v['accuracy'] >= best_accuracy - max_accuracy_drop
+
+    candidates = [
+        v for v in variants
+        if v['latency_p95_ms'] <= latency_budget_ms and accurate_enough(v)
+    ]
+    if not candidates:
+        return min(variants, key=lambda v: v['latency_p95_ms'])
+
+    return max(candidates, key=lambda v: (v.get('accuracy') or 0, -v['latency_p95_ms']))
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Build & benchmark FP32/FP16/INT8 model variants")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--calib', required=True, help="Folder captured images untuk kalibrasi INT8")
+    parser.add_argument('--calib-size', type=int, default=200, help="Jumlah image kalibrasi")
+    parser.add_argument('--samples', default=None, help="Folder dataset berlabel untuk akurasi")
+    parser.add_argument('--bench-size', type=int, default=50, help="Jumlah image untuk benchmark latency")
+    parser.add_argument('--imgsz', type=int, default=IMAGE_SIZE)
+    parser.add_argument('--dynamic', action='store_true', help="ONNX dynamic shape (untuk adaptive resolution)")
+    parser.add_argument('--precisions', nargs='+', default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument('--output', default=MODEL_VARIANT_MANIFEST)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("⚖️  MODEL VARIANTS - QUANTIZATION & BENCHMARK")
+    print("=" * 70)
+
+    calib_files = list_images(args.calib)
+    if not calib_files:
+        print(f"❌ Tidak ada image di {args.calib}")
+        sys.exit(1)
+    bench_images = calib_files[:args.bench_size]
+    samples = load_labelled_samples(args.samples) if args.samples else []
+    print(f"📂 {len(calib_files)} captured images, {len(samples)} labelled samples")
+
+    # Build variants
+    paths = {'pt': args.model}
+    print("\n🔧 Exporting variants...")
+    fp32_path = export_fp32(args.model, args.imgsz, args.dynamic)
+    if 'fp32' in args.precisions:
+        paths['fp32'] = fp32_path
+    print(f"   ✓ FP32: {fp32_path}")
+
+    if 'fp16' in args.precisions:
+        try:
+            paths['fp16'] = convert_fp16(fp32_path)
+            print(f"   ✓ FP16: {paths['fp16']}")
+        except ImportError as e:
+            print(f"   ⚠️  FP16 dilewati ({e}); install onnxconverter-common")
+
+    if 'int8' in args.precisions:
+        try:
+            paths['int8'] = quantize_int8(fp32_path, calib_files[:args.calib_size], args.imgsz)
+            print(f"   ✓ INT8: {paths['int8']} ({min(len(calib_files), args.calib_size)} calib images)")
+        except ImportError as e:
+            print(f"   ⚠️  INT8 dilewati ({e}); install onnxruntime")
+
+    # Benchmark
+    print("\n⏱️  Benchmarking on this machine...")
+    variants = []
+    for precision, path in paths.items():
+        result = benchmark_variant(path, bench_images, samples, args.imgsz)
+        variants.append({
+            'precision': precision,
+            'path': path,
+            'size_mb': os.path.getsize(path) / (1024 * 1024),
+            **result
+        })
+        acc = f"{result['accuracy']:.2%}" if result['accuracy'] is not None else "n/a"
+        print(f"   {precision:5} | p50 {result['latency_p50_ms']:7.1f}ms | "
+              f"p95 {result['latency_p95_ms']:7.1f}ms | acc {acc}")
+
+    write_manifest(args.output, variants, args.imgsz, args.dynamic)
+    print(f"\n💾 Manifest: {args.output}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - DURABLE OUTBOX
+Command aktuasi & event telemetry dicatat durable sebelum dikirim
+=============================================================================
+
+FITUR:
+✅ SQLite mode WAL (stdlib), 1 tabel append-only: payload tidak pernah
+   diubah, hanya state (pending → delivered / expired / superseded)
+✅ At-least-once: event di-commit dulu, baru dikirim. Gagal / crash di
+   tengah → dikirim ulang oleh dispatcher background (backoff eksponensial)
+✅ Idempotency key per event (default: X-Request-ID + jenis event):
+   append key yang sama diabaikan (dedup di sisi outbox, bukan receiver).
+   History DB idempotent (event_key unik); aktuasi at-least-once: firmware
+   ESP32 tidak dedup, kiriman ulang bisa menggerakkan servo 2x (dibatasi
+   TTL & latest only di bawah)
+✅ Command aktuasi punya TTL & "latest only" per station: command lama
+   tidak dikirim ulang setelah item berikutnya masuk platform
+✅ Replay cepat saat restart: pending dibaca & ditandai per batch
+   (1 transaksi per batch)
+✅ Statistik + benchmark overhead (CLI bench)
+
+KENAPA:
+Sebelumnya jika ESP32 tidak terjangkau & serial tidak ada (atau server
+crash di antara inference dan send_to_esp32), hasil klasifikasi hilang:
+CSV hanya mencatat success=False dan tidak ada yang mencoba ulang.
+
+CARA PAKAI:
+    # Ringkasan outbox (pending per jenis, umur pending tertua)
+    python outbox.py stats --db logs/outbox.db
+
+    # Benchmark overhead per request & kecepatan replay
+    python outbox.py bench --events 5000
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import logging
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    OUTBOX_DB_PATH = "logs/outbox.db"
+
+SYNC_MODES = ("NORMAL", "FULL")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    key          TEXT    NOT NULL UNIQUE,
+    kind         TEXT    NOT NULL,
+    stream       TEXT,
+    payload      TEXT    NOT NULL,
+    created      REAL    NOT NULL,
+    expires      REAL,
+    state        TEXT    NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL    NOT NULL,
+    updated      REAL,
+    last_error   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (next_attempt) WHERE state = 'pending';
+CREATE INDEX IF NOT EXISTS idx_outbox_done ON outbox (updated) WHERE state != 'pending';
+"""
+
+log = logging.getLogger("outbox")
+
+class Outbox:
+    """
+    ok, info = outbox.submit(kind, payload, key, stream)
+    → event di-commit, handler(key, payload) dipanggil langsung; jika gagal
+    event tetap pending & dicoba ulang dispatcher
+
+    handler(key, payload) → (ok, info), sama seperti send_to_esp32
+    """
+
+    def __init__(self, path, retry_base_s=1.0, retry_max_s=30.0, batch_size=500,
+                 retention_s=86400, sync="NORMAL", poll_interval=0.5):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"OUTBOX_SYNC harus salah satu dari {SYNC_MODES}")
+        self.path = path
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.batch_size = batch_size
+        self.retention_s = retention_s
+        self.poll_interval = poll_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL: aman terhadap crash proses; FULL: juga terhadap mati listrik
+        self.conn.execute(f"PRAGMA synchronous={sync}")
+        self.conn.executescript(SCHEMA)
+
+        self.handlers = {}  # kind → (handler, ttl_s, latest_only)
+        self.inflight = set()  # seq yang sedang dikirim langsung (dilewati dispatcher)
+        self.append_ms = []
+        self.counters = {'appended': 0, 'duplicates': 0, 'delivered': 0, 'redelivered': 0,
+                         'failed_attempts': 0, 'expired': 0, 'superseded': 0, 'replayed': 0}
+
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_compact = 0.0
+
+    def register(self, kind, handler, ttl_s=None, latest_only=False):
+        """
+        ttl_s: event lebih tua dari ini tidak dikirim lagi (expired)
+        latest_only: event baru → event pending lebih lama di stream yang
+                     sama (station) tidak dikirim lagi (superseded)
+        """
+        self.handlers[kind] = (handler, ttl_s, latest_only)
+
+    # ---- append ----
+    def append(self, kind, payload, key=None, stream=None, now=None):
+        """
+        Catat 1 event (1 transaksi)
+
+        Returns:
+            (seq, created); created False jika key sudah ada
+        """
+        now = time.time() if now is None else now
+        key = key or uuid.uuid4().hex
+        _, ttl_s, latest_only = self.handlers.get(kind, (None, None, False))
+        expires = now + ttl_s if ttl_s else None
+
+        t0 = time.perf_counter()
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO outbox (key, kind, stream, payload, created, expires, next_attempt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, stream, json.dumps(payload), now, expires, now + self.retry_base_s)
+            )
+            created = cursor.rowcount == 1
+            if created:
+                seq = cursor.lastrowid
+                self.counters['appended'] += 1
+                if latest_only and stream is not None:
+                    # Item baru di station yang sama: command lama sudah tidak relevan
+                    superseded = self.conn.execute(
+                        "UPDATE outbox SET state = 'superseded', updated = ? "
+                        "WHERE kind = ? AND stream = ? AND seq < ? AND state = 'pending'",
+                        (now, kind, stream, seq))
+                    self.counters['superseded'] += superseded.rowcount
+            else:
+                seq = self.conn.execute("SELECT seq FROM outbox WHERE key = ?", (key,)).fetchone()[0]
+                self.counters['duplicates'] += 1
+            self._observe_append((time.perf_counter() - t0) * 1000)
+        return seq, created
+
+    def _observe_append(self, ms):
+        # Dipanggil dengan lock
+        self.append_ms.append(ms)
+        if len(self.append_ms) > 1000:
+            del self.append_ms[:-1000]
+
+    def submit(self, kind, payload, key=None, stream=None):
+        """
+        Append + kirim langsung
+
+        Returns:
+            (ok, info) dari handler; key duplikat → (sudah terkirim?, "duplicate")
+        """
+        key = key or uuid.uuid4().hex
+        seq, created = self.append(kind, payload, key, stream)
+        if not created:
+            with self.lock:
+                row = self.conn.execute("SELECT state FROM outbox WHERE seq = ?", (seq,)).fetchone()
+            return row[0] == 'delivered', "duplicate"
+
+        with self.lock:
+            self.inflight.add(seq)
+        try:
+            ok, info, error = self._call(kind, key, payload)
+            self._complete([(seq, ok, error, 0)])
+        finally:
+            with self.lock:
+                self.inflight.discard(seq)
+        if not ok:
+            self.wake.set()
+        return ok, info
+
+    def _call(self, kind, key, payload):
+        handler = self.handlers[kind][0]
+        try:
+            ok, info = handler(key, payload)
+            return bool(ok), info, None if ok else f"{info} gagal"
+        except Exception as e:
+            log.warning(f"⚠️  Outbox handler {kind} error: {e}")
+            return False, None, str(e)
+
+    def _complete(self, results, now=None):
+        """
+        Tandai hasil pengiriman (1 transaksi untuk semua results)
+
+        results: [(seq, ok, error, attempts sebelumnya)]
+        """
+        now = time.time() if now is None else now
+        delivered, failed = [], []
+        for seq, ok, error, attempts in results:
+            if ok:
+                delivered.append((now, seq))
+            else:
+                backoff = min(self.retry_max_s, self.retry_base_s * 2 ** attempts)
+                failed.append((now + backoff, now, error, seq))
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE outbox SET state = 'delivered', attempts = attempts + 1, updated = ? "
+                "WHERE seq = ? AND state = 'pending'", delivered)
+            self.conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, updated = ?, last_error = ? "
+                "WHERE seq = ? AND state = 'pending'", failed)
+            self.counters['delivered'] += len(delivered)
+            self.counters['failed_attempts'] += len(failed)
+
+    # ---- retry / replay ----
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE outbox SET state = 'expired', updated = ? "
+                "WHERE state = 'pending' AND expires IS NOT NULL AND expires < ?", (now, now))
+            self.counters['expired'] += cursor.rowcount
+        return cursor.rowcount
+
+    def _fetch(self, where, params):
+        # Kind tanpa handler difilter di SQL: row lama dari kind yang tidak
+        # lagi di-register tidak memenuhi batch & menahan row di belakangnya
+        kinds = tuple(self.handlers)
+        if not kinds:
+            return [], []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, key, kind, payload, attempts FROM outbox "
+                f"WHERE state = 'pending' AND kind IN ({', '.join('?' * len(kinds))}) AND {where} "
+                "ORDER BY seq LIMIT ?",
+                kinds + params + (self.batch_size,)).fetchall()
+            return rows, [r for r in rows if r[0] not in self.inflight]
+
+    def _deliver(self, rows):
+        """
+        Kirim ulang rows, hasil ditandai dalam 1 transaksi
+
+        Returns:
+            jumlah terkirim
+        """
+        results = []
+        for seq, key, kind, payload, attempts in rows:
+            ok, _, error = self._call(kind, key, json.loads(payload))
+            results.append((seq, ok, error, attempts))
+            if ok:
+                log.info(f"📬 Outbox: {kind} {key} terkirim ulang (percobaan ke-{attempts + 1})")
+
+        delivered = sum(1 for r in results if r[1])
+        if results:
+            self._complete(results)
+            with self.lock:
+                self.counters['redelivered'] += delivered
+        return delivered
+
+    def dispatch(self, now=None):
+        """
+        Kirim ulang 1 batch event pending yang sudah waktunya (urut seq)
+
+        Returns:
+            jumlah row yang dikirim / dijadwal ulang (batch penuh = mungkin
+            masih ada sisa). Row inflight / kind tanpa handler tidak dihitung:
+            state-nya tidak berubah, jadi menghitungnya membuat loop _run
+            tidak pernah selesai
+        """
+        now = time.time() if now is None else now
+        _, rows = self._fetch("next_attempt <= ?", (now,))
+        self._deliver(rows)
+        return len(rows)
+
+    def replay(self):
+        """
+        Saat start: buang event kadaluarsa lalu coba semua pending sekali,
+        per batch (tanpa menunggu backoff)
+
+        Returns:
+            (jumlah dicoba, jumlah terkirim)
+        """
+        self.expire()
+        attempted = delivered = 0
+        last_seq = 0
+        while True:
+            fetched, rows = self._fetch("seq > ?", (last_seq,))
+            if not fetched:
+                break
+            last_seq = fetched[-1][0]
+            attempted += len(rows)
+            delivered += self._deliver(rows)
+
+        with self.lock:
+            self.counters['replayed'] += delivered
+        return attempted, delivered
+
+    def compact(self, now=None):
+        """
+        Hapus event selesai yang lebih tua dari retention
+        """
+        now = time.time() if now is None else now
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM outbox WHERE state != 'pending' AND updated < ?", (now - self.retention_s,))
+        self.last_compact = now
+        return cursor.rowcount
+
+    def start(self):
+        """
+        Replay pending lalu jalankan dispatcher background
+        """
+        attempted, delivered = self.replay()
+        if attempted:
+            log.info(f"📬 Outbox replay: {delivered}/{attempted} event terkirim")
+        self.thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self.thread.start()
+        return attempted, delivered
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake.wait(self.poll_interval)
+            self.wake.clear()
+            try:
+                self.expire()
+                while self.dispatch() >= self.batch_size:
+                    pass
+                if time.time() - self.last_compact > 3600:
+                    self.compact()
+            except sqlite3.Error as e:
+                log.error(f"❌ Outbox dispatcher error: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        with self.lock:
+            self.conn.close()
+
+    def snapshot(self):
+        """
+        Statistik outbox untuk endpoint /stats
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT kind, COUNT(*), MIN(created) FROM outbox WHERE state = 'pending' GROUP BY kind"
+            ).fetchall()
+            ordered = sorted(self.append_ms)
+
+            def pct(p):
+                if not ordered:
+                    return 0.0
+                return round(ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)], 3)
+
+            return dict(
+                self.counters,
+                pending={kind: count for kind, count, _ in rows},
+                oldest_pending_s=round(now - min(r[2] for r in rows), 1) if rows else 0.0,
+                append_p50_ms=pct(50),
+                append_p99_ms=pct(99)
+            )
+
+# ========== BENCHMARK ==========
+def benchmark(events, sync="NORMAL"):
+    """
+    Overhead outbox per request (append + tandai actuation & detection,
+    handler no-op) dan kecepatan replay setelah restart
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        outbox = Outbox(path, sync=sync, batch_size=500)
+        outbox.register("actuation", lambda key, payload: (True, "bench"), ttl_s=60, latest_only=True)
+        outbox.register("detection", lambda key, payload: (True, None))
+
+        payload = {'class': 1, 'confidence': 0.91, 'station': "station-1"}
+        per_request = []
+        start = time.perf_counter()
+        for i in range(events):
+            t0 = time.perf_counter()
+            outbox.submit("actuation", payload, f"r{i}:actuation", "station-1")
+            outbox.submit("detection", dict(payload, latency_ms=42.0), f"r{i}:detection")
+            per_request.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+
+        # Replay: event ditulis saat receiver mati, lalu "restart"
+        outbox.register("detection", lambda key, payload: (False, "down"))
+        for i in range(events):
+            outbox.submit("detection", payload, f"p{i}:detection")
+        outbox.stop()
+
+        restarted = Outbox(path, sync=sync, batch_size=500)
+        restarted.register("detection", lambda key, payload: (True, None))
+        t0 = time.perf_counter()
+        _, replayed = restarted.replay()
+        replay_s = time.perf_counter() - t0
+        restarted.conn.close()
+
+    per_request.sort()
+    return {
+        'requests': events,
+        'requests_per_s': events / elapsed,
+        'overhead_p50_ms': per_request[len(per_request) // 2],
+        'overhead_p99_ms': per_request[min(len(per_request) - 1, int(len(per_request) * 0.99))],
+        'replayed': replayed,
+        'replay_events_per_s': replayed / replay_s if replay_s > 0 else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable outbox: stats / benchmark")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    stats = sub.add_parser('stats', help="Ringkasan outbox")
+    stats.add_argument('--db', default=OUTBOX_DB_PATH)
+
+    bench = sub.add_parser('bench', help="Benchmark overhead & replay")
+    bench.add_argument('--events', type=int, default=5000)
+    bench.add_argument('--sync', choices=SYNC_MODES, default="NORMAL")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        outbox = Outbox(args.db)
+        s = outbox.snapshot()
+        print(f"📬 Pending: {s['pending'] or 0} | tertua {s['oldest_pending_s']}s")
+        with outbox.lock:
+            for state, count in outbox.conn.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state"):
+                print(f"   {state:11} {count}")
+        outbox.conn.close()
+        return
+
+    r = benchmark(args.events, args.sync)
+    print(f"⏱️  Outbox (synchronous={args.sync}), {r['requests']} request (2 event / request):")
+    print(f"   Overhead per request : p50 {r['overhead_p50_ms']:.3f} ms | p99 {r['overhead_p99_ms']:.3f} ms")
+    print(f"   Throughput           : {r['requests_per_s']:.0f} request/s")
+    print(f"   Replay restart       : {r['replayed']} event, {r['replay_events_per_s']:.0f} event/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - PLATFORM ROI CALIBRATION
+Kalibrasi region platform dari frame tray kosong, inference hanya di crop
+=============================================================================
+
+FITUR:
+✅ Kumpulkan CALIBRATION_SAMPLES frame tray kosong (CALIBRATION_MODE)
+✅ Median background → edge → contour terbesar = region platform
+✅ ROI disimpan dalam koordinat relatif (0-1), jadi berlaku untuk UXGA/SVGA
+✅ Crop frame ke ROI sebelum inference (resolusi efektif objek naik)
+✅ Mapping koordinat box kembali ke full-frame
+
+CARA PAKAI:
+1. Kosongkan tray, set CALIBRATION_MODE = True di config.py
+2. Jalankan server; upload CALIBRATION_SAMPLES frame dari ESP32-CAM
+3. ROI otomatis disimpan ke PLATFORM_ROI_PATH, server lanjut mode normal
+   Atau offline: python platform_roi.py --frames folder_tray_kosong
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    CALIBRATION_SAMPLES = 10
+    PLATFORM_ROI_PATH = "models/platform_roi.json"
+    PLATFORM_ROI_MARGIN = 0.05
+
+# ROI yang terlalu kecil dianggap gagal (noise / platform tidak terlihat)
+MIN_ROI_AREA_FRACTION = 0.05
+
+class PlatformROI:
+    """
+    Region platform dalam koordinat relatif (x0, y0, x1, y1) 0-1
+    """
+
+    def __init__(self, x0, y0, x1, y1):
+        self.box = (
+            max(0.0, min(x0, x1)),
+            max(0.0, min(y0, y1)),
+            min(1.0, max(x0, x1)),
+            min(1.0, max(y0, y1))
+        )
+
+    def pixels(self, shape):
+        """
+        ROI dalam pixel untuk frame dengan shape (h, w, ...)
+        """
+        h, w = shape[:2]
+        x0, y0, x1, y1 = self.box
+        return int(x0 * w), int(y0 * h), max(int(x0 * w) + 1, int(x1 * w)), max(int(y0 * h) + 1, int(y1 * h))
+
+    def crop(self, image):
+        """
+        Crop image ke ROI (view, tanpa copy)
+
+        Returns:
+            (crop, (offset_x, offset_y))
+        """
+        x0, y0, x1, y1 = self.pixels(image.shape)
+        return image[y0:y1, x0:x1], (x0, y0)
+
+    def to_dict(self):
+        return dict(zip(('x0', 'y0', 'x1', 'y1'), self.box))
+
+    def save(self, path, samples=0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(),
+                'samples': samples,
+                'roi': self.to_dict()
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load ROI dari JSON (None jika belum dikalibrasi)
+        """
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                roi = json.load(f)['roi']
+            return cls(roi['x0'], roi['y0'], roi['x1'], roi['y1'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   ⚠️  ROI tidak valid: {e}")
+            return None
+
+def offset_boxes(xyxy, offset):
+    """
+    Geser box (N x 4, koordinat crop) ke koordinat full-frame
+    """
+    dx, dy = offset
+    return xyxy + np.array([dx, dy, dx, dy], dtype=xyxy.dtype)
+
+def learn_roi(frames, margin=0.05):
+    """
+    Estimasi ROI platform dari beberapa frame tray kosong
+
+    Median frame menghilangkan noise & gerakan sesaat, lalu contour
+    terbesar dari edge map dianggap sebagai platform.
+    """
+    if not frames:
+        raise ValueError("Tidak ada frame kalibrasi")
+
+    # Samakan ukuran (ESP32-CAM bisa ganti framesize)
+    h, w = frames[0].shape[:2]
+    stack = np.stack([f if f.shape[:2] == (h, w) else cv2.resize(f, (w, h)) for f in frames])
+    background = np.median(stack, axis=0).astype(np.uint8)
+
+    gray = cv2.GaussianBlur(cv2.cvtColor(background, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+    edges = cv2.Canny(gray, 30, 100)
+    edges = cv2.dilate(edges, np.ones((5, 5), np.uint8), iterations=2)
+
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        raise ValueError("Platform tidak terdeteksi (tidak ada contour)")
+
+    x, y, cw, ch = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    if cw * ch < MIN_ROI_AREA_FRACTION * w * h:
+        raise ValueError("Platform tidak terdeteksi (region terlalu kecil)")
+
+    # Margin supaya objek di pinggir platform tidak terpotong
+    mx, my = margin * w, margin * h
+    return PlatformROI((x - mx) / w, (y - my) / h, (x + cw + mx) / w, (y + ch + my) / h)
+
+class ROICalibrator:
+    """
+    Kumpulkan frame tray kosong dari upload sampai cukup, lalu learn ROI
+    """
+
+    def __init__(self, samples, path, margin=0.05):
+        self.samples = samples
+        self.path = path
+        self.margin = margin
+        self.frames = []
+        self.lock = threading.Lock()
+
+    def add(self, image):
+        """
+        Tambah frame; return PlatformROI jika kalibrasi selesai, else None
+        """
+        with self.lock:
+            # Simpan versi kecil saja; ROI relatif jadi resolusi tidak penting
+            scale = min(1.0, 640 / image.shape[1])
+            self.frames.append(cv2.resize(image, None, fx=scale, fy=scale) if scale < 1.0 else image.copy())
+
+            if len(self.frames) < self.samples:
+                return None
+
+            frames, self.frames = self.frames, []
+
+        roi = learn_roi(frames, self.margin)
+        roi.save(self.path, samples=len(frames))
+        return roi
+
+    @property
+    def collected(self):
+        return len(self.frames)
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Kalibrasi ROI platform dari frame tray kosong")
+    parser.add_argument('--frames', required=True, help="Folder berisi frame tray kosong")
+    parser.add_argument('--limit', type=int, default=CALIBRATION_SAMPLES)
+    parser.add_argument('--margin', type=float, default=PLATFORM_ROI_MARGIN)
+    parser.add_argument('--output', default=PLATFORM_ROI_PATH)
+    parser.add_argument('--preview', default=None, help="Simpan preview ROI ke file ini")
+    args = parser.parse_args()
+
+    files = sorted(p for p in Path(args.frames).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    frames = [img for img in (cv2.imread(str(p)) for p in files[:args.limit]) if img is not None]
+    print(f"📂 {len(frames)} frame kalibrasi dari {args.frames}")
+
+    roi = learn_roi(frames, args.margin)
+    roi.save(args.output, samples=len(frames))
+    print(f"✅ ROI: {roi.to_dict()}")
+    print(f"💾 Disimpan: {args.output}")
+
+    if args.preview:
+        preview = frames[0].copy()
+        x0, y0, x1, y1 = roi.pixels(preview.shape)
+        cv2.rectangle(preview, (x0, y0), (x1, y1), (0, 255, 255), 2)
+        cv2.imwrite(args.preview, preview)
+        print(f"🖼️  Preview: {args.preview}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - LIVE PREVIEW STREAM
+Pengganti cv2.imshow: stream MJPEG frame ter-annotasi di /preview
+=============================================================================
+
+FITUR:
+✅ Jalan di server headless (tanpa window OpenCV)
+✅ Encode JPEG sekali per frame, dibagi ke semua viewer
+✅ Rate limit preview terpisah dari inference (PREVIEW_MAX_FPS)
+✅ Tidak ada viewer → frame tidak disimpan, tidak di-annotate & tidak di-encode
+✅ Canvas annotation dipinjam dari BufferPool (jika ada), bukan alokasi per frame
+
+CARA PAKAI:
+    Buka http://<laptop_ip>:5000/preview di browser
+    atau embed: <img src="/preview">
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from annotation_renderer import canvas_shape
+
+BOUNDARY = "frame"
+
+class PreviewBroadcaster:
+    """
+    Fan-out 1 encoder → banyak viewer MJPEG
+    """
+
+    def __init__(self, max_fps=5, width=1280, quality=70, pool=None):
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0
+        self.width = width
+        self.quality = quality
+        self.pool = pool
+
+        self.condition = threading.Condition()
+        self.viewers = 0
+        self.pending = None  # (image, info, annotate) terbaru yang belum di-encode
+        self.jpeg = None
+        self.placeholder = None  # JPEG "menunggu frame" sebelum frame pertama
+        self.seq = 0
+        self.encoded = 0
+        self.skipped = 0
+
+        self.thread = threading.Thread(target=self._encoder_loop, daemon=True)
+        self.thread.start()
+
+    @property
+    def active(self):
+        """
+        True jika ada viewer (caller bisa skip persiapan frame jika False)
+        """
+        return self.viewers > 0
+
+    def publish(self, image, info="", annotate=None):
+        """
+        Kirim frame ke preview (non-blocking, dipanggil dari jalur inference)
+
+        Image tidak di-copy; caller tidak boleh memodifikasi setelah publish.
+        annotate(image, width, out) → frame ter-annotasi di lebar preview
+        (ditulis ke out jika bukan None), dipanggil di thread preview hanya
+        untuk frame yang benar-benar di-encode.
+        """
+        if self.viewers == 0:
+            return
+
+        with self.condition:
+            if self.pending is not None:
+                self.skipped += 1
+            self.pending = (image, info, annotate)
+            self.condition.notify_all()
+
+    def _encoder_loop(self):
+        last_encode = 0
+        while True:
+            with self.condition:
+                while self.pending is None or self.viewers == 0:
+                    if self.viewers == 0:
+                        self.pending = None
+                    self.condition.wait()
+                # Rate limit: tunggu sisa interval, frame lebih baru menimpa pending
+                wait = self.min_interval - (time.time() - last_encode)
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+                image, info, annotate = self.pending
+                self.pending = None
+
+            jpeg = self._encode(image, info, annotate)
+            last_encode = time.time()
+            if jpeg is None:
+                continue
+
+            with self.condition:
+                self.jpeg = jpeg
+                self.seq += 1
+                self.encoded += 1
+                self.condition.notify_all()
+
+    def _encode(self, image, info, annotate=None):
+        if annotate is not None and self.pool is not None:
+            # Canvas cuma hidup sampai imencode selesai → langsung kembali ke pool
+            with self.pool.borrow(canvas_shape(image.shape, self.width)) as out:
+                return self._encode_frame(annotate(image, self.width, out), info)
+
+        h, w = image.shape[:2]
+        if annotate is not None:
+            image = annotate(image, self.width, None)
+        elif w > self.width:
+            scale = self.width / w
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        elif info:
+            image = image.copy()
+
+        return self._encode_frame(image, info)
+
+    def _encode_frame(self, image, info):
+        if info:
+            cv2.putText(image, info, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buffer.tobytes() if ok else None
+
+    def stream(self, keepalive_s=10):
+        """
+        Generator multipart MJPEG untuk 1 viewer
+        """
+        with self.condition:
+            self.viewers += 1
+            self.condition.notify_all()
+        last_seq = -1
+
+        try:
+            # Frame terakhir langsung dikirim supaya viewer baru tidak blank
+            while True:
+                with self.condition:
+                    if self.seq == last_seq:
+                        self.condition.wait(keepalive_s)
+                    jpeg, last_seq = self.jpeg, self.seq
+                if jpeg is None:
+                    # Belum ada frame: tetap yield supaya viewer yang putus
+                    # terdeteksi (GeneratorExit) dan viewers berkurang
+                    jpeg = self._placeholder()
+                yield (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                       f"Content-Length: {len(jpeg)}\r\n\r\n").encode() + jpeg + b"\r\n"
+        finally:
+            with self.condition:
+                self.viewers -= 1
+
+    def _placeholder(self):
+        if self.placeholder is None:
+            image = np.full((240, 320, 3), 32, dtype=np.uint8)
+            cv2.putText(image, "Menunggu frame...", (40, 125), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.7, (200, 200, 200), 2)
+            self.placeholder = self._encode_frame(image, "")
+        return self.placeholder
+
+    def snapshot(self):
+        return {
+            'viewers': self.viewers,
+            'encoded_frames': self.encoded,
+            'skipped_frames': self.skipped
+        }
@@ -0,0 +1,278 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - ADAPTIVE RESOLUTION TUNER
+Profiling ukuran input YOLOv8 dan auto-tuning resolusi saat runtime
+=============================================================================
+
+FITUR:
+✅ Profiling model di beberapa input size (320/416/512/640)
+✅ Ukur akurasi (policy argmax seperti server) & latency per size
+✅ Pilih size terkecil yang akurasinya masih dalam toleransi
+✅ Simpan hasil profiling ke JSON (dipakai server saat startup)
+✅ Runtime controller: turun resolusi saat load tinggi, naik lagi saat idle
+
+CARA PAKAI (profiling):
+    python resolution_tuner.py --samples datasets/holdout --sizes 320 416 512 640
+
+    Hasil disimpan di RESOLUTION_PROFILE_PATH (default models/resolution_profile.json)
+    Lalu set ADAPTIVE_RESOLUTION = True di config.py
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+
+from inference_utils import (
+    predict_kwargs,
+    best_detection,
+    load_labelled_samples,
+    percentile,
+    NO_DETECTION_LABEL
+)
+
+# Import config
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import *
+except ImportError:
+    MODEL_PATH = "models/best.pt"
+    IMAGE_SIZE = 640
+    ADAPTIVE_SIZES = [320, 416, 512, 640]
+    ADAPTIVE_ACCURACY_TOLERANCE = 0.02
+    RESOLUTION_PROFILE_PATH = "models/resolution_profile.json"
+
+# ========== PROFILING ==========
+def profile_sizes(model, samples, sizes, warmup=2):
+    """
+    Jalankan model pada semua sample untuk tiap input size
+
+    Returns:
+        List of dict {size, accuracy, latency_p50_ms, latency_p95_ms, n}
+    """
+    import cv2
+
+    # Decode sekali, dipakai ulang untuk semua size
+    images = []
+    for path, label in samples:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"   ⚠️  Gagal decode: {path}")
+            continue
+        images.append((image, label))
+
+    if not images:
+        raise ValueError("Tidak ada sample yang bisa di-decode")
+
+    profile = []
+    for size in sizes:
+        kwargs = predict_kwargs(imgsz=size)
+
+        # Warmup (alokasi buffer & autotune backend)
+        for image, _ in images[:warmup]:
+            model(image, **kwargs)
+
+        correct = 0
+        latencies = []
+        for image, label in images:
+            t0 = time.perf_counter()
+            results = model(image, **kwargs)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+            best = best_detection(results[0].boxes)
+            predicted = NO_DETECTION_LABEL if best is None else best[0]
+            if predicted == label:
+                correct += 1
+
+        entry = {
+            'size': int(size),
+            'accuracy': correct / len(images),
+            'latency_p50_ms': percentile(latencies, 50),
+            'latency_p95_ms': percentile(latencies, 95),
+            'n': len(images)
+        }
+        profile.append(entry)
+
+        print(f"   {size:4d}px | acc {entry['accuracy']:.2%} | "
+              f"p50 {entry['latency_p50_ms']:.1f}ms | p95 {entry['latency_p95_ms']:.1f}ms")
+
+    return profile
+
+def choose_size(profile, tolerance):
+    """
+    Pilih size terkecil dengan akurasi >= akurasi terbaik - tolerance
+    """
+    if not profile:
+        return None
+
+    best_accuracy = max(entry['accuracy'] for entry in profile)
+    for entry in sorted(profile, key=lambda e: e['size']):
+        if entry['accuracy'] >= best_accuracy - tolerance:
+            return entry['size']
+
+    return max(entry['size'] for entry in profile)
+
+def save_profile(path, profile, chosen_size, tolerance, model_path):
+    """
+    Simpan hasil profiling ke JSON
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    data = {
+        'created': datetime.now().isoformat(),
+        'model': model_path,
+        'tolerance': tolerance,
+        'chosen_size': chosen_size,
+        'sizes': profile
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+    return data
+
+def load_profile(path):
+    """
+    Load hasil profiling (None jika belum ada)
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️  Profile resolusi tidak valid: {e}")
+        return None
+
+# ========== RUNTIME CONTROLLER ==========
+class AdaptiveResolution:
+    """
+    Controller resolusi input saat runtime
+
+    Resolusi turun satu step jika ada antrian request (in-flight > high_load)
+    atau latency rata-rata melebihi target. Resolusi naik kembali ke
+    ukuran hasil profiling saat server idle dan latency jauh di bawah target.
+    """
+
+    def __init__(self, sizes, target_latency_ms, max_size=None,
+                 high_load=2, cooldown_s=5.0, alpha=0.3):
+        sizes = sorted(set(int(s) for s in sizes))
+        if max_size is not None:
+            sizes = [s for s in sizes if s <= max_size] or [min(sizes)]
+
+        self.sizes = sizes
+        self.target_latency_ms = target_latency_ms
+        self.high_load = high_load
+        self.cooldown_s = cooldown_s
+        self.alpha = alpha
+
+        self.index = len(sizes) - 1
+        self.in_flight = 0
+        self.ewma_latency_ms = None
+        self.last_change = 0
+        self.changes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def current_size(self):
+        return self.sizes[self.index]
+
+    def begin(self):
+        """
+        Tandai request masuk; return input size yang dipakai
+        """
+        with self.lock:
+            self.in_flight += 1
+            self._adjust()
+            return self.sizes[self.index]
+
+    def end(self, latency_ms=None):
+        """
+        Tandai request selesai dengan latency inference-nya
+        (None jika detector tidak dijalankan, mis. dijawab cascade)
+        """
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if latency_ms is None:
+                pass
+            elif self.ewma_latency_ms is None:
+                self.ewma_latency_ms = latency_ms
+            else:
+                self.ewma_latency_ms = (self.alpha * latency_ms +
+                                        (1 - self.alpha) * self.ewma_latency_ms)
+            self._adjust()
+
+    def _adjust(self):
+        now = time.time()
+        if now - self.last_change < self.cooldown_s:
+            return
+
+        latency = self.ewma_latency_ms or 0
+        overloaded = self.in_flight > self.high_load or latency > self.target_latency_ms
+        idle = self.in_flight <= 1 and latency < self.target_latency_ms * 0.5
+
+        if overloaded and self.index > 0:
+            self.index -= 1
+        elif idle and self.index < len(self.sizes) - 1:
+            self.index += 1
+        else:
+            return
+
+        self.last_change = now
+        self.changes += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'image_size': self.sizes[self.index],
+                'sizes': self.sizes,
+                'in_flight': self.in_flight,
+                'ewma_latency_ms': self.ewma_latency_ms or 0,
+                'resolution_changes': self.changes
+            }
+
+# ========== MAIN ==========
+def main():
+    parser = argparse.ArgumentParser(description="Profiling input size YOLOv8")
+    parser.add_argument('--samples', required=True, help="Folder dataset berlabel (subfolder per class)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--sizes', type=int, nargs='+', default=ADAPTIVE_SIZES)
+    parser.add_argument('--tolerance', type=float, default=ADAPTIVE_ACCURACY_TOLERANCE,
+                        help="Penurunan akurasi maksimum vs size terbaik (0.02 = 2%%)")
+    parser.add_argument('--limit', type=int, default=None, help="Max sample per class")
+    parser.add_argument('--output', default=RESOLUTION_PROFILE_PATH)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("📐 ADAPTIVE RESOLUTION TUNER")
+    print("=" * 70)
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("❌ Error: ultralytics tidak terinstall!")
+        sys.exit(1)
+
+    samples = load_labelled_samples(args.samples, args.limit)
+    print(f"📂 {len(samples)} sample dari {args.samples}")
+
+    model = YOLO(args.model)
+    print(f"🤖 Model: {args.model}\n")
+
+    profile = profile_sizes(model, samples, args.sizes)
+    chosen = choose_size(profile, args.tolerance)
+    save_profile(args.output, profile, chosen, args.tolerance, args.model)
+
+    print(f"\n✅ Size terpilih: {chosen}px (toleransi {args.tolerance:.1%})")
+    print(f"💾 Profile disimpan: {args.output}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - SERIAL MANAGER
+Auto-discovery port ESP32 dengan handshake + reconnect otomatis (hot-plug)
+=============================================================================
+
+FITUR:
+✅ Probe port kandidat (USB-serial CP210x / CH340 / FTDI / ESP32 native USB
+   + port dari config) dengan handshake "ID?" → "ID:<role>:<board_id>"
+✅ Probe paralel, total waktu discovery dibatasi (SERIAL_DISCOVERY_TIMEOUT)
+✅ Hasil di-cache (board → port): start berikutnya probe port cache dulu,
+   port lain hanya di-probe jika masih ada role yang belum ketemu
+✅ Watcher background: port hilang / write error → link down → discovery
+   ulang tiap SERIAL_RECONNECT_INTERVAL sampai board kembali
+✅ Multi board: tiap board yang menjawab handshake disimpan per board_id,
+   kirim ke role ("main", "cam") atau board_id tertentu
+
+CATATAN:
+- Port dibuka dengan DTR/RTS low supaya ESP32 tidak auto-reset saat dibuka
+- Firmware lama tanpa handshake: port dari config tetap dipakai jika
+  require_handshake=False (board_id = nama port)
+- ⚠️ esp32_main_controller.ino versi lama mem-parse "ID?" sebagai class 0
+  (sort ORGANIK): flash ulang firmware sebelum memakai auto-discovery
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import serial
+import serial.tools.list_ports
+
+log = logging.getLogger("serial")
+
+IDENTIFY_COMMAND = b"ID?\n"
+IDENTIFY_PREFIX = "ID:"
+PROBE_RESEND_S = 0.3
+
+# (VID, PID) USB-serial yang umum di board ESP32; PID None = semua PID vendor
+KNOWN_USB_IDS = {
+    (0x10C4, 0xEA60): "CP210x",
+    (0x1A86, 0x7523): "CH340",
+    (0x1A86, 0x55D4): "CH9102",
+    (0x0403, 0x6001): "FTDI",
+    (0x303A, None): "ESP32 native USB",
+}
+
+def is_known_usb(info):
+    if info.vid is None:
+        return False
+    return (info.vid, info.pid) in KNOWN_USB_IDS or (info.vid, None) in KNOWN_USB_IDS
+
+def port_key(info):
+    """
+    Identitas port yang stabil walau nama device berubah (ttyUSB0 → ttyUSB1)
+    """
+    return info.serial_number or info.hwid or info.device
+
+def open_port(device, baud, write_timeout=1.0):
+    """
+    Buka port tanpa memicu auto-reset ESP32 (DTR/RTS low sebelum open)
+    """
+    ser = serial.Serial()
+    ser.port = device
+    ser.baudrate = baud
+    ser.timeout = 0.05
+    ser.write_timeout = write_timeout
+    ser.dtr = False
+    ser.rts = False
+    ser.open()
+    return ser
+
+def identify(ser, timeout):
+    """
+    Kirim "ID?" berulang sampai board menjawab "ID:<role>:<board_id>"
+
+    Returns:
+        (role, board_id) atau None jika timeout
+    """
+    deadline = time.monotonic() + timeout
+    next_probe = 0.0
+    buffer = b""
+    ser.reset_input_buffer()
+
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            return None
+        if now >= next_probe:
+            ser.write(IDENTIFY_COMMAND)
+            next_probe = now + PROBE_RESEND_S
+
+        buffer += ser.read(ser.in_waiting or 1)
+        # Board juga print log lain (boot, status); cari baris handshake saja
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode(errors="replace").strip()
+            if text.startswith(IDENTIFY_PREFIX):
+                parts = text[len(IDENTIFY_PREFIX):].split(":", 1)
+                if len(parts) == 2 and parts[0]:
+                    return parts[0], parts[1]
+
+class BoardLink:
+    """
+    1 board teridentifikasi; write thread-safe, error → link down
+    """
+
+    def __init__(self, role, board_id, device, key, ser):
+        self.role = role
+        self.board_id = board_id
+        self.device = device
+        self.key = key
+        self.ser = ser
+        self.lock = threading.Lock()
+        self.connected = True
+        self.since = time.time()
+        self.writes = 0
+        self.errors = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        with self.lock:
+            if not self.connected:
+                return False
+            try:
+                self.ser.write(data)
+                self.writes += 1
+                return True
+            except (serial.SerialException, OSError) as e:
+                self.errors += 1
+                log.warning(f"⚠️  Serial {self.board_id} ({self.device}) error: {e}")
+                self._down()
+                return False
+
+    def mark_down(self):
+        with self.lock:
+            self._down()
+
+    def _down(self):
+        if self.connected:
+            self.connected = False
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+
+    def snapshot(self):
+        return {
+            'role': self.role,
+            'device': self.device,
+            'connected': self.connected,
+            'since': self.since,
+            'writes': self.writes,
+            'errors': self.errors
+        }
+
+class SerialManager:
+    """
+    Pemakaian:
+        manager = SerialManager(roles=["main"], preferred_ports=["/dev/ttyUSB0"])
+        manager.start()                     # discovery + watcher background
+        manager.write("1\\n", role="main")  # False jika board belum terhubung
+        manager.close()
+    """
+
+    def __init__(self, roles=("main",), baud=115200, preferred_ports=(), probe_timeout=2.0,
+                 discovery_timeout=5.0, reconnect_interval=3.0, cache_path=None,
+                 require_handshake=True, write_timeout=1.0):
+        self.roles = list(roles)
+        self.baud = baud
+        self.preferred_ports = [p for p in preferred_ports if p]
+        self.probe_timeout = min(probe_timeout, discovery_timeout)
+        self.discovery_timeout = discovery_timeout
+        self.reconnect_interval = reconnect_interval
+        self.cache_path = cache_path
+        self.require_handshake = require_handshake
+        self.write_timeout = write_timeout
+
+        self.lock = threading.Lock()
+        self.discover_lock = threading.Lock()
+        self.links = {}  # board_id → BoardLink
+        self.cache = self._load_cache()
+        self.stop_event = threading.Event()
+        self.watcher = None
+        self.stats = {'discoveries': 0, 'probes': 0, 'reconnects': 0, 'last_discovery_ms': 0.0}
+
+    # ---- cache ----
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self.lock:
+            self.cache.update({
+                board_id: {'role': link.role, 'device': link.device, 'key': link.key}
+                for board_id, link in self.links.items()
+            })
+            data = dict(self.cache)
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    # ---- discovery ----
+    def candidates(self):
+        """
+        Port kandidat [(device, key)]: port config dulu, lalu USB-serial dikenal
+        """
+        ports = []
+        seen = set()
+        infos = serial.tools.list_ports.comports()
+        by_device = {info.device: info for info in infos}
+
+        for device in self.preferred_ports:
+            info = by_device.get(device)
+            if info is not None or os.path.exists(device) or device.upper().startswith("COM"):
+                ports.append((device, port_key(info) if info else device))
+                seen.add(device)
+
+        for info in infos:
+            if info.device in seen:
+                continue
+            if is_known_usb(info) or "USB" in info.description or "Serial" in info.description:
+                ports.append((info.device, port_key(info)))
+                seen.add(info.device)
+        return ports
+
+    def _held_devices(self):
+        with self.lock:
+            return {link.device for link in self.links.values() if link.connected}
+
+    def missing_roles(self):
+        with self.lock:
+            connected = {link.role for link in self.links.values() if link.connected}
+        return [role for role in self.roles if role not in connected]
+
+    def _probe(self, device, key):
+        """
+        Buka + handshake 1 port; board yang menjawab langsung dipakai
+        """
+        self.stats['probes'] += 1
+        try:
+            ser = open_port(device, self.baud, self.write_timeout)
+        except (serial.SerialException, OSError) as e:
+            log.debug(f"Probe {device}: {e}")
+            return None
+
+        try:
+            identity = identify(ser, self.probe_timeout)
+        except (serial.SerialException, OSError) as e:
+            log.debug(f"Probe {device}: {e}")
+            identity = None
+
+        if identity is None:
+            if self.require_handshake or device not in self.preferred_ports:
+                ser.close()
+                return None
+            # Firmware lama: port config dipakai tanpa identitas
+            identity = (self.roles[0] if self.roles else "main", device)
+            log.warning(f"⚠️  {device} tidak menjawab handshake, dipakai sebagai '{identity[0]}'")
+
+        role, board_id = identity
+        link = BoardLink(role, board_id, device, key, ser)
+        with self.lock:
+            previous = self.links.get(board_id)
+            reconnect = previous is not None
+            if previous is not None and previous.connected:
+                # Board sama sudah terhubung lewat port lain
+                ser.close()
+                return None
+            self.links[board_id] = link
+        if reconnect:
+            self.stats['reconnects'] += 1
+        log.info(f"✓ Serial {'reconnected' if reconnect else 'connected'}: {role} {board_id} @ {device}")
+        return link
+
+    def discover(self):
+        """
+        Discovery terbatas waktu; port yang sedang dipakai tidak di-probe
+
+        Returns:
+            list BoardLink yang baru terhubung
+        """
+        with self.discover_lock:
+            start = time.monotonic()
+            deadline = start + self.discovery_timeout
+            held = self._held_devices()
+            ports = [(device, key) for device, key in self.candidates() if device not in held]
+
+            # Fase 1: port hasil cache untuk role yang belum terhubung
+            missing = set(self.missing_roles())
+            cached_keys = {entry.get('key') for entry in self.cache.values() if entry.get('role') in missing}
+            cached_devices = {entry.get('device') for entry in self.cache.values() if entry.get('role') in missing}
+            first = [p for p in ports if p[1] in cached_keys or p[0] in cached_devices]
+            rest = [p for p in ports if p not in first]
+
+            found = self._probe_all(first, deadline)
+            if rest and (self.missing_roles() or not self.roles):
+                found += self._probe_all(rest, deadline)
+
+            self.stats['discoveries'] += 1
+            self.stats['last_discovery_ms'] = (time.monotonic() - start) * 1000
+            if found:
+                self._save_cache()
+            return found
+
+    def _probe_all(self, ports, deadline):
+        if not ports:
+            return []
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return []
+
+        # Probe yang lewat deadline tetap selesai di background (dibatasi probe_timeout)
+        executor = ThreadPoolExecutor(max_workers=min(8, len(ports)))
+        futures = [executor.submit(self._probe, device, key) for device, key in ports]
+        done, _ = wait(futures, timeout=remaining)
+        executor.shutdown(wait=False)
+        return [f.result() for f in done if f.exception() is None and f.result() is not None]
+
+    # ---- watcher ----
+    def start(self):
+        """
+        Discovery awal + watcher background
+
+        Returns:
+            True jika semua role sudah terhubung
+        """
+        self.discover()
+        if self.watcher is None:
+            self.watcher = threading.Thread(target=self._watch_loop, daemon=True)
+            self.watcher.start()
+        return not self.missing_roles()
+
+    def _watch_loop(self):
+        while not self.stop_event.wait(self.reconnect_interval):
+            try:
+                self.check_links()
+                if self.missing_roles():
+                    self.discover()
+            except Exception as e:
+                log.warning(f"⚠️  Serial watcher error: {e}")
+
+    def check_links(self):
+        """
+        Link yang port-nya hilang (USB dicabut) ditandai down
+        """
+        present = {info.device for info in serial.tools.list_ports.comports()}
+        with self.lock:
+            links = [link for link in self.links.values() if link.connected]
+        for link in links:
+            if link.device not in present and not os.path.exists(link.device):
+                log.warning(f"⚠️  Serial {link.board_id} terputus ({link.device})")
+                link.mark_down()
+
+    # ---- kirim ----
+    def get(self, role="main", board_id=None):
+        """
+        Link terhubung untuk board_id (jika diberikan) atau role; None jika tidak ada
+        """
+        with self.lock:
+            if board_id is not None:
+                link = self.links.get(board_id)
+                return link if link is not None and link.connected else None
+            for link in self.links.values():
+                if link.connected and link.role == role:
+                    return link
+        return None
+
+    def write(self, data, role="main", board_id=None):
+        """
+        Kirim ke board; False jika tidak terhubung / error (watcher reconnect)
+        """
+        link = self.get(role, board_id)
+        if link is None:
+            return False
+        return link.write(data)
+
+    def close(self):
+        self.stop_event.set()
+        with self.lock:
+            links = list(self.links.values())
+        for link in links:
+            link.mark_down()
+
+    def snapshot(self):
+        with self.lock:
+            boards = {board_id: link.snapshot() for board_id, link in self.links.items()}
+        return dict(self.stats, roles=self.roles, missing=self.missing_roles(), boards=boards)
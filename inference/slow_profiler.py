@@ -0,0 +1,189 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - SLOW REQUEST PROFILER
+Breakdown stage + sampled stack profile untuk request yang lambat
+=============================================================================
+
+FITUR:
+✅ Opt-in (SLOW_PROFILER_ENABLED); saat off semua hook langsung return
+✅ Breakdown waktu per stage (decode, queue, inference, annotate, actuation, logging)
+✅ Sampling stack Python thread request tiap SLOW_PROFILER_SAMPLE_MS
+   (1 thread sampler, hanya aktif selama ada request yang di-trace)
+✅ Hanya request >= SLOW_REQUEST_THRESHOLD_MS yang disimpan (ring terbatas)
+✅ Export folded stacks (format flamegraph.pl / speedscope / inferno)
+
+ENDPOINT:
+    GET /debug/slow                  → ringkasan request lambat (JSON)
+    GET /debug/slow?stacks=1         → termasuk folded stacks per request
+    GET /debug/slow?format=folded    → gabungan folded stacks (text/plain)
+
+    curl http://<laptop_ip>:5000/debug/slow?format=folded > slow.folded
+    flamegraph.pl slow.folded > slow.svg
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter, deque
+from datetime import datetime
+
+MAX_STACK_DEPTH = 64
+
+class RequestTrace:
+    __slots__ = ("start", "last", "stages", "samples", "thread_id")
+
+    def __init__(self, start, thread_id):
+        self.start = start
+        self.last = start
+        self.stages = {}
+        self.samples = Counter()
+        self.thread_id = thread_id
+
+def _add_stage(trace, stage, ms):
+    trace.stages[stage] = trace.stages.get(stage, 0.0) + ms
+
+def fold_stack(frame):
+    """
+    Frame → string folded "root;...;leaf" (fungsi (file:line))
+    """
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class SlowRequestProfiler:
+    """
+    Hook per request (thread yang sama):
+        profiler.begin(start_time)
+        profiler.mark("decode") ...  # waktu sejak mark sebelumnya
+        profiler.finish(endpoint="/upload", ...)
+    """
+
+    def __init__(self, enabled=False, threshold_ms=1000, ring_size=50, sample_ms=5):
+        self.enabled = enabled
+        self.threshold_ms = threshold_ms
+        self.sample_interval = sample_ms / 1000.0
+        self.ring = deque(maxlen=ring_size)
+        self.local = threading.local()
+
+        self.cond = threading.Condition()
+        self.active = {}  # thread id → RequestTrace
+        self.sampler = None
+        self.traced = 0
+        self.captured = 0
+
+    # ---- hooks (dipanggil dari jalur request) ----
+    def begin(self, start_time=None):
+        if not self.enabled:
+            return
+        # start_time dari time.time() caller; stage dihitung dengan perf_counter
+        offset = (time.time() - start_time) if start_time else 0.0
+        trace = RequestTrace(time.perf_counter() - offset, threading.get_ident())
+        self.local.trace = trace
+
+        with self.cond:
+            self.active[trace.thread_id] = trace
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self._sample_loop, daemon=True)
+                self.sampler.start()
+            self.cond.notify_all()
+
+    def mark(self, stage):
+        trace = getattr(self.local, 'trace', None)
+        if trace is None:
+            return
+        now = time.perf_counter()
+        _add_stage(trace, stage, (now - trace.last) * 1000)
+        trace.last = now
+
+    def finish(self, **info):
+        trace = getattr(self.local, 'trace', None)
+        if trace is None:
+            return
+        self.local.trace = None
+
+        with self.cond:
+            self.active.pop(trace.thread_id, None)
+            self.traced += 1
+
+        now = time.perf_counter()
+        total_ms = (now - trace.start) * 1000
+        if now - trace.last > 0.0005:
+            _add_stage(trace, "other", (now - trace.last) * 1000)
+
+        if total_ms < self.threshold_ms:
+            return
+
+        with self.cond:
+            self.captured += 1
+            self.ring.append({
+                'id': self.captured,
+                'timestamp': datetime.now().isoformat(),
+                'total_ms': total_ms,
+                'stages_ms': trace.stages,
+                'samples': sum(trace.samples.values()),
+                'stacks': dict(trace.samples),
+                **info
+            })
+
+    # ---- sampler ----
+    def _sample_loop(self):
+        while True:
+            with self.cond:
+                while not self.active:
+                    self.cond.wait()
+                traces = list(self.active.values())
+
+            frames = sys._current_frames()
+            stacks = [(trace, fold_stack(frames[trace.thread_id]))
+                      for trace in traces if trace.thread_id in frames]
+            del frames
+
+            # Update di bawah lock: trace yang sudah finish tidak disentuh lagi
+            with self.cond:
+                for trace, stack in stacks:
+                    if self.active.get(trace.thread_id) is trace:
+                        trace.samples[stack] += 1
+            time.sleep(self.sample_interval)
+
+    # ---- export ----
+    def snapshot(self, include_stacks=False):
+        with self.cond:
+            records = list(self.ring)
+
+        items = []
+        for record in reversed(records):
+            item = {k: v for k, v in record.items() if k != 'stacks'}
+            if include_stacks:
+                item['folded'] = self.folded([record])
+            items.append(item)
+
+        return {
+            'enabled': self.enabled,
+            'threshold_ms': self.threshold_ms,
+            'sample_interval_ms': self.sample_interval * 1000,
+            'traced_requests': self.traced,
+            'captured': self.captured,
+            'ring_size': self.ring.maxlen,
+            'requests': items
+        }
+
+    def folded(self, records=None):
+        """
+        Folded stacks ("stack count" per baris) gabungan records (default: ring)
+        """
+        if records is None:
+            with self.cond:
+                records = list(self.ring)
+
+        total = Counter()
+        for record in records:
+            total.update(record['stacks'])
+        return "\n".join(f"{stack} {count}" for stack, count in total.most_common())
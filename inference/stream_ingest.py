@@ -0,0 +1,312 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - STREAMING MJPEG INGEST
+Koneksi TCP long-lived per kamera, bukan 1 HTTP POST per capture
+=============================================================================
+
+FITUR:
+✅ Parser JPEG incremental (raw concatenated JPEG atau multipart MJPEG)
+✅ TCP ingest server: 1 koneksi per kamera, hasil dikirim balik di koneksi sama
+✅ Antrian per kamera yang bounded (frame basi di-drop, bukan menumpuk)
+✅ Client replay untuk testing tanpa hardware (folder JPEG → stream)
+
+PROTOKOL (TCP, default port 5001):
+    Client → Server : [opsional] "CAM:<camera_id>\\n" lalu JPEG berurutan
+                      (SOI 0xFFD8 ... EOI 0xFFD9), boleh dibungkus multipart
+    Server → Client : 1 baris JSON per frame (hasil inference), + field "seq"
+
+CARA PAKAI (replay client):
+    python stream_ingest.py --host 127.0.0.1 --port 5001 --folder captured_images --fps 2
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+
+SOI = b"\xff\xd8"
+EOI = b"\xff\xd9"
+HELLO_PREFIX = b"CAM:"
+
+class MJPEGFrameParser:
+    """
+    Parser incremental: feed() potongan bytes, keluar list JPEG lengkap
+
+    Segment marker di-walk pakai field panjangnya sampai SOS, baru data
+    entropy di-scan mencari EOI. FF D9 di dalam segment (mis. thumbnail
+    EXIF di APP1) tidak dianggap akhir frame. Header multipart (boundary,
+    Content-Type, Content-Length) di antara frame otomatis terlewati. Frame
+    yang melebihi max_frame_bytes / rusak dibuang supaya buffer tidak
+    tumbuh tanpa batas.
+    """
+
+    def __init__(self, max_frame_bytes=2_000_000):
+        self.max_frame_bytes = max_frame_bytes
+        self.buffer = bytearray()
+        self.dropped = 0
+        self.corrupt = 0
+        # Posisi lanjut parse frame yang sedang terkumpul (hindari scan ulang)
+        self.pos = 2
+        self.in_scan = False
+
+    def _reset_frame(self):
+        self.pos = 2
+        self.in_scan = False
+
+    def _frame_end(self):
+        """
+        Cari akhir frame di buffer (frame mulai di offset 0)
+
+        Returns:
+            offset setelah EOI, None jika data belum cukup, -1 jika rusak
+        """
+        buf = self.buffer
+        pos = self.pos
+        while True:
+            if self.in_scan:
+                # Data entropy: FF 00 (stuffing) & FF D0-D7 (RST) bukan marker
+                ff = buf.find(b"\xff", pos)
+                if ff < 0 or ff + 1 >= len(buf):
+                    self.pos = len(buf) - 1 if ff >= 0 else len(buf)
+                    return None
+                nxt = buf[ff + 1]
+                if nxt == 0x00 or 0xD0 <= nxt <= 0xD7 or nxt == 0xFF:
+                    pos = ff + 1 if nxt == 0xFF else ff + 2
+                    continue
+                # Marker sungguhan (EOI / DHT / SOS berikutnya di progressive)
+                self.in_scan = False
+                pos = ff
+
+            if pos + 1 >= len(buf):
+                self.pos = pos
+                return None
+            if buf[pos] != 0xFF:
+                return -1
+            marker = buf[pos + 1]
+            if marker == 0xFF:
+                # Fill byte sebelum marker
+                pos += 1
+                continue
+            if marker == 0xD9:
+                return pos + 2
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            if pos + 3 >= len(buf):
+                self.pos = pos
+                return None
+            length = (buf[pos + 2] << 8) | buf[pos + 3]
+            if length < 2:
+                return -1
+            pos += 2 + length
+            if marker == 0xDA:
+                self.in_scan = True
+            if pos > len(buf):
+                # Segment belum lengkap: lanjut dari awal segment berikutnya nanti
+                self.pos = pos
+                return None
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+
+        while True:
+            start = self.buffer.find(SOI)
+            if start < 0:
+                # Simpan 1 byte terakhir (mungkin awal marker yang terpotong)
+                del self.buffer[:-1]
+                self._reset_frame()
+                break
+            if start > 0:
+                del self.buffer[:start]
+                self._reset_frame()
+
+            if self.pos > len(self.buffer):
+                end = None
+            else:
+                end = self._frame_end()
+
+            if end is None:
+                if len(self.buffer) > self.max_frame_bytes:
+                    self.dropped += 1
+                    self.buffer.clear()
+                    self._reset_frame()
+                break
+            if end < 0:
+                # Bukan JPEG valid: buang SOI ini, cari SOI berikutnya
+                self.corrupt += 1
+                del self.buffer[:2]
+                self._reset_frame()
+                continue
+
+            frames.append(bytes(self.buffer[:end]))
+            del self.buffer[:end]
+            self._reset_frame()
+
+        return frames
+
+class _CameraConnection(socketserver.StreamRequestHandler):
+    """
+    Handler 1 koneksi kamera: reader thread parse frame → queue → worker
+    """
+
+    def handle(self):
+        server = self.server
+        camera_id = f"{self.client_address[0]}:{self.client_address[1]}"
+        frames = queue.Queue(maxsize=server.queue_size)
+        parser = MJPEGFrameParser(server.max_frame_bytes)
+        write_lock = threading.Lock()
+        stop = threading.Event()
+        state = {'seq': 0, 'dropped_stale': 0}
+
+        def send(message):
+            with write_lock:
+                self.wfile.write((json.dumps(message) + "\n").encode())
+                self.wfile.flush()
+
+        def worker():
+            while not stop.is_set() or not frames.empty():
+                try:
+                    seq, jpeg, received = frames.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                try:
+                    result = server.handle_frame(jpeg, camera_id, received)
+                except Exception as e:
+                    result = {'status': 'error', 'message': str(e)}
+                result['seq'] = seq
+                result['camera'] = camera_id
+                try:
+                    send(result)
+                except OSError:
+                    stop.set()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        print(f"📡 Stream connected: {camera_id}")
+
+        try:
+            first = True
+            while not stop.is_set():
+                data = self.request.recv(65536)
+                if not data:
+                    break
+
+                # Hello opsional: "CAM:<id>\n"
+                if first and data.startswith(HELLO_PREFIX) and b"\n" in data:
+                    line, data = data.split(b"\n", 1)
+                    camera_id = line[len(HELLO_PREFIX):].decode(errors='replace').strip() or camera_id
+                    print(f"   📷 Camera ID: {camera_id}")
+                first = False
+
+                for jpeg in parser.feed(data):
+                    state['seq'] += 1
+                    item = (state['seq'], jpeg, time.time())
+                    try:
+                        frames.put_nowait(item)
+                    except queue.Full:
+                        # Drop frame paling lama: hasil untuk scene terbaru lebih berguna
+                        try:
+                            frames.get_nowait()
+                            state['dropped_stale'] += 1
+                        except queue.Empty:
+                            pass
+                        frames.put_nowait(item)
+        except OSError:
+            pass
+        finally:
+            stop.set()
+            thread.join(timeout=30)
+            print(f"📴 Stream closed: {camera_id} ({state['seq']} frames, "
+                  f"{state['dropped_stale']} stale dropped, {parser.dropped} oversize, {parser.corrupt} corrupt)")
+
+class StreamIngestServer(socketserver.ThreadingTCPServer):
+    """
+    TCP server untuk stream JPEG dari kamera
+
+    handle_frame(jpeg_bytes, camera_id, received_time) → dict hasil
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host, port, handle_frame, queue_size=2, max_frame_bytes=2_000_000):
+        self.handle_frame = handle_frame
+        self.queue_size = queue_size
+        self.max_frame_bytes = max_frame_bytes
+        super().__init__((host, port), _CameraConnection)
+
+    def start_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+# ========== REPLAY CLIENT ==========
+def replay(host, port, folder, fps=2.0, camera_id="replay", loop=False):
+    """
+    Kirim semua JPEG di folder sebagai 1 stream, print hasil per frame
+    """
+    files = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg'))
+    if not files:
+        print(f"❌ Tidak ada JPEG di {folder}")
+        return
+
+    sock = socket.create_connection((host, port))
+    sock.sendall(HELLO_PREFIX + camera_id.encode() + b"\n")
+    results = []
+
+    def reader():
+        for line in sock.makefile('r'):
+            result = json.loads(line)
+            results.append(result)
+            print(f"   ← #{result.get('seq')} {result.get('status')} "
+                  f"{result.get('class_name', '')} {result.get('latency_ms', 0):.0f}ms")
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    interval = 1.0 / fps if fps > 0 else 0
+    sent = 0
+    start = time.time()
+    try:
+        while True:
+            for path in files:
+                sock.sendall(path.read_bytes())
+                sent += 1
+                if interval:
+                    time.sleep(interval)
+            if not loop:
+                break
+    except KeyboardInterrupt:
+        pass
+
+    # Tunggu hasil terakhir lalu tutup sisi kirim
+    sock.shutdown(socket.SHUT_WR)
+    thread.join(timeout=30)
+    sock.close()
+
+    elapsed = time.time() - start
+    print(f"\n✅ Sent {sent} frames, {len(results)} results in {elapsed:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay folder JPEG ke stream ingest server")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--fps', type=float, default=2.0)
+    parser.add_argument('--camera', default="replay")
+    parser.add_argument('--loop', action='store_true')
+    args = parser.parse_args()
+
+    replay(args.host, args.port, args.folder, args.fps, args.camera, args.loop)
+
+if __name__ == '__main__':
+    main()
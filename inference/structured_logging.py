@@ -0,0 +1,277 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - STRUCTURED LOGGING
+Logging berlevel, non-blocking, JSON dengan request ID & stage timing
+=============================================================================
+
+FITUR:
+✅ Level standar logging (DEBUG / INFO / WARNING / ERROR) via LOG_LEVEL
+✅ Non-blocking: thread request hanya enqueue record ke antrian terbatas;
+   format & tulis ke console/file dilakukan 1 thread listener.
+   Antrian penuh → record dibuang & dihitung (tidak pernah blocking)
+✅ Output "text" (console, emoji seperti biasa) atau "json" (1 objek/baris)
+✅ Request ID & station per request (thread-local) otomatis ikut di tiap
+   record, plus stage timing (decode, queue, inference, ...) di log ringkasan
+✅ Sampling per pesan untuk log hot-path: record dengan sample_key (atau
+   nama logger, mis. "werkzeug") hanya ditulis 1 dari N (WARNING ke atas
+   tidak pernah di-sample)
+
+PEMAKAIAN:
+    log = logging.getLogger("inference")
+    setup_logging("INFO", "json", sample_every={'detection': 20})
+
+    request_log.begin(station="station-1")
+    request_log.mark("decode")
+    log.info("Detection %s", name, extra=sampled("detection", class_id=0))
+    request_log.finish()
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import copy
+import atexit
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+import logging.handlers
+from datetime import datetime
+
+FORMATS = ("text", "json")
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(message)s"
+
+# Atribut bawaan LogRecord; sisanya (extra=...) ikut jadi field JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "station", "sample_key", "sample_every"
+}
+
+class RequestLog:
+    """
+    Konteks per request (thread-local): request ID, station, stage timing
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def begin(self, request_id=None, station=None):
+        """
+        Mulai konteks request baru; return request ID
+        """
+        now = time.perf_counter()
+        self.local.request_id = request_id or uuid.uuid4().hex[:12]
+        self.local.station = station
+        self.local.last = now
+        self.local.stages = {}
+        return self.local.request_id
+
+    def mark(self, stage):
+        stages = getattr(self.local, 'stages', None)
+        if stages is None:
+            return
+        now = time.perf_counter()
+        stages[stage] = stages.get(stage, 0.0) + (now - self.local.last) * 1000
+        self.local.last = now
+
+    def stages(self):
+        """
+        Copy stage timing (ms) request aktif
+        """
+        return {k: round(v, 2) for k, v in (getattr(self.local, 'stages', None) or {}).items()}
+
+    def finish(self):
+        self.local.request_id = None
+        self.local.station = None
+        self.local.stages = None
+
+    @property
+    def request_id(self):
+        return getattr(self.local, 'request_id', None)
+
+    @property
+    def station(self):
+        return getattr(self.local, 'station', None)
+
+request_log = RequestLog()
+
+def sampled(key, **fields):
+    """
+    extra= untuk log hot-path yang di-sample per pesan (key)
+    """
+    fields['sample_key'] = key
+    return fields
+
+class SamplingFilter(logging.Filter):
+    """
+    Loloskan 1 dari N record per sample_key (default_every untuk key lain)
+    """
+
+    def __init__(self, sample_every=None, default_every=1):
+        super().__init__()
+        self.sample_every = dict(sample_every or {})
+        self.default_every = max(1, int(default_every))
+        self.lock = threading.Lock()
+        self.seen = {}
+        self.suppressed = {}
+
+    def filter(self, record):
+        # Log library (mis. access log "werkzeug") di-sample per nama logger
+        key = getattr(record, 'sample_key', None)
+        if key is None and record.name in self.sample_every:
+            key = record.name
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+
+        every = max(1, int(self.sample_every.get(key, self.default_every)))
+        if every == 1:
+            return True
+
+        with self.lock:
+            count = self.seen.get(key, 0)
+            self.seen[key] = count + 1
+            if count % every:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+
+        record.sample_every = every
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler dengan antrian terbatas: put_nowait, record dibuang saat penuh
+    """
+
+    def __init__(self, log_queue, context=request_log):
+        super().__init__(log_queue)
+        self.context = context
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Di thread pemanggil: gabung args, render traceback, tempel konteks request
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = getattr(record, 'request_id', None) or self.context.request_id or "-"
+        if getattr(record, 'station', None) is None:
+            record.station = self.context.station
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    """
+    1 record → 1 baris JSON (field extra ikut apa adanya)
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', "-")
+        }
+        if getattr(record, 'station', None):
+            entry['station'] = record.station
+        if getattr(record, 'sample_every', 1) > 1:
+            entry['sample_every'] = record.sample_every
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class LoggingSetup:
+    """
+    Hasil setup_logging: listener + statistik (untuk /stats)
+    """
+
+    def __init__(self, handler, listener, sampler, level, fmt):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        self.level = level
+        self.format = fmt
+        self.stopped = False
+
+    def configure(self, level=None, sample_every=None):
+        """
+        Ubah level / sampling saat runtime (hot reload config)
+        """
+        if level is not None:
+            root = logging.getLogger()
+            root.setLevel(level.upper() if isinstance(level, str) else level)
+            self.level = logging.getLevelName(root.level)
+        if sample_every is not None:
+            # Dict diganti utuh, counter per key tetap
+            self.sampler.sample_every = dict(sample_every)
+
+    def stop(self):
+        # Flush sisa antrian sebelum exit (aman dipanggil berkali-kali)
+        if not self.stopped:
+            self.stopped = True
+            self.listener.stop()
+
+    def snapshot(self):
+        with self.sampler.lock:
+            suppressed = dict(self.sampler.suppressed)
+        return {
+            'level': self.level,
+            'format': self.format,
+            'queued': self.handler.queue.qsize(),
+            'dropped': self.handler.dropped,
+            'sample_every': self.sampler.sample_every,
+            'suppressed': suppressed
+        }
+
+def setup_logging(level="INFO", fmt="text", queue_size=10000, sample_every=None,
+                  default_sample_every=1, log_file=None):
+    """
+    Konfigurasi root logger: QueueHandler non-blocking → listener thread
+    → console (+ file opsional)
+
+    Returns:
+        LoggingSetup (panggil .stop() saat shutdown)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format log harus salah satu dari {FORMATS}")
+
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT, "%H:%M:%S")
+    outputs = [logging.StreamHandler()]
+    if log_file:
+        outputs.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        ))
+    for output in outputs:
+        output.setFormatter(formatter)
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    sampler = SamplingFilter(sample_every, default_sample_every)
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    listener = logging.handlers.QueueListener(handler.queue, *outputs, respect_handler_level=True)
+    listener.start()
+
+    # Listener thread daemon: flush juga saat sys.exit() di luar main loop
+    setup = LoggingSetup(handler, listener, sampler, logging.getLevelName(root.level), fmt)
+    atexit.register(setup.stop)
+    return setup
@@ -0,0 +1,283 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - TEST-TIME AUGMENTATION (TTA)
+Prediksi ulang item borderline dengan flip & scale, digabung WBF
+=============================================================================
+
+FITUR:
+✅ Hanya untuk frame ragu: conf top-1 first pass di band [TTA_BAND_LOW,
+   TTA_BAND_HIGH). Frame yakin / kosong tetap single pass
+✅ Augmentasi di-batch per scale: 1 panggilan model untuk semua flip
+   di input size yang sama (scale = imgsz x faktor, kelipatan 32)
+✅ Weighted Box Fusion (WBF): box semua pass (termasuk first pass) yang
+   overlap & class sama dirata-rata berbobot confidence
+✅ Budget latency per request (TTA_LATENCY_BUDGET_MS): jumlah augmentasi
+   dibatasi estimasi biaya per batch (EWMA latency terukur)
+✅ Statistik: seberapa sering TTA mengubah hasil (rescued, suppressed,
+   class_changed) untuk /stats & evaluate.py --tta
+
+KENAPA:
+Item borderline (terutama anorganik vs B3) dengan conf sedikit di bawah
+CONFIDENCE_THRESHOLD langsung jadi no_detection. Beberapa view tambahan
+cukup untuk memastikan tanpa memperlambat frame yang sudah jelas.
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import math
+import time
+import threading
+
+import numpy as np
+
+from inference_utils import predict_kwargs, box_iou
+
+FLIPS = ("hflip", "vflip")
+
+def boxes_array(boxes):
+    """
+    Boxes ultralytics → N x 6 float32 (x1, y1, x2, y2, conf, cls)
+    """
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    data = boxes.data.cpu().numpy().astype(np.float32, copy=True)
+    return np.concatenate([data[:, :4], data[:, -2:]], axis=1)
+
+def flip_image(image, flip):
+    if flip == "hflip":
+        return image[:, ::-1]
+    if flip == "vflip":
+        return image[::-1]
+    return image
+
+def unflip_boxes(detections, flip, shape):
+    """
+    Kembalikan box dari image ter-flip ke koordinat image asli
+    """
+    h, w = shape[:2]
+    out = detections.copy()
+    if flip == "hflip":
+        out[:, 0], out[:, 2] = w - detections[:, 2], w - detections[:, 0]
+    elif flip == "vflip":
+        out[:, 1], out[:, 3] = h - detections[:, 3], h - detections[:, 1]
+    return out
+
+def weighted_box_fusion(predictions, iou_threshold=0.55):
+    """
+    Weighted Box Fusion (Solovyev et al.) untuk hasil beberapa pass
+
+    Args:
+        predictions: list N_i x 6 (1 array per pass/augmentasi)
+
+    Returns:
+        M x 6 terurut confidence menurun. Koordinat = rata-rata berbobot
+        confidence; confidence = mean conf cluster x min(T, N) / N
+        (T = jumlah box di cluster, N = jumlah pass)
+    """
+    n_passes = len(predictions)
+    rows = np.concatenate(predictions) if predictions else np.zeros((0, 6), dtype=np.float32)
+    if n_passes == 0 or len(rows) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    rows = rows[np.argsort(-rows[:, 4], kind='stable')]
+    clusters = []  # list of list rows
+    fused = []  # box fusi sementara per cluster (x1, y1, x2, y2, cls)
+
+    for row in rows:
+        match = -1
+        if fused:
+            candidates = np.array(fused, dtype=np.float32)
+            ious = box_iou(row[:4], candidates[:, :4])
+            ious[candidates[:, 4] != row[5]] = -1
+            best = int(np.argmax(ious))
+            if ious[best] > iou_threshold:
+                match = best
+
+        if match < 0:
+            clusters.append([row])
+            fused.append([*row[:4], row[5]])
+            continue
+
+        clusters[match].append(row)
+        members = np.array(clusters[match])
+        weights = members[:, 4:5]
+        fused[match][:4] = list((members[:, :4] * weights).sum(axis=0) / weights.sum())
+
+    out = np.zeros((len(clusters), 6), dtype=np.float32)
+    for i, members in enumerate(clusters):
+        confs = np.array([m[4] for m in members])
+        out[i, :4] = fused[i][:4]
+        out[i, 4] = confs.mean() * min(len(members), n_passes) / n_passes
+        out[i, 5] = fused[i][4]
+    return out[np.argsort(-out[:, 4], kind='stable')]
+
+def round_size(size, stride=32):
+    return max(stride, int(round(size / stride)) * stride)
+
+class TestTimeAugmenter:
+    """
+    result = tta.refine(model, frame, first_result, imgsz, threshold, first_ms)
+    → None jika frame tidak di band ragu (pakai hasil single pass)
+    """
+
+    def __init__(self, band_low=0.40, band_high=0.85, scales=(1.0, 0.83, 1.17),
+                 flips=("hflip",), budget_ms=300, wbf_iou=0.55, base_size=640):
+        unknown = set(flips) - set(FLIPS)
+        if unknown:
+            raise ValueError(f"Flip tidak dikenal: {sorted(unknown)} (pilihan: {FLIPS})")
+        if not 0 <= band_low < band_high <= 1:
+            raise ValueError("TTA band harus 0 <= low < high <= 1")
+
+        self.band_low = band_low
+        self.band_high = band_high
+        self.scales = list(scales)
+        self.flips = list(flips)
+        self.budget_ms = budget_ms
+        self.wbf_iou = wbf_iou
+        self.base_size = base_size
+
+        self.lock = threading.Lock()
+        self.cost_ms = {}  # (imgsz, batch) → EWMA latency (ms)
+        self.tta_ms = []
+        self.counters = {'frames': 0, 'triggered': 0, 'augmentations': 0, 'budget_capped': 0,
+                         'changed': 0, 'rescued': 0, 'suppressed': 0, 'class_changed': 0}
+
+    def configure(self, band_low, band_high, budget_ms):
+        """
+        Ganti band & budget saat runtime (hot reload config)
+        """
+        if not 0 <= band_low < band_high <= 1:
+            raise ValueError("TTA band harus 0 <= low < high <= 1")
+        self.band_low, self.band_high, self.budget_ms = band_low, band_high, budget_ms
+
+    def plan(self, imgsz):
+        """
+        Batch augmentasi per input size: [(size, [flip, ...]), ...]
+        (first pass = scale 1.0 tanpa flip, tidak diulang)
+        """
+        base = imgsz or self.base_size
+        groups = []
+        for scale in self.scales:
+            size = round_size(base * scale)
+            variants = [None] + self.flips
+            if size == round_size(base):
+                variants = list(self.flips)
+            if variants:
+                groups.append((size, variants))
+        return groups
+
+    def estimate_ms(self, size, batch, first_ms, base):
+        with self.lock:
+            known = self.cost_ms.get((size, batch))
+        if known is not None:
+            return known
+        # Belum pernah diukur: skala dari latency first pass (~ jumlah pixel)
+        return first_ms * (size / base) ** 2 * batch
+
+    def _observe_cost(self, size, batch, ms):
+        with self.lock:
+            previous = self.cost_ms.get((size, batch))
+            self.cost_ms[(size, batch)] = ms if previous is None else 0.7 * previous + 0.3 * ms
+
+    def refine(self, model, frame, first_result, imgsz=None, threshold=0.70, first_ms=0.0):
+        """
+        Jalankan TTA jika first pass ragu
+
+        Args:
+            first_result: hasil model(...) dengan conf=band_low
+
+        Returns:
+            None (tidak di band) atau dict {best, detections, before, augmentations,
+            capped, tta_ms}; detections (koordinat frame) sudah difilter threshold
+        """
+        first = boxes_array(first_result.boxes)
+        with self.lock:
+            self.counters['frames'] += 1
+
+        top_conf = float(first[:, 4].max()) if len(first) else 0.0
+        if not self.band_low <= top_conf < self.band_high:
+            return None
+
+        t0 = time.perf_counter()
+        base = imgsz or self.base_size
+        predictions = [first]
+        augmentations = 0
+        capped = False
+
+        for size, variants in self.plan(imgsz):
+            spent = (time.perf_counter() - t0) * 1000
+            # Kurangi isi batch sampai estimasinya muat di sisa budget
+            while variants and spent + self.estimate_ms(size, len(variants), first_ms, base) > self.budget_ms:
+                variants = variants[:-1]
+                capped = True
+            if not variants:
+                continue
+
+            batch_start = time.perf_counter()
+            images = [np.ascontiguousarray(flip_image(frame, flip)) for flip in variants]
+            results = model(images, **predict_kwargs(imgsz=size, conf=self.band_low))
+            self._observe_cost(size, len(variants), (time.perf_counter() - batch_start) * 1000)
+
+            for flip, result in zip(variants, results):
+                predictions.append(unflip_boxes(boxes_array(result.boxes), flip, frame.shape))
+            augmentations += len(variants)
+
+        fused = weighted_box_fusion(predictions, self.wbf_iou)
+        fused = fused[fused[:, 4] >= threshold]
+        tta_ms = (time.perf_counter() - t0) * 1000
+
+        before = int(first[np.argmax(first[:, 4]), 5]) if top_conf >= threshold else -1
+        after = int(fused[0, 5]) if len(fused) else -1
+        self._record(before, after, augmentations, capped, tta_ms)
+
+        return {
+            'best': (after, float(fused[0, 4]), 0) if len(fused) else None,
+            'detections': fused,
+            'before': before,
+            'augmentations': augmentations,
+            'capped': capped,
+            'tta_ms': tta_ms
+        }
+
+    def _record(self, before, after, augmentations, capped, tta_ms):
+        with self.lock:
+            self.counters['triggered'] += 1
+            self.counters['augmentations'] += augmentations
+            self.counters['budget_capped'] += int(capped)
+            if before != after:
+                self.counters['changed'] += 1
+                if before == -1:
+                    self.counters['rescued'] += 1
+                elif after == -1:
+                    self.counters['suppressed'] += 1
+                else:
+                    self.counters['class_changed'] += 1
+            self.tta_ms.append(tta_ms)
+            if len(self.tta_ms) > 500:
+                del self.tta_ms[:-500]
+
+    def snapshot(self):
+        """
+        Statistik TTA untuk endpoint /stats
+        """
+        with self.lock:
+            ordered = sorted(self.tta_ms)
+            triggered = self.counters['triggered']
+
+            def pct(p):
+                if not ordered:
+                    return 0.0
+                return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]
+
+            return dict(
+                self.counters,
+                trigger_rate=triggered / self.counters['frames'] if self.counters['frames'] else 0.0,
+                change_rate=self.counters['changed'] / triggered if triggered else 0.0,
+                avg_augmentations=self.counters['augmentations'] / triggered if triggered else 0.0,
+                tta_p50_ms=pct(50),
+                tta_p95_ms=pct(95),
+                budget_ms=self.budget_ms,
+                band=[self.band_low, self.band_high]
+            )
@@ -0,0 +1,147 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - MULTI-IMAGE UPLOAD
+Beberapa JPEG dalam 1 request /upload_batch: parsing body + decode paralel
+=============================================================================
+
+FITUR:
+✅ 2 format body:
+   - multipart/form-data: field file berulang, urutan dipertahankan
+   - binary length-prefixed: [uint32 big-endian panjang][JPEG] berulang
+✅ Batas jumlah image per request & ukuran per image (body rusak → 400)
+✅ Decode paralel di thread pool bersama (cv2.imdecode melepas GIL);
+   image yang gagal decode tetap punya slot hasil (status error)
+✅ Client replay: folder JPEG → /upload_batch, untuk drain backlog station
+   setelah koneksi putus
+
+PROTOKOL:
+    POST /upload_batch?station=<id>[&actuate=1]
+    Response: {"status": "success", "count": N, "results": [hasil per image,
+              urutan sama dengan body], "latency_ms": ...}
+    Default tanpa aktuasi (frame backlog, item sudah tidak di platform);
+    actuate=1 / header X-Actuate: 1 → command dikirim per item
+
+CARA PAKAI (replay client):
+    python upload_batch.py --url http://127.0.0.1:5000 --folder captured_images --batch 8
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import time
+import struct
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+LENGTH_PREFIX = struct.Struct(">I")
+CONTENT_TYPE = "application/octet-stream"
+
+def pack_frames(blobs):
+    """
+    List JPEG bytes → body length-prefixed
+    """
+    return b"".join(LENGTH_PREFIX.pack(len(blob)) + bytes(blob) for blob in blobs)
+
+def unpack_frames(body, max_images=16, max_image_bytes=2_000_000):
+    """
+    Body length-prefixed → list memoryview JPEG (tanpa copy)
+
+    Raises:
+        ValueError jika body terpotong / melebihi batas
+    """
+    view = memoryview(body)
+    frames = []
+    offset = 0
+    while offset < len(view):
+        if offset + LENGTH_PREFIX.size > len(view):
+            raise ValueError(f"Header panjang terpotong di byte {offset}")
+        (length,) = LENGTH_PREFIX.unpack_from(view, offset)
+        offset += LENGTH_PREFIX.size
+        if length == 0 or length > max_image_bytes:
+            raise ValueError(f"Image #{len(frames)}: ukuran {length} byte di luar batas (maks {max_image_bytes})")
+        if offset + length > len(view):
+            raise ValueError(f"Image #{len(frames)} terpotong ({len(view) - offset}/{length} byte)")
+        frames.append(view[offset:offset + length])
+        offset += length
+        if len(frames) > max_images:
+            raise ValueError(f"Maksimal {max_images} image per request")
+    return frames
+
+class BatchDecoder:
+    """
+    images = decoder.decode(blobs) → list image BGR / None (gagal decode),
+    urutan sama dengan blobs
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-decode")
+
+    @staticmethod
+    def _decode(blob):
+        import cv2
+
+        return cv2.imdecode(np.frombuffer(blob, np.uint8), cv2.IMREAD_COLOR)
+
+    def decode(self, blobs):
+        if len(blobs) <= 1:
+            return [self._decode(blob) for blob in blobs]
+        return list(self.pool.map(self._decode, blobs))
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+def replay(url, folder, batch=8, station=None, actuate=False):
+    """
+    Kirim semua JPEG di folder ke /upload_batch per batch (urut nama file)
+    """
+    import requests
+
+    paths = sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in (".jpg", ".jpeg"))
+    params = {'actuate': "1" if actuate else "0"}
+    if station:
+        params['station'] = station
+
+    session = requests.Session()
+    sent = 0
+    start = time.perf_counter()
+    for i in range(0, len(paths), batch):
+        chunk = paths[i:i + batch]
+        while True:
+            response = session.post(
+                f"{url.rstrip('/')}/upload_batch",
+                data=pack_frames([p.read_bytes() for p in chunk]),
+                params=params,
+                headers={'Content-Type': CONTENT_TYPE},
+                timeout=60
+            )
+            if response.status_code != 503:
+                break
+            # Server overload: tunggu sesuai Retry-After lalu kirim ulang batch yang sama
+            time.sleep(float(response.headers.get('Retry-After', 1)))
+
+        response.raise_for_status()
+        for path, result in zip(chunk, response.json()['results']):
+            print(f"{path.name}: {result.get('class_name', result['status'])}")
+        sent += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {sent} image dalam {elapsed:.1f}s ({sent / elapsed if elapsed else 0:.1f} image/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay folder JPEG ke /upload_batch")
+    parser.add_argument('--url', default="http://127.0.0.1:5000")
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--station', default=None)
+    parser.add_argument('--actuate', action='store_true', help="Kirim command ke ESP32 per item")
+    args = parser.parse_args()
+
+    replay(args.url, args.folder, args.batch, args.station, args.actuate)
+
+if __name__ == '__main__':
+    main()
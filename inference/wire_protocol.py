@@ -0,0 +1,534 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - BINARY WIRE PROTOCOL
+Frame biner ringkas laptop ⇄ ESP32: command, ack, status
+=============================================================================
+
+FITUR:
+✅ Frame kecil dengan sequence number + CRC16 (command = 13 byte,
+   bandingkan HTTP POST JSON ratusan byte)
+✅ Pesan: COMMAND (station, class, confidence), ACK (status per seq),
+   STATUS_REQUEST / STATUS (counter, bin full, jarak ultrasonik)
+✅ Decoder streaming: resync otomatis, frame CRC salah dibuang & dihitung
+✅ Transport: serial, UDP (1 datagram = 1 frame), TCP (stream)
+✅ Client: ack dikorelasikan per seq, retry dengan seq sama (receiver
+   dedup → tidak double sort), RTT per command
+✅ Stub receiver referensi (emulasi ESP32) untuk test tanpa hardware
+
+FORMAT FRAME (little-endian):
+    +--------+------+-----+-----+---------------+-------+
+    | A5 5A  | type | seq | len | payload (len) | crc16 |
+    +--------+------+-----+-----+---------------+-------+
+      2 B      1 B    2 B   1 B                   2 B
+    crc16 = CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) atas type..payload
+
+PAYLOAD:
+    COMMAND (0x01)   station u16 | class i8 | confidence u16 (x10000)
+    ACK (0x02)       status u8 (0 OK, 1 BIN_FULL, 2 INVALID, 3 BUSY)
+                     seq ACK = seq COMMAND yang di-ack
+    STATUS_REQ (0x03) kosong
+    STATUS (0x04)    organik u16 | anorganik u16 | b3 u16 | total u16 |
+                     full bitmask u8 (bit0 organik, bit1 anorganik, bit2 b3) |
+                     jarak organik/anorganik/b3 u16 (mm)
+
+CARA PAKAI:
+    # Stub receiver (UDP 9100 + TCP 9101)
+    python wire_protocol.py receiver --udp 9100 --tcp 9101
+
+    # Kirim command + tunggu ack
+    python wire_protocol.py send --udp 127.0.0.1:9100 --class 1 --confidence 0.92
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+import re
+import time
+import random
+import socket
+import struct
+import argparse
+import binascii
+import threading
+from collections import deque, namedtuple
+
+SYNC = b"\xA5\x5A"
+HEADER = struct.Struct("<BHB")  # type, seq, len
+CRC = struct.Struct("<H")
+MAX_PAYLOAD = 64
+FRAME_OVERHEAD = len(SYNC) + HEADER.size + CRC.size
+
+COMMAND = 0x01
+ACK = 0x02
+STATUS_REQUEST = 0x03
+STATUS = 0x04
+
+ACK_OK = 0
+ACK_BIN_FULL = 1
+ACK_INVALID = 2
+ACK_BUSY = 3
+ACK_NAMES = {ACK_OK: "ok", ACK_BIN_FULL: "bin_full", ACK_INVALID: "invalid", ACK_BUSY: "busy"}
+
+COMMAND_PAYLOAD = struct.Struct("<HbH")
+ACK_PAYLOAD = struct.Struct("<B")
+STATUS_PAYLOAD = struct.Struct("<HHHHBHHH")
+BINS = ("organik", "anorganik", "b3")
+
+Frame = namedtuple("Frame", ["type", "seq", "payload"])
+
+class ProtocolError(Exception):
+    pass
+
+def crc16(data):
+    """
+    CRC-16/CCITT-FALSE (binascii.crc_hqx = poly 0x1021)
+    """
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def station_number(station):
+    """
+    Station ID string → u16 ("station-3" → 3, angka di akhir nama)
+    """
+    if isinstance(station, int):
+        return station & 0xFFFF
+    match = re.search(r"(\d+)$", station or "")
+    return int(match.group(1)) & 0xFFFF if match else 0
+
+# ========== ENCODE ==========
+def encode_frame(msg_type, seq, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"Payload {len(payload)} byte > {MAX_PAYLOAD}")
+    body = HEADER.pack(msg_type, seq & 0xFFFF, len(payload)) + payload
+    return SYNC + body + CRC.pack(crc16(body))
+
+def encode_command(seq, station, class_id, confidence):
+    conf = max(0, min(10000, int(round(confidence * 10000))))
+    return encode_frame(COMMAND, seq, COMMAND_PAYLOAD.pack(station_number(station), class_id, conf))
+
+def encode_ack(seq, status=ACK_OK):
+    return encode_frame(ACK, seq, ACK_PAYLOAD.pack(status))
+
+def encode_status_request(seq):
+    return encode_frame(STATUS_REQUEST, seq)
+
+def encode_status(seq, counts, full, distances_cm):
+    """
+    counts/full/distances_cm = dict per bin (organik, anorganik, b3)
+    """
+    mask = sum(1 << i for i, name in enumerate(BINS) if full.get(name))
+    total = sum(counts.get(name, 0) for name in BINS)
+    distances = [max(0, min(0xFFFF, int(round(distances_cm.get(name, 0) * 10)))) for name in BINS]
+    payload = STATUS_PAYLOAD.pack(*(counts.get(name, 0) & 0xFFFF for name in BINS),
+                                  total & 0xFFFF, mask, *distances)
+    return encode_frame(STATUS, seq, payload)
+
+# ========== DECODE ==========
+def parse_message(frame):
+    """
+    Frame → dict sesuai type
+
+    Raises:
+        ProtocolError jika type tidak dikenal / panjang payload salah
+    """
+    try:
+        return _parse_payload(frame)
+    except struct.error as e:
+        raise ProtocolError(f"Payload type {frame.type:#04x} rusak: {e}")
+
+def _parse_payload(frame):
+    if frame.type == COMMAND:
+        station, class_id, conf = COMMAND_PAYLOAD.unpack(frame.payload)
+        return {'type': "command", 'seq': frame.seq, 'station': station,
+                'class': class_id, 'confidence': conf / 10000.0}
+    if frame.type == ACK:
+        (status,) = ACK_PAYLOAD.unpack(frame.payload)
+        return {'type': "ack", 'seq': frame.seq, 'status': ACK_NAMES.get(status, status)}
+    if frame.type == STATUS_REQUEST:
+        return {'type': "status_request", 'seq': frame.seq}
+    if frame.type == STATUS:
+        values = STATUS_PAYLOAD.unpack(frame.payload)
+        return {
+            'type': "status",
+            'seq': frame.seq,
+            'counts': dict(zip(BINS, values[0:3])),
+            'total': values[3],
+            'full': {name: bool(values[4] & (1 << i)) for i, name in enumerate(BINS)},
+            'distances_cm': {name: d / 10.0 for name, d in zip(BINS, values[5:8])}
+        }
+    raise ProtocolError(f"Type tidak dikenal: {frame.type:#04x}")
+
+class FrameDecoder:
+    """
+    Decoder streaming (serial / TCP): feed(bytes) → list Frame lengkap
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.discarded_bytes = 0
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+
+        while True:
+            start = self.buffer.find(SYNC)
+            if start < 0:
+                # Simpan 1 byte terakhir (bisa jadi awal SYNC)
+                keep = 1 if self.buffer[-1:] == SYNC[:1] else 0
+                self.discarded_bytes += len(self.buffer) - keep
+                del self.buffer[:len(self.buffer) - keep]
+                return frames
+            if start:
+                self.discarded_bytes += start
+                del self.buffer[:start]
+
+            if len(self.buffer) < len(SYNC) + HEADER.size:
+                return frames
+            msg_type, seq, length = HEADER.unpack_from(self.buffer, len(SYNC))
+            if length > MAX_PAYLOAD:
+                # Header rusak: geser 1 byte, cari SYNC berikutnya
+                del self.buffer[:1]
+                self.discarded_bytes += 1
+                continue
+
+            total = FRAME_OVERHEAD + length
+            if len(self.buffer) < total:
+                return frames
+
+            body = bytes(self.buffer[len(SYNC):total - CRC.size])
+            (crc,) = CRC.unpack_from(self.buffer, total - CRC.size)
+            if crc != crc16(body):
+                self.crc_errors += 1
+                del self.buffer[:1]
+                self.discarded_bytes += 1
+                continue
+
+            frames.append(Frame(msg_type, seq, body[HEADER.size:]))
+            del self.buffer[:total]
+
+def decode_datagram(data):
+    """
+    1 datagram UDP = 1 frame; None jika rusak
+    """
+    frames = FrameDecoder().feed(data)
+    return frames[0] if frames else None
+
+# ========== TRANSPORT ==========
+class UdpTransport:
+    def __init__(self, host, port):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, frame):
+        self.sock.sendto(frame, self.address)
+
+    def receive(self, timeout):
+        self.sock.settimeout(max(timeout, 0.001))
+        try:
+            data, _ = self.sock.recvfrom(FRAME_OVERHEAD + MAX_PAYLOAD)
+        except socket.timeout:
+            return []
+        frame = decode_datagram(data)
+        return [frame] if frame else []
+
+    def close(self):
+        self.sock.close()
+
+class StreamTransport:
+    """
+    Transport stream: TCP socket atau serial (pyserial / SerialManager link)
+    """
+
+    def __init__(self, write, read):
+        self.write = write
+        self.read = read
+        self.decoder = FrameDecoder()
+
+    @classmethod
+    def tcp(cls, host, port, connect_timeout=2.0):
+        sock = socket.create_connection((host, port), timeout=connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def read(timeout):
+            sock.settimeout(max(timeout, 0.001))
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                return b""
+            if not data:
+                raise ConnectionError("TCP connection closed")
+            return data
+
+        transport = cls(sock.sendall, read)
+        transport.sock = sock
+        return transport
+
+    @classmethod
+    def serial(cls, ser):
+        def read(timeout):
+            ser.timeout = max(timeout, 0.001)
+            return ser.read(ser.in_waiting or 1)
+
+        return cls(ser.write, read)
+
+    def send(self, frame):
+        self.write(frame)
+
+    def receive(self, timeout):
+        return self.decoder.feed(self.read(timeout))
+
+    def close(self):
+        sock = getattr(self, 'sock', None)
+        if sock is not None:
+            sock.close()
+
+# ========== CLIENT ==========
+class ProtocolClient:
+    """
+    Kirim command / status request, tunggu ack sesuai seq
+
+        client = ProtocolClient(UdpTransport(ip, 9100))
+        ack = client.send_command("station-1", 1, 0.92)   # dict ack / None
+    """
+
+    def __init__(self, transport, timeout=0.5, retries=2):
+        self.transport = transport
+        self.timeout = timeout
+        self.retries = retries
+        # Seq awal acak: restart client tidak bentrok dengan window dedup receiver
+        self.seq = random.randrange(0x10000)
+        self.lock = threading.Lock()
+        self.rtts_ms = deque(maxlen=500)
+        self.stats = {'sent': 0, 'acked': 0, 'retries': 0, 'timeouts': 0, 'stale': 0}
+
+    def configure(self, timeout, retries):
+        """
+        Ganti ack timeout & retry (hot reload); request yang sedang jalan
+        selesai dengan nilai lama
+        """
+        with self.lock:
+            self.timeout = timeout
+            self.retries = retries
+
+    def _next_seq(self):
+        self.seq = (self.seq + 1) & 0xFFFF
+        return self.seq
+
+    def request(self, build, expect):
+        """
+        Kirim frame build(seq), tunggu balasan type expect dengan seq sama
+        """
+        with self.lock:
+            seq = self._next_seq()
+            frame = build(seq)
+
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self.stats['retries'] += 1
+                start = time.perf_counter()
+                self.transport.send(frame)
+                self.stats['sent'] += 1
+                deadline = start + self.timeout
+
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    for reply in self.transport.receive(remaining):
+                        if reply.type == expect and reply.seq == seq:
+                            try:
+                                message = parse_message(reply)
+                            except ProtocolError:
+                                self.stats['stale'] += 1
+                                continue
+                            self.rtts_ms.append((time.perf_counter() - start) * 1000)
+                            self.stats['acked'] += 1
+                            return message
+                        self.stats['stale'] += 1
+
+            self.stats['timeouts'] += 1
+            return None
+
+    def send_command(self, station, class_id, confidence):
+        return self.request(lambda seq: encode_command(seq, station, class_id, confidence), ACK)
+
+    def request_status(self):
+        return self.request(encode_status_request, STATUS)
+
+    def snapshot(self):
+        ordered = sorted(self.rtts_ms)
+        return dict(
+            self.stats,
+            rtt_p50_ms=ordered[len(ordered) // 2] if ordered else 0.0,
+            rtt_max_ms=ordered[-1] if ordered else 0.0
+        )
+
+# ========== STUB RECEIVER ==========
+class StubReceiver:
+    """
+    Emulasi sisi ESP32: decode command, dedup seq per station, balas ACK /
+    STATUS. on_command(station, class_id, confidence) → kode ACK (opsional)
+    """
+
+    def __init__(self, on_command=None, dedup_window=64):
+        self.on_command = on_command
+        self.lock = threading.Lock()
+        self.recent = {}  # station → deque seq terakhir (dedup retry)
+        self.dedup_window = dedup_window
+        self.counts = {name: 0 for name in BINS}
+        self.stats = {'commands': 0, 'duplicates': 0, 'invalid': 0}
+
+    def handle(self, frame):
+        """
+        Frame masuk → bytes balasan (atau None)
+        """
+        if frame.type == STATUS_REQUEST:
+            with self.lock:
+                counts = dict(self.counts)
+            return encode_status(frame.seq, counts, {}, {})
+        if frame.type != COMMAND:
+            return None
+
+        try:
+            message = parse_message(frame)
+        except ProtocolError:
+            self.stats['invalid'] += 1
+            return None
+        with self.lock:
+            seen = self.recent.setdefault(message['station'], deque(maxlen=self.dedup_window))
+            if frame.seq in seen:
+                # Retry dari client: ack lagi tanpa sort ulang
+                self.stats['duplicates'] += 1
+                return encode_ack(frame.seq, ACK_OK)
+            seen.append(frame.seq)
+
+        if not 0 <= message['class'] < len(BINS):
+            self.stats['invalid'] += 1
+            return encode_ack(frame.seq, ACK_INVALID)
+
+        status = ACK_OK
+        if self.on_command is not None:
+            status = self.on_command(message['station'], message['class'], message['confidence']) or ACK_OK
+        with self.lock:
+            self.stats['commands'] += 1
+            if status == ACK_OK:
+                self.counts[BINS[message['class']]] += 1
+        return encode_ack(frame.seq, status)
+
+    def serve_udp(self, host, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+
+        def loop():
+            while True:
+                data, address = sock.recvfrom(FRAME_OVERHEAD + MAX_PAYLOAD)
+                frame = decode_datagram(data)
+                reply = self.handle(frame) if frame else None
+                if reply:
+                    sock.sendto(reply, address)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return sock
+
+    def serve_stream(self, read, write):
+        """
+        Loop blocking untuk 1 stream (koneksi TCP / serial)
+        """
+        decoder = FrameDecoder()
+        while True:
+            data = read()
+            if not data:
+                return
+            for frame in decoder.feed(data):
+                reply = self.handle(frame)
+                if reply:
+                    write(reply)
+
+    def serve_tcp(self, host, port):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+
+        def accept_loop():
+            while True:
+                conn, _ = server.accept()
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                threading.Thread(
+                    target=self.serve_stream,
+                    args=(lambda: conn.recv(4096), conn.sendall),
+                    daemon=True
+                ).start()
+
+        threading.Thread(target=accept_loop, daemon=True).start()
+        return server
+
+# ========== CLI ==========
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary wire protocol: stub receiver / sender")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    recv = sub.add_parser('receiver', help="Stub receiver (emulasi ESP32)")
+    recv.add_argument('--host', default="0.0.0.0")
+    recv.add_argument('--udp', type=int, help="Port UDP")
+    recv.add_argument('--tcp', type=int, help="Port TCP")
+    recv.add_argument('--serial', help="Port serial (mis. /dev/ttyUSB0)")
+    recv.add_argument('--baud', type=int, default=115200)
+
+    send = sub.add_parser('send', help="Kirim command & ukur RTT")
+    target = send.add_mutually_exclusive_group(required=True)
+    target.add_argument('--udp', help="host:port")
+    target.add_argument('--tcp', help="host:port")
+    send.add_argument('--station', default="station-1")
+    send.add_argument('--class', dest='class_id', type=int, default=0)
+    send.add_argument('--confidence', type=float, default=0.9)
+    send.add_argument('--count', type=int, default=1)
+    send.add_argument('--status', action='store_true', help="Minta status setelah command")
+    args = parser.parse_args()
+
+    if args.command == 'receiver':
+        def on_command(station, class_id, confidence):
+            print(f"📥 station {station} → {BINS[class_id].upper()} ({confidence:.2%})")
+
+        receiver = StubReceiver(on_command)
+        if args.udp:
+            receiver.serve_udp(args.host, args.udp)
+            print(f"📡 UDP udp://{args.host}:{args.udp}")
+        if args.tcp:
+            receiver.serve_tcp(args.host, args.tcp)
+            print(f"📡 TCP tcp://{args.host}:{args.tcp}")
+        if args.serial:
+            import serial
+            ser = serial.Serial(args.serial, args.baud, timeout=None)
+            threading.Thread(
+                target=receiver.serve_stream,
+                args=(lambda: ser.read(ser.in_waiting or 1), ser.write),
+                daemon=True
+            ).start()
+            print(f"🔌 Serial {args.serial}")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"   {receiver.stats} | {receiver.counts}")
+        except KeyboardInterrupt:
+            print("\n🛑 Receiver dihentikan")
+        return
+
+    transport = UdpTransport(*parse_address(args.udp)) if args.udp else StreamTransport.tcp(*parse_address(args.tcp))
+    client = ProtocolClient(transport)
+    for _ in range(args.count):
+        ack = client.send_command(args.station, args.class_id, args.confidence)
+        print(f"📤 seq {client.seq} → {ack['status'] if ack else 'TIMEOUT'}")
+    if args.status:
+        print(f"📊 {client.request_status()}")
+    print(f"   {client.snapshot()}")
+    transport.close()
+
+if __name__ == '__main__':
+    main()
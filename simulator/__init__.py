@@ -0,0 +1,28 @@
+"""
+=============================================================================
+SISTEM PEMILAH SAMPAH CERDAS - HARDWARE SIMULATOR
+Emulasi ESP32-CAM, ESP32 Main Controller & serial untuk testing tanpa hardware
+=============================================================================
+
+FITUR:
+✅ ESP32-CAM uploader: POST JPEG dari folder ke /upload dengan rate tertentu
+✅ ESP32 Main: /classify, /status, /reset dengan timing servo, pengisian bin
+   (jarak ultrasonik menurun per item) dan failure injection (timeout, reboot)
+✅ Virtual serial port pair (pty) untuk jalur fallback Serial
+
+CARA PAKAI (dari root repo):
+    python -m simulator main --port 8080 --serial
+    python -m simulator camera --url http://127.0.0.1:5000/upload --folder captured_images --rate 1
+    python -m simulator all --folder captured_images --rate 2 --cameras 3
+
+    Lalu set di config.py: ESP32_MAIN_IP = "127.0.0.1", ESP32_MAIN_PORT = 8080
+    dan SERIAL_PORT_LINUX = <path pty yang di-print simulator>
+
+Author: @krompium
+Untuk: UAS Sistem Pemilah Sampah Cerdas
+=============================================================================
+"""
+
+from simulator.camera import CameraUploader
+from simulator.main_controller import MainControllerSim, FailureInjector
+from simulator.virtual_serial import VirtualSerialPair
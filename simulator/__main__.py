@@ -0,0 +1,116 @@
+"""
+CLI simulator: python -m simulator {main,camera,all} ...
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from simulator.camera import CameraUploader
+from simulator.main_controller import MainControllerSim, FailureInjector
+from simulator.virtual_serial import VirtualSerialPair
+
+# Import config (nama eksplisit, lihat main_controller.py)
+try:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import LAPTOP_PORT
+except ImportError:
+    LAPTOP_PORT = 5000
+
+def add_main_args(parser):
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080, help="Port ESP32 Main virtual")
+    parser.add_argument('--serial', action='store_true', help="Buat virtual serial port pair")
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help="Pengali delay servo (0 = instan, 0.1 = 10x lebih cepat)")
+    parser.add_argument('--bin-depth', type=float, default=40.0, help="Jarak sensor saat bin kosong (cm)")
+    parser.add_argument('--fill-per-item', type=float, default=0.8, help="Rata-rata cm terisi per item")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Peluang request hang")
+    parser.add_argument('--reset-rate', type=float, default=0.0, help="Peluang board reboot")
+    parser.add_argument('--hang', type=float, default=10.0, help="Durasi hang (detik)")
+    parser.add_argument('--reboot', type=float, default=3.0, help="Durasi offline saat reboot (detik)")
+    parser.add_argument('--seed', type=int, default=None)
+
+def add_camera_args(parser, default_url):
+    parser.add_argument('--url', default=default_url)
+    parser.add_argument('--folder', required=True, help="Folder JPEG")
+    parser.add_argument('--rate', type=float, default=1.0, help="Upload per detik per kamera")
+    parser.add_argument('--cameras', type=int, default=1, help="Jumlah kamera paralel")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Variasi interval (0-1)")
+    parser.add_argument('--limit', type=int, default=None, help="Max upload per kamera")
+    parser.add_argument('--once', action='store_true', help="Tidak loop folder")
+
+def start_main(args):
+    failures = FailureInjector(args.timeout_rate, args.reset_rate, args.hang, args.reboot, args.seed)
+    sim = MainControllerSim(args.bin_depth, args.fill_per_item, args.time_scale, failures, args.seed)
+
+    port = None
+    if args.serial:
+        port = VirtualSerialPair()
+        print(f"🔌 [SIM] Virtual serial: {port.host_path}")
+        print(f"   Set SERIAL_PORT_LINUX = \"{port.host_path}\" di config.py")
+
+    sim.start_background(args.host, args.port, port)
+    return sim
+
+def start_cameras(args):
+    cameras = []
+    for i in range(args.cameras):
+        camera = CameraUploader(
+            args.url, args.folder, args.rate,
+            station=f"sim-cam-{i + 1}",
+            loop=not args.once,
+            jitter=args.jitter,
+            limit=args.limit,
+            seed=i
+        )
+        camera.start_background()
+        cameras.append(camera)
+    print(f"📷 [SIM] {len(cameras)} kamera → {args.url} @ {args.rate}/s")
+    return cameras
+
+def print_camera_summary(cameras):
+    for camera in cameras:
+        s = camera.summary()
+        print(f"   {camera.station:12} sent {s['sent']:5d} | ok {s['ok']:5d} | err {s['errors']:4d} | "
+              f"skipped {s['skipped']:4d} | p50 {s['p50_ms']:.0f}ms | p95 {s['p95_ms']:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Hardware simulator (ESP32-CAM, ESP32 Main, serial)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    default_url = f"http://127.0.0.1:{LAPTOP_PORT}/upload"
+
+    add_main_args(sub.add_parser('main', help="Emulasi ESP32 Main Controller"))
+    add_camera_args(sub.add_parser('camera', help="Emulasi ESP32-CAM uploader"), default_url)
+    both = sub.add_parser('all', help="ESP32 Main + kamera sekaligus")
+    add_main_args(both)
+    add_camera_args(both, default_url)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("🧪 HARDWARE SIMULATOR")
+    print("=" * 70)
+
+    sim = start_main(args) if args.command in ('main', 'all') else None
+    cameras = start_cameras(args) if args.command in ('camera', 'all') else []
+
+    try:
+        while True:
+            time.sleep(1)
+            if cameras and not any(c.thread.is_alive() for c in cameras):
+                break
+    except KeyboardInterrupt:
+        print("\n🛑 Simulator dihentikan")
+
+    for camera in cameras:
+        camera.stop()
+    if cameras:
+        print("\n📷 Kamera:")
+        print_camera_summary(cameras)
+    if sim is not None:
+        print(f"\n🤖 ESP32 Main: {sim.stats} | status {sim.status()}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
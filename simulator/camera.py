@@ -0,0 +1,109 @@
+"""
+Emulator ESP32-CAM uploader (esp32cam_motion_capture.ino)
+
+Seperti firmware: HTTP POST raw JPEG (Content-Type: image/jpeg) ke /upload,
+blocking 1 request per kamera (http.POST menunggu response). Capture yang
+jatuh saat request sebelumnya belum selesai dilewati, sama seperti
+MIN_INTERVAL di firmware.
+"""
+
+import math
+import time
+import random
+import threading
+from pathlib import Path
+
+import requests
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg")
+
+class CameraUploader:
+    """
+    1 kamera virtual: kirim JPEG dari folder dengan rate tertentu
+    """
+
+    def __init__(self, url, folder, rate=1.0, station=None, loop=True, jitter=0.0,
+                 timeout=10.0, limit=None, seed=None):
+        self.url = url
+        self.files = sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not self.files:
+            raise FileNotFoundError(f"Tidak ada JPEG di {folder}")
+
+        self.rate = rate
+        self.station = station
+        self.loop = loop
+        self.jitter = jitter
+        self.timeout = timeout
+        self.limit = limit
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+
+        self.stats = {'sent': 0, 'ok': 0, 'errors': 0, 'skipped': 0}
+        self.latencies = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def upload(self, path):
+        headers = {'Content-Type': 'image/jpeg'}
+        if self.station:
+            headers['X-Station-ID'] = self.station
+
+        t0 = time.perf_counter()
+        try:
+            response = self.session.post(self.url, data=path.read_bytes(), headers=headers,
+                                         timeout=self.timeout)
+            ok = response.status_code == 200
+        except requests.RequestException as e:
+            print(f"   ❌ [{self.station or 'cam'}] {e.__class__.__name__}: {path.name}")
+            ok = False
+
+        self.latencies.append((time.perf_counter() - t0) * 1000)
+        self.stats['sent'] += 1
+        self.stats['ok' if ok else 'errors'] += 1
+
+    def run(self):
+        """
+        Loop upload (blocking) sampai habis / limit / stop()
+        """
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        next_at = time.time()
+        index = 0
+
+        while not self.stop_event.is_set():
+            if index >= len(self.files):
+                if not self.loop:
+                    break
+                index = 0
+            if self.limit is not None and self.stats['sent'] >= self.limit:
+                break
+
+            self.upload(self.files[index])
+            index += 1
+
+            # Slot capture yang terlewat saat menunggu response tidak dikejar
+            next_at += interval * (1 + self.random.uniform(-self.jitter, self.jitter))
+            now = time.time()
+            if interval == 0:
+                next_at = now
+            while next_at < now:
+                next_at += interval
+                self.stats['skipped'] += 1
+            self.stop_event.wait(max(0.0, next_at - now))
+
+    def start_background(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stop_event.set()
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]
+
+        return dict(self.stats, p50_ms=pct(50), p95_ms=pct(95), max_ms=ordered[-1] if ordered else 0.0)
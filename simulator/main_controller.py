@@ -0,0 +1,290 @@
+"""
+Emulator ESP32 Main Controller (esp32_main_controller.ino)
+
+Endpoint & format response sama dengan firmware:
+    POST /classify  body {"class":0}  → 200 success | 500 Bin full | 400 Invalid class
+    GET  /status                      → counters, bin_*_full, dist_* (cm)
+    GET  /reset                       → reset counters
+Tambahan khusus simulator:
+    GET  /sim/empty?bin=organik       → kosongkan bin (tanpa bin = semua)
+
+Seperti WebServer ESP32, request dilayani 1 per 1 (single-threaded), jadi
+selama servo bergerak request lain ikut menunggu.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# Import config (nama eksplisit: dari root repo, "config" juga folder/namespace package)
+try:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from config import (
+        SERVO_PENADAH_DELAY,
+        SERVO_PLATFORM_DELAY,
+        THRESHOLD_ORGANIK_FULL,
+        THRESHOLD_ANORGANIK_FULL,
+        THRESHOLD_B3_FULL
+    )
+except ImportError:
+    SERVO_PENADAH_DELAY = 2000
+    SERVO_PLATFORM_DELAY = 500
+    THRESHOLD_ORGANIK_FULL = 5
+    THRESHOLD_ANORGANIK_FULL = 5
+    THRESHOLD_B3_FULL = 5
+
+BINS = ("organik", "anorganik", "b3")
+
+# Delay LED error saat bin penuh (delay(3000) di sortWaste)
+BIN_FULL_DELAY_MS = 3000
+
+class FailureInjector:
+    """
+    Failure injection acak untuk tiap request
+
+    timeout_rate : peluang request hang (tanpa response) selama hang_s
+    reset_rate   : peluang board reboot (counter hilang, offline reboot_s)
+    """
+
+    def __init__(self, timeout_rate=0.0, reset_rate=0.0, hang_s=10.0, reboot_s=3.0, seed=None):
+        self.timeout_rate = timeout_rate
+        self.reset_rate = reset_rate
+        self.hang_s = hang_s
+        self.reboot_s = reboot_s
+        self.random = random.Random(seed)
+
+    def roll(self):
+        """
+        Returns: "timeout", "reset", atau None
+        """
+        r = self.random.random()
+        if r < self.timeout_rate:
+            return "timeout"
+        if r < self.timeout_rate + self.reset_rate:
+            return "reset"
+        return None
+
+class MainControllerSim:
+    """
+    State ESP32 Main: counters, jarak ultrasonik per bin, servo timing
+    """
+
+    def __init__(self, bin_depth_cm=40.0, fill_per_item_cm=0.8, time_scale=1.0,
+                 failures=None, seed=None, board_id="sim0001"):
+        self.bin_depth_cm = bin_depth_cm
+        self.board_id = board_id
+        self.fill_per_item_cm = fill_per_item_cm
+        self.time_scale = time_scale
+        self.failures = failures or FailureInjector()
+        self.random = random.Random(seed)
+        self.thresholds = {
+            'organik': THRESHOLD_ORGANIK_FULL,
+            'anorganik': THRESHOLD_ANORGANIK_FULL,
+            'b3': THRESHOLD_B3_FULL
+        }
+
+        # sortWaste dipanggil dari HTTP dan serial; servo cuma 1
+        self.lock = threading.Lock()
+        self.down_until = 0.0
+        self.stats = {'classify': 0, 'bin_full': 0, 'timeouts': 0, 'reboots': 0}
+        self.boot()
+        self.distances = {name: bin_depth_cm for name in BINS}
+
+    def boot(self):
+        self.counters = {name: 0 for name in BINS}
+        self.total_processed = 0
+
+    def _sleep_ms(self, ms):
+        if ms > 0 and self.time_scale > 0:
+            time.sleep(ms / 1000.0 * self.time_scale)
+
+    @property
+    def online(self):
+        return time.time() >= self.down_until
+
+    def reboot(self):
+        # Counter di RAM hilang saat reboot, isi bin tetap
+        self.stats['reboots'] += 1
+        self.down_until = time.time() + self.failures.reboot_s
+        self.boot()
+        print(f"💥 [SIM] ESP32 reboot (offline {self.failures.reboot_s:.1f}s)")
+
+    def is_full(self, name):
+        return self.distances[name] <= self.thresholds[name]
+
+    def read_distance(self, name):
+        # Noise sensor ultrasonik ± 0.3 cm
+        return round(max(0.1, self.distances[name] + self.random.uniform(-0.3, 0.3)), 1)
+
+    def sort_waste(self, category):
+        """
+        Emulasi sortWaste(): rotate → buka penadah → tutup → home
+
+        Returns:
+            True jika sukses, False jika bin penuh
+        """
+        name = BINS[category]
+        with self.lock:
+            self.stats['classify'] += 1
+            if self.is_full(name):
+                self.stats['bin_full'] += 1
+                self._sleep_ms(BIN_FULL_DELAY_MS)
+                print(f"⚠️  [SIM] Bin {name.upper()} penuh")
+                return False
+
+            self._sleep_ms(SERVO_PLATFORM_DELAY)
+            self._sleep_ms(SERVO_PENADAH_DELAY)
+            self._sleep_ms(SERVO_PLATFORM_DELAY)
+
+            drop = self.fill_per_item_cm * self.random.uniform(0.5, 1.5)
+            self.distances[name] = max(0.0, self.distances[name] - drop)
+            self.counters[name] += 1
+            self.total_processed += 1
+            print(f"🗑️  [SIM] Sorted → {name.upper()} (jarak {self.distances[name]:.1f} cm)")
+            return True
+
+    def empty(self, name=None):
+        for bin_name in ([name] if name else BINS):
+            self.distances[bin_name] = self.bin_depth_cm
+
+    def status(self):
+        status = {
+            'system_ready': True,
+            'wifi_connected': True,
+            'blynk_connected': False
+        }
+        for name in BINS:
+            status[f'{name}_count'] = self.counters[name]
+        status['total_processed'] = self.total_processed
+        for name in BINS:
+            status[f'bin_{name}_full'] = self.is_full(name)
+        for name in BINS:
+            status[f'dist_{name}'] = self.read_distance(name)
+        return status
+
+    def reset_counters(self):
+        self.boot()
+        print("🔄 [SIM] Counters RESET!")
+
+    def handle_serial_line(self, line, port):
+        """
+        Emulasi handleSerialInput(): 1 baris = class index, "ID?" = handshake
+        """
+        if not self.online:
+            return
+        if line == "ID?":
+            port.write(f"ID:main:{self.board_id}\r\n")
+            return
+        try:
+            category = int(line)
+        except ValueError:
+            category = -1
+
+        if 0 <= category <= 2:
+            ok = self.sort_waste(category)
+            port.write("✅ Sorted\r\n" if ok else "⚠️  BIN PENUH! Tidak dapat memproses.\r\n")
+        else:
+            port.write("   ❌ Invalid class! Use 0, 1, or 2\r\n")
+
+    def make_server(self, host, port):
+        sim = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, code, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def inject(self):
+                """
+                Return True jika request sudah "ditangani" oleh failure injection
+                """
+                if not sim.online:
+                    # Board sedang reboot: koneksi diputus tanpa response
+                    self.close_connection = True
+                    return True
+
+                failure = sim.failures.roll()
+                if failure == "timeout":
+                    sim.stats['timeouts'] += 1
+                    time.sleep(sim.failures.hang_s)
+                    self.close_connection = True
+                    return True
+                if failure == "reset":
+                    sim.reboot()
+                    self.close_connection = True
+                    return True
+                return False
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode(errors="replace") if length else ""
+                if self.inject():
+                    return
+
+                if urlparse(self.path).path != "/classify":
+                    self.send_error(404)
+                    return
+                if not body:
+                    self.send_response(400)
+                    self.end_headers()
+                    self.wfile.write(b"ERROR: No data received")
+                    return
+
+                try:
+                    category = int(json.loads(body).get('class', -1))
+                except (ValueError, AttributeError, TypeError):
+                    category = -1
+
+                if not 0 <= category <= 2:
+                    self.send_json(400, {'status': 'error', 'message': 'Invalid class'})
+                elif sim.sort_waste(category):
+                    self.send_json(200, {'status': 'success', 'message': 'Waste sorted'})
+                else:
+                    self.send_json(500, {'status': 'error', 'message': 'Bin full'})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if self.inject():
+                    return
+
+                if url.path == "/status":
+                    self.send_json(200, sim.status())
+                elif url.path == "/reset":
+                    sim.reset_counters()
+                    self.send_json(200, {'status': 'success', 'message': 'Counters reset'})
+                elif url.path == "/sim/empty":
+                    name = parse_qs(url.query).get('bin', [None])[0]
+                    if name is not None and name not in BINS:
+                        self.send_json(400, {'status': 'error', 'message': 'Invalid bin'})
+                        return
+                    sim.empty(name)
+                    self.send_json(200, {'status': 'success', 'emptied': name or 'all'})
+                else:
+                    self.send_error(404)
+
+        return HTTPServer((host, port), Handler)
+
+    def start_background(self, host="127.0.0.1", port=8080, serial_port=None):
+        """
+        Jalankan HTTP server (+ serial opsional) di background thread
+        """
+        if serial_port is not None:
+            serial_port.serve(lambda line: self.handle_serial_line(line, serial_port))
+
+        server = self.make_server(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🤖 [SIM] ESP32 Main di http://{host}:{server.server_address[1]} "
+              f"(time_scale {self.time_scale})")
+        return server
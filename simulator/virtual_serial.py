@@ -0,0 +1,81 @@
+"""
+Virtual serial port pair berbasis pty (Linux / macOS)
+
+Sisi "host" (path /dev/pts/N) dibuka laptop dengan pyserial seperti port
+USB biasa; sisi "device" dibaca/ditulis simulator ESP32 Main.
+Windows tidak punya pty: pakai com0com untuk pasangan COM virtual.
+"""
+
+import os
+import threading
+
+class VirtualSerialPair:
+    """
+    Pasangan serial virtual: host_path untuk laptop, readline()/write() untuk device
+    """
+
+    def __init__(self):
+        try:
+            import pty
+            import tty
+        except ImportError:
+            raise RuntimeError("Virtual serial butuh pty (Linux/macOS); di Windows pakai com0com")
+
+        self.master_fd, self.slave_fd = pty.openpty()
+        # Raw mode: tanpa echo & line editing, sama seperti UART
+        tty.setraw(self.slave_fd)
+        self.host_path = os.ttyname(self.slave_fd)
+        self.buffer = bytearray()
+        self.write_lock = threading.Lock()
+        self.closed = False
+
+    def readline(self):
+        """
+        Baca 1 baris dari host (blocking); None jika port ditutup
+        """
+        while b"\n" not in self.buffer:
+            try:
+                chunk = os.read(self.master_fd, 1024)
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            self.buffer += chunk
+
+        line, _, rest = bytes(self.buffer).partition(b"\n")
+        self.buffer = bytearray(rest)
+        return line.decode(errors="replace").strip("\r")
+
+    def write(self, text):
+        """
+        Kirim teks ke host (seperti Serial.println di ESP32)
+        """
+        with self.write_lock:
+            try:
+                os.write(self.master_fd, text.encode())
+            except OSError:
+                pass
+
+    def serve(self, handle_line):
+        """
+        Jalankan loop baca di background thread; handle_line(line) per baris
+        """
+        def loop():
+            while not self.closed:
+                line = self.readline()
+                if line is None:
+                    break
+                if line:
+                    handle_line(line)
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.closed = True
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
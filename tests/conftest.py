@@ -0,0 +1,16 @@
+"""
+Test unit komponen inference/ (tanpa kamera, ESP32, maupun model)
+
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'inference'))
+
+# Module "config" = config.example.py (+ config.py jika ada), tanpa env
+# PEMILAH_*: sama seperti server, bukan folder config/ sebagai namespace
+from config_loader import build_config, install
+
+install(build_config(environ={})[0])
@@ -0,0 +1,131 @@
+"""
+Outbox: supersede latest-only, TTL, backoff retry, replay setelah restart
+"""
+
+import pytest
+
+from outbox import Outbox
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+@pytest.fixture
+def outbox(db_path):
+    box = Outbox(db_path, retry_base_s=1.0, retry_max_s=8.0, batch_size=2)
+    yield box
+    box.stop()
+
+class Receiver:
+    """
+    Handler palsu: catat key yang diterima, bisa di-set mati
+    """
+
+    def __init__(self, up=True):
+        self.up = up
+        self.received = []
+
+    def __call__(self, key, payload):
+        if not self.up:
+            return False, "down"
+        self.received.append(key)
+        return True, "ok"
+
+def states(outbox):
+    with outbox.lock:
+        return dict(outbox.conn.execute("SELECT key, state FROM outbox").fetchall())
+
+def test_submit_delivers_and_ignores_duplicate_key(outbox):
+    receiver = Receiver()
+    outbox.register("actuation", receiver)
+
+    assert outbox.submit("actuation", {'class': 1}, "r1") == (True, "ok")
+    assert outbox.submit("actuation", {'class': 1}, "r1") == (True, "duplicate")
+    assert receiver.received == ["r1"]
+    assert outbox.snapshot()['duplicates'] == 1
+
+def test_latest_only_supersedes_pending_in_same_stream(outbox):
+    receiver = Receiver(up=False)
+    outbox.register("actuation", receiver, latest_only=True)
+
+    outbox.submit("actuation", {'class': 0}, "a1", stream="s1")
+    outbox.submit("actuation", {'class': 0}, "b1", stream="s2")
+    outbox.submit("actuation", {'class': 1}, "a2", stream="s1")
+
+    assert states(outbox) == {'a1': "superseded", 'b1': "pending", 'a2': "pending"}
+    assert outbox.snapshot()['superseded'] == 1
+
+def test_ttl_expires_pending_command(outbox):
+    outbox.register("actuation", Receiver(up=False), ttl_s=10)
+    seq, created = outbox.append("actuation", {'class': 2}, "r1", now=1000.0)
+    assert created
+
+    assert outbox.expire(now=1005.0) == 0
+    assert outbox.expire(now=1011.0) == 1
+    assert states(outbox) == {'r1': "expired"}
+    # Event expired tidak pernah dikirim ulang
+    outbox.register("actuation", Receiver(), ttl_s=10)
+    assert outbox.dispatch(now=2000.0) == 0
+
+def test_failed_delivery_backs_off_exponentially(outbox):
+    receiver = Receiver(up=False)
+    outbox.register("detection", receiver)
+    seq, _ = outbox.append("detection", {}, "r1", now=0.0)
+
+    def next_attempt():
+        with outbox.lock:
+            return outbox.conn.execute("SELECT next_attempt FROM outbox WHERE seq = ?", (seq,)).fetchone()[0]
+
+    expected = [1.0, 2.0, 4.0, 8.0, 8.0]  # base * 2^attempts, dibatasi retry_max_s
+    for attempts, backoff in enumerate(expected):
+        outbox._complete([(seq, False, "down", attempts)], now=100.0)
+        assert next_attempt() == pytest.approx(100.0 + backoff)
+
+    # Belum waktunya → tidak diambil; setelah lewat → terkirim
+    receiver.up = True
+    assert outbox.dispatch(now=100.0) == 0
+    assert outbox.dispatch(now=108.0) == 1
+    assert receiver.received == ["r1"]
+    assert states(outbox) == {'r1': "delivered"}
+
+def test_replay_after_restart_delivers_all_pending_in_order(db_path):
+    first = Outbox(db_path, batch_size=2)
+    first.register("detection", Receiver(up=False))
+    for i in range(5):
+        first.submit("detection", {'i': i}, f"r{i}")
+    first.submit("detection", {}, "done")
+    with first.lock, first.conn:
+        first.conn.execute("UPDATE outbox SET state = 'delivered' WHERE key = 'done'")
+    first.stop()
+
+    # "Restart": instance baru di file yang sama, receiver sudah hidup
+    second = Outbox(db_path, batch_size=2)
+    receiver = Receiver()
+    second.register("detection", receiver)
+    try:
+        assert second.replay() == (5, 5)
+        assert receiver.received == [f"r{i}" for i in range(5)]
+        assert second.snapshot()['pending'] == {}
+    finally:
+        second.stop()
+
+def test_dispatch_counts_only_rows_it_handles(outbox):
+    # Row lama dari kind yang tidak lagi di-register memenuhi 1 batch penuh
+    for i in range(outbox.batch_size * 2):
+        outbox.append("legacy", {}, f"old{i}", now=0.0)
+    receiver = Receiver()
+    outbox.register("detection", receiver)
+    outbox.append("detection", {}, "new", now=0.0)
+
+    assert outbox.dispatch(now=100.0) == 1
+    assert receiver.received == ["new"]
+    # Tidak ada lagi yang bisa dikirim: loop _run berhenti
+    assert outbox.dispatch(now=100.0) == 0
+
+def test_dispatch_skips_inflight_rows(outbox):
+    outbox.register("detection", Receiver())
+    seqs = [outbox.append("detection", {}, f"r{i}", now=0.0)[0] for i in range(outbox.batch_size)]
+    with outbox.lock:
+        outbox.inflight.update(seqs)
+
+    assert outbox.dispatch(now=100.0) == 0
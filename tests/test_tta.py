@@ -0,0 +1,57 @@
+"""
+TTA: weighted box fusion & un-flip koordinat
+"""
+
+import numpy as np
+import pytest
+
+from tta import unflip_boxes, weighted_box_fusion
+
+def rows(*boxes):
+    return np.array(boxes, dtype=np.float32).reshape(-1, 6)
+
+def test_empty_input():
+    assert weighted_box_fusion([]).shape == (0, 6)
+    assert weighted_box_fusion([rows(), rows()]).shape == (0, 6)
+
+def test_overlapping_boxes_fused_with_confidence_weights():
+    fused = weighted_box_fusion([
+        rows([0, 0, 10, 10, 0.9, 1]),
+        rows([2, 0, 12, 10, 0.3, 1]),
+    ], iou_threshold=0.5)
+
+    assert len(fused) == 1
+    # x1 = (0 * 0.9 + 2 * 0.3) / 1.2
+    assert fused[0, :4] == pytest.approx([0.5, 0, 10.5, 10])
+    # Box ada di 2 dari 2 pass: conf = rata-rata tanpa penalti
+    assert fused[0, 4] == pytest.approx(0.6)
+    assert fused[0, 5] == 1
+
+def test_box_missing_in_some_passes_is_penalised():
+    fused = weighted_box_fusion([
+        rows([0, 0, 10, 10, 0.8, 0]),
+        rows(),
+        rows(),
+        rows([0, 0, 10, 10, 0.6, 0]),
+    ])
+    assert len(fused) == 1
+    # mean 0.7 x min(2, 4) / 4
+    assert fused[0, 4] == pytest.approx(0.35)
+
+def test_different_class_or_low_iou_not_merged():
+    fused = weighted_box_fusion([
+        rows([0, 0, 10, 10, 0.9, 0], [50, 50, 60, 60, 0.5, 0]),
+        rows([0, 0, 10, 10, 0.7, 2]),
+    ])
+    assert len(fused) == 3
+    # Terurut confidence menurun
+    assert list(fused[:, 4]) == sorted(fused[:, 4], reverse=True)
+    assert sorted(fused[:, 5].tolist()) == [0, 0, 2]
+
+def test_unflip_boxes():
+    detections = rows([10, 20, 30, 60, 0.9, 1])
+    shape = (100, 200, 3)
+
+    assert unflip_boxes(detections, "hflip", shape)[0, :4].tolist() == [170, 20, 190, 60]
+    assert unflip_boxes(detections, "vflip", shape)[0, :4].tolist() == [10, 40, 30, 80]
+    assert unflip_boxes(detections, None, shape)[0, :4].tolist() == [10, 20, 30, 60]
@@ -0,0 +1,74 @@
+"""
+Wire protocol: CRC16, encode/parse, decoder streaming + resync
+"""
+
+import pytest
+
+from wire_protocol import (
+    SYNC, COMMAND, FrameDecoder, ProtocolError, crc16, decode_datagram,
+    encode_ack, encode_command, encode_frame, encode_status, parse_message
+)
+
+def test_crc16_ccitt_false_check_value():
+    # Check value standar CRC-16/CCITT-FALSE
+    assert crc16(b"123456789") == 0x29B1
+
+def test_command_round_trip():
+    frame = encode_command(513, "station-3", 2, 0.9234)
+    assert len(frame) == 13
+
+    (decoded,) = FrameDecoder().feed(frame)
+    assert parse_message(decoded) == {
+        'type': "command", 'seq': 513, 'station': 3, 'class': 2, 'confidence': 0.9234
+    }
+
+def test_status_round_trip():
+    frame = encode_status(7, {'organik': 4, 'b3': 1}, {'b3': True}, {'organik': 12.3})
+    message = parse_message(decode_datagram(frame))
+    assert message['total'] == 5
+    assert message['full'] == {'organik': False, 'anorganik': False, 'b3': True}
+    assert message['distances_cm']['organik'] == pytest.approx(12.3)
+
+def test_decoder_byte_by_byte():
+    stream = encode_ack(1) + encode_command(2, 1, 0, 0.5)
+    decoder = FrameDecoder()
+    frames = []
+    for i in range(len(stream)):
+        frames += decoder.feed(stream[i:i + 1])
+    assert [f.seq for f in frames] == [1, 2]
+    assert decoder.crc_errors == 0
+
+def test_decoder_resyncs_after_garbage_and_bad_crc():
+    good = encode_command(10, 1, 1, 0.8)
+    corrupt = bytearray(encode_command(11, 1, 1, 0.8))
+    corrupt[-1] ^= 0xFF
+
+    decoder = FrameDecoder()
+    frames = decoder.feed(b"\x00\xA5garbage" + bytes(corrupt) + good)
+
+    assert [f.seq for f in frames] == [10]
+    assert decoder.crc_errors == 1
+    assert decoder.discarded_bytes >= len(b"\x00\xA5garbage") + len(corrupt)
+
+def test_decoder_skips_sync_inside_oversized_header():
+    # SYNC palsu dengan len > MAX_PAYLOAD tidak boleh menahan frame asli
+    fake = SYNC + bytes([COMMAND, 0, 0, 0xFF])
+    (frame,) = FrameDecoder().feed(fake + encode_ack(42))
+    assert frame.seq == 42
+
+def test_truncated_frame_waits_for_rest():
+    frame = encode_ack(5)
+    decoder = FrameDecoder()
+    assert decoder.feed(frame[:-3]) == []
+    assert [f.seq for f in decoder.feed(frame[-3:])] == [5]
+
+def test_decode_datagram_rejects_corrupt():
+    frame = bytearray(encode_ack(3))
+    frame[5] ^= 0x01
+    assert decode_datagram(bytes(frame)) is None
+
+def test_payload_limit_and_unknown_type():
+    with pytest.raises(ProtocolError):
+        encode_frame(COMMAND, 1, b"x" * 65)
+    with pytest.raises(ProtocolError):
+        parse_message(decode_datagram(encode_frame(0x7F, 1, b"")))